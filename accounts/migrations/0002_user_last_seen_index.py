@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-19 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='last_seen',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -4,7 +4,7 @@ from django.db import models
 
 class CustomUser(AbstractUser):
     is_online = models.BooleanField(default=False)
-    last_seen = models.DateTimeField(auto_now=True)
+    last_seen = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.username
\ No newline at end of file
@@ -1,11 +1,11 @@
 from django.contrib import admin
-from .models import ChatRoom, RoomMembership, Message, MessageReaction
+from .models import ChatRoom, RoomMembership, Message, MessageReaction, PendingNotification
 
 
 @admin.register(ChatRoom)
 class ChatRoomAdmin(admin.ModelAdmin):
     list_display = ('__str__', 'room_type', 'created_by', 'member_count', 'created_at', 'is_active')
-    list_filter = ('room_type', 'is_active', 'created_at')
+    list_filter = ('room_type', 'is_active', 'broadcast_mode', 'created_at')
     search_fields = ('name', 'created_by__username')
     readonly_fields = ('id', 'created_at', 'updated_at')
 
@@ -32,7 +32,7 @@ class MessageAdmin(admin.ModelAdmin):
     list_display = ('sender', 'room', 'message_type', 'content_preview', 'timestamp', 'is_deleted')
     list_filter = ('message_type', 'is_deleted', 'timestamp')
     search_fields = ('sender__username', 'content', 'room__name')
-    readonly_fields = ('id', 'timestamp')
+    readonly_fields = ('id', 'timestamp', 'reaction_counts')
 
     def content_preview(self, obj):
         if obj.message_type == 'text' and obj.content:
@@ -46,4 +46,10 @@ class MessageAdmin(admin.ModelAdmin):
 class MessageReactionAdmin(admin.ModelAdmin):
     list_display = ('user', 'message', 'reaction', 'created_at')
     list_filter = ('reaction', 'created_at')
-    search_fields = ('user__username', 'message__content')
\ No newline at end of file
+    search_fields = ('user__username', 'message__content')
+
+
+@admin.register(PendingNotification)
+class PendingNotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'room', 'message_count', 'first_at', 'last_at')
+    search_fields = ('user__username', 'room__name')
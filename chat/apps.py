@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ChatConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chat'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .db import configure_sqlite
+        from .profiling import install_wrapper
+        from . import signals  # noqa: F401
+
+        connection_created.connect(install_wrapper, dispatch_uid='chat_query_profiling')
+        connection_created.connect(configure_sqlite, dispatch_uid='chat_configure_sqlite')
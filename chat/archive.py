@@ -0,0 +1,278 @@
+# chat/archive.py
+"""
+Message retention আর archival
+
+পুরনো messages hot table থেকে compressed, append-only JSONL files এ চলে যায়:
+
+    CHAT_ARCHIVE_ROOT/<room_id>/<YYYY-MM>.jsonl.gz   (বা .jsonl.zst)
+
+প্রতিটা batch আগে file এ লেখা + fsync হয়, তারপর database থেকে delete হয়। মাঝপথে
+crash হলে পরের run এ একই message আবার লেখা হতে পারে - reader id দিয়ে duplicate বাদ দেয়।
+load_history() hot table শেষ হলে archive files থেকে পড়ে, তাই history API র কাছে
+পুরোটা একটাই timeline।
+"""
+import bisect
+import functools
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ChatRoom, Message
+
+try:
+    import zstandard
+except ImportError:  # Optional - না থাকলে gzip
+    zstandard = None
+
+EXTENSIONS = {
+    'gzip': '.jsonl.gz',
+    'zstd': '.jsonl.zst',
+}
+
+# Process প্রতি কয়টা parsed month memory তে থাকে (load_history)
+MONTH_CACHE_SIZE = 8
+
+ARCHIVE_FIELDS = (
+    'id', 'room_id', 'sender_id', 'sender__username', 'message_type', 'content', 'file',
+    'file_name', 'file_size', 'timestamp', 'edited_at', 'is_deleted', 'reply_to_id', 'reaction_counts',
+)
+
+
+def get_archive_root():
+    return Path(getattr(settings, 'CHAT_ARCHIVE_ROOT', settings.BASE_DIR / 'archive'))
+
+
+def get_compression():
+    compression = getattr(settings, 'CHAT_ARCHIVE_COMPRESSION', 'gzip')
+    if compression not in EXTENSIONS:
+        raise ValueError(f'Unknown archive compression: {compression}')
+    if compression == 'zstd' and zstandard is None:
+        raise ValueError("CHAT_ARCHIVE_COMPRESSION = 'zstd' needs the zstandard package")
+    return compression
+
+
+def get_retention_days(room):
+    if room.retention_days is not None:
+        return room.retention_days
+    return getattr(settings, 'CHAT_DEFAULT_RETENTION_DAYS', None)
+
+
+def room_archive_dir(room_id):
+    return get_archive_root() / str(room_id)
+
+
+def open_archive(path, mode):
+    """
+    Extension দেখে gzip বা zstd file text mode এ খোলে ('at' বা 'rt')।
+    zstd এ প্রতিটা append batch আলাদা frame - zstandard.open() প্রথম frame এর পর থামে,
+    তাই পড়ার সময় read_across_frames=True দিয়ে stream_reader।
+    """
+    if str(path).endswith(EXTENSIONS['zstd']):
+        if zstandard is None:
+            raise RuntimeError(f'{path} is zstd compressed but zstandard is not installed')
+        if 'r' in mode:
+            reader = zstandard.ZstdDecompressor().stream_reader(
+                open(path, 'rb'), read_across_frames=True, closefd=True
+            )
+            return io.TextIOWrapper(reader, encoding='utf-8')
+        return zstandard.open(path, mode, encoding='utf-8')
+    return gzip.open(path, mode, encoding='utf-8')
+
+
+def _serialize(row):
+    line = dict(row)
+    line['sender'] = line.pop('sender__username')
+    for key in ('id', 'room_id', 'reply_to_id'):
+        if line[key] is not None:
+            line[key] = str(line[key])
+    for key in ('timestamp', 'edited_at'):
+        if line[key] is not None:
+            line[key] = line[key].isoformat()
+    return json.dumps(line, ensure_ascii=False)
+
+
+class ArchiveWriter:
+    """একটা room এর month-wise archive files এ append করে"""
+
+    def __init__(self, room_id, compression=None):
+        self.directory = room_archive_dir(room_id)
+        self.extension = EXTENSIONS[compression or get_compression()]
+        self.files = {}
+
+    def write(self, row):
+        month = row['timestamp'].strftime('%Y-%m')
+        handle = self.files.get(month)
+        if handle is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            handle = self.files[month] = open_archive(self.directory / f'{month}{self.extension}', 'at')
+        handle.write(_serialize(row) + '\n')
+
+    def close(self):
+        """সব file flush + fsync করে বন্ধ করে - এর পরেই database থেকে delete করা নিরাপদ"""
+        for handle in self.files.values():
+            handle.close()
+        for month in self.files:
+            fd = os.open(self.directory / f'{month}{self.extension}', os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self.files = {}
+
+
+def archive_room(room, cutoff, batch_size=None, dry_run=False):
+    """
+    cutoff এর আগের messages archive করে hot table থেকে delete করে।
+    Batch আকারে চলে, তাই memory room এর size এর উপর নির্ভর করে না।
+    মোট archived message সংখ্যা return করে।
+    """
+    batch_size = batch_size or getattr(settings, 'CHAT_ARCHIVE_BATCH_SIZE', 1000)
+    old_messages = Message.objects.filter(room=room, timestamp__lt=cutoff)
+
+    if dry_run:
+        return old_messages.count()
+
+    archived = 0
+    while True:
+        batch = list(old_messages.order_by('timestamp', 'id').values(*ARCHIVE_FIELDS)[:batch_size])
+        if not batch:
+            break
+
+        writer = ArchiveWriter(room.id)
+        try:
+            for row in batch:
+                writer.write(row)
+        finally:
+            writer.close()
+
+        Message.objects.filter(id__in=[row['id'] for row in batch]).delete()
+        archived += len(batch)
+
+    return archived
+
+
+def archive_expired_messages(room_ids=None, batch_size=None, dry_run=False, now=None):
+    """Retention policy আছে এমন সব room archive করে - {room_id: count}"""
+    now = now or timezone.now()
+    rooms = ChatRoom.objects.all()
+    if room_ids:
+        rooms = rooms.filter(id__in=room_ids)
+
+    results = {}
+    for room in rooms.iterator():
+        days = get_retention_days(room)
+        if days is None:
+            continue
+        count = archive_room(room, now - timedelta(days=days), batch_size, dry_run)
+        if count:
+            results[room.id] = count
+    return results
+
+
+def archived_months(room_id):
+    """Archive এ থাকা months - নতুন থেকে পুরনো"""
+    directory = room_archive_dir(room_id)
+    if not directory.is_dir():
+        return []
+
+    months = {}
+    for path in directory.iterdir():
+        for extension in EXTENSIONS.values():
+            if path.name.endswith(extension):
+                months.setdefault(path.name[:-len(extension)], []).append(path)
+    return sorted(months.items(), reverse=True)
+
+
+def read_archive_month(paths):
+    """একটা month এর rows - duplicate id বাদ দিয়ে, নতুন থেকে পুরনো"""
+    rows = {}
+    for path in paths:
+        with open_archive(path, 'rt') as handle:
+            for line in handle:
+                if line.strip():
+                    row = json.loads(line)
+                    rows[row['id']] = row
+    for row in rows.values():
+        row['timestamp'] = datetime.fromisoformat(row['timestamp'])
+    return sorted(rows.values(), key=lambda row: row['timestamp'], reverse=True)
+
+
+@functools.lru_cache(maxsize=MONTH_CACHE_SIZE)
+def _parse_month(files):
+    """(path, mtime, size) tuple থেকে parsed month - পুরনো থেকে নতুন rows আর তাদের timestamps"""
+    rows = read_archive_month([path for path, _mtime, _size in files])
+    rows.reverse()
+    return tuple(rows), [row['timestamp'] for row in rows]
+
+
+def cached_archive_month(paths):
+    """
+    read_archive_month() এর process-local cache - history এর প্রতিটা page এ পুরো month
+    আবার decompress + sort করতে হয় না। Key এ mtime/size থাকে, তাই archive run file এ
+    append করলে পরের read নতুন করে parse করে। Rows shared - বদলানো যাবে না।
+    """
+    files = []
+    for path in sorted(paths):
+        stat = os.stat(path)
+        files.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return _parse_month(tuple(files))
+
+
+def history_payload(row, archived=False):
+    """Hot বা archived row থেকে history API এর message format"""
+    return {
+        'id': str(row['id']),
+        'content': row['content'],
+        'sender': row['sender'],
+        'timestamp': row['timestamp'].strftime('%H:%M'),
+        'datetime': row['timestamp'].isoformat(),
+        'message_type': row['message_type'],
+        'reaction_counts': row['reaction_counts'],
+        'is_edited': row['edited_at'] is not None,
+        'archived': archived,
+    }
+
+
+def load_history(room_id, before=None, limit=50):
+    """
+    before এর আগের `limit` টা message (পুরনো থেকে নতুন)। Hot table এ যথেষ্ট না
+    থাকলে archive files থেকে বাকিটা নেয়।
+    """
+    hot = Message.objects.filter(room_id=room_id, is_deleted=False)
+    if before is not None:
+        hot = hot.filter(timestamp__lt=before)
+
+    rows = list(hot.order_by('-timestamp').values(
+        'id', 'content', 'sender__username', 'timestamp', 'message_type', 'edited_at', 'reaction_counts'
+    )[:limit])
+    result = []
+    for row in rows:
+        row['sender'] = row.pop('sender__username')
+        result.append(history_payload(row))
+
+    cursor = rows[-1]['timestamp'] if rows else before
+    for month, paths in archived_months(room_id):
+        if len(result) >= limit:
+            break
+        if cursor is not None and month > cursor.strftime('%Y-%m'):
+            continue
+        rows, timestamps = cached_archive_month(paths)
+        # cursor এর আগের rows থেকে শুরু - পুরো month scan না করে bisect
+        end = len(rows) if cursor is None else bisect.bisect_left(timestamps, cursor)
+        for index in range(end - 1, -1, -1):
+            if len(result) >= limit:
+                break
+            row = rows[index]
+            if row['is_deleted']:
+                continue
+            result.append(history_payload(row, archived=True))
+            cursor = row['timestamp']
+
+    result.reverse()
+    return result
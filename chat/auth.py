@@ -0,0 +1,77 @@
+# chat/auth.py
+"""
+WebSocket handshake এর জন্য cached authentication
+
+channels এর AuthMiddleware প্রতিটা connect এ session আর CustomUser দুইটাই database থেকে
+পড়ে। এখানে user object CHAT_AUTH_USER_CACHE_TIMEOUT সেকেন্ড cache এ থাকে - reconnect
+storm এ handshake এ শুধু session query হয়।
+
+User save (password change, deactivate, presence) বা logout হলে cache entry মুছে
+ফেলা হয় (chat.signals)। সেই delete শুধু shared cache (CACHE_URL) এ সব worker এ পৌঁছায়,
+তাই LocMemCache এ user cache বন্ধ - প্রতিবার database থেকে। Session hash সবসময় check
+হয়, তাই password বদলালে পুরনো session আর চলে না।
+"""
+from channels.auth import AuthMiddleware
+from channels.sessions import CookieMiddleware, SessionMiddleware
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model, load_backend
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+from .caching import uses_shared_cache
+from .db import database_sync_to_async
+
+
+def get_user_cache_timeout():
+    return getattr(settings, 'CHAT_AUTH_USER_CACHE_TIMEOUT', 30)
+
+
+def user_cache_key(user_id):
+    return f'chat:auth:user:{user_id}'
+
+
+def invalidate_user_cache(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def get_cached_user(session):
+    """
+    django.contrib.auth.get_user এর মতো, কিন্তু shared cache থাকলে backend.get_user() এর
+    result cache করে। Session invalid হলে flush করে AnonymousUser দেয়।
+    """
+    try:
+        user_id = session[SESSION_KEY]
+        backend_path = session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    shared = uses_shared_cache()
+    key = user_cache_key(user_id)
+    user = cache.get(key) if shared else None
+    if user is None:
+        backend = load_backend(backend_path)
+        user = backend.get_user(get_user_model()._meta.pk.to_python(user_id))
+        if user is None:
+            return AnonymousUser()
+        if shared:
+            cache.set(key, user, get_user_cache_timeout())
+
+    session_hash = session.get(HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(session_hash, user.get_session_auth_hash()):
+        session.flush()
+        return AnonymousUser()
+    return user
+
+
+class CachedAuthMiddleware(AuthMiddleware):
+    """channels.auth.AuthMiddleware, কিন্তু user lookup cache থেকে"""
+
+    async def resolve_scope(self, scope):
+        scope['user']._wrapped = await database_sync_to_async(get_cached_user)(scope['session'])
+
+
+def CachedAuthMiddlewareStack(inner):
+    return CookieMiddleware(SessionMiddleware(CachedAuthMiddleware(inner)))
@@ -0,0 +1,219 @@
+# chat/caching.py
+"""
+Room level cache versions
+
+Room এর membership (join, leave, role, presence) বা room নিজে (rename, edit) বদলালে
+version bump হয়। Template
+fragment cache key এ version থাকে, তাই পুরনো fragment আর কখনো match করে না -
+আলাদা করে delete করার দরকার নেই।
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils.text import Truncator
+
+from .models import ChatRoom, RoomMembership, Message
+
+
+# Process-local caches - এক process এ লেখা entry অন্য worker দেখে না
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def uses_shared_cache():
+    """সব worker একই cache দেখে কিনা (CACHE_URL দিয়ে Redis)"""
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+def get_fragment_timeout():
+    return getattr(settings, 'CHAT_FRAGMENT_CACHE_TIMEOUT', 300)
+
+
+def get_membership_cache_timeout():
+    """
+    Shared cache এ fragment timeout। LocMemCache এ অন্য worker এর join/leave এর version bump
+    এখানে পৌঁছায় না, তাই result কয়েক সেকেন্ড পরেই আবার database থেকে।
+    """
+    if uses_shared_cache():
+        return get_fragment_timeout()
+    return getattr(settings, 'CHAT_LOCAL_MEMBERSHIP_CACHE_TIMEOUT', 5)
+
+
+def _membership_version_key(room_id):
+    return f'chat:room:{room_id}:members:v'
+
+
+def _new_version():
+    # Cache থেকে key evict হয়ে গেলেও নতুন version আগের কোনোটার সাথে মিলবে না
+    return int(time.time() * 1000)
+
+
+def membership_version(room_id):
+    """Room এর current membership version (না থাকলে নতুন একটা তৈরি করে)"""
+    key = _membership_version_key(room_id)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+async def amembership_version(room_id):
+    key = _membership_version_key(room_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = _new_version()
+        if not await cache.aadd(key, version, timeout=None):
+            version = await cache.aget(key, version)
+    return version
+
+
+def bump_membership_version(*room_ids):
+    """Join, leave, role বা presence change এর পর call করতে হবে"""
+    for room_id in room_ids:
+        key = _membership_version_key(room_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+
+
+def _member_key(room_id, user_id, version):
+    return f'chat:room:{room_id}:member:{user_id}:{version}'
+
+
+def _active_memberships(room_id, user_id):
+    return RoomMembership.objects.filter(room_id=room_id, user_id=user_id, is_active=True)
+
+
+def is_active_member(room_id, user_id):
+    """
+    Membership check cache থেকে। Key এ membership version আছে, তাই join/leave
+    হলেই পুরনো result আর ব্যবহার হয় না (shared cache এ সব worker এ, না হলে
+    get_membership_cache_timeout পরে)।
+    """
+    key = _member_key(room_id, user_id, membership_version(room_id))
+    result = cache.get(key)
+    if result is None:
+        result = _active_memberships(room_id, user_id).exists()
+        cache.set(key, result, get_membership_cache_timeout())
+    return result
+
+
+async def ais_active_member(room_id, user_id):
+    """is_active_member() এর async version"""
+    key = _member_key(room_id, user_id, await amembership_version(room_id))
+    result = await cache.aget(key)
+    if result is None:
+        result = await _active_memberships(room_id, user_id).aexists()
+        await cache.aset(key, result, get_membership_cache_timeout())
+    return result
+
+
+def _snippet_key(room_id, message_id):
+    return f'chat:room:{room_id}:message:{message_id}:snippet'
+
+
+def message_snippet(room_id, message_id):
+    """
+    Reply payload এ embed করার জন্য parent message এর ছোট preview।
+    Room এর বাইরের বা না থাকা message হলে None।
+    """
+    key = _snippet_key(room_id, message_id)
+    snippet = cache.get(key)
+    if snippet is None:
+        try:
+            row = _snippet_rows(room_id, message_id).first()
+        except ValidationError:  # Invalid UUID
+            return None
+        if row is None:
+            return None
+        snippet = _build_snippet(row)
+        cache.set(key, snippet, get_fragment_timeout())
+    return snippet
+
+
+async def amessage_snippet(room_id, message_id):
+    """message_snippet() এর async version"""
+    key = _snippet_key(room_id, message_id)
+    snippet = await cache.aget(key)
+    if snippet is None:
+        try:
+            row = await _snippet_rows(room_id, message_id).afirst()
+        except ValidationError:
+            return None
+        if row is None:
+            return None
+        snippet = _build_snippet(row)
+        await cache.aset(key, snippet, get_fragment_timeout())
+    return snippet
+
+
+def _snippet_rows(room_id, message_id):
+    return Message.objects.filter(id=message_id, room_id=room_id).values(
+        'id', 'sender__username', 'content', 'message_type', 'is_deleted'
+    )
+
+
+def _build_snippet(row):
+    if row['message_type'] == 'text' or row['is_deleted']:
+        content = Truncator(row['content'] or '').chars(80)
+    else:
+        content = f"[{dict(Message.MESSAGE_TYPES)[row['message_type']]}]"
+
+    return {
+        'id': str(row['id']),
+        'sender': row['sender__username'],
+        'content': content,
+    }
+
+
+def invalidate_message_snippet(room_id, message_id):
+    """Edit বা delete এর পর call করতে হবে"""
+    cache.delete(_snippet_key(room_id, message_id))
+
+
+async def ainvalidate_message_snippet(room_id, message_id):
+    await cache.adelete(_snippet_key(room_id, message_id))
+
+
+def get_broadcast_min_members():
+    return getattr(settings, 'CHAT_BROADCAST_MIN_MEMBERS', 1000)
+
+
+def _broadcast_key(room_id):
+    return f'chat:room:{room_id}:broadcast'
+
+
+def room_uses_broadcast(room_id):
+    """Room broadcast mode এ চলে কিনা (explicit flag বা বড় max_members)"""
+    key = _broadcast_key(room_id)
+    result = cache.get(key)
+    if result is None:
+        result = _is_broadcast_row(ChatRoom.objects.filter(id=room_id).values('broadcast_mode', 'max_members').first())
+        cache.set(key, result, get_fragment_timeout())
+    return result
+
+
+async def aroom_uses_broadcast(room_id):
+    """room_uses_broadcast() এর async version"""
+    key = _broadcast_key(room_id)
+    result = await cache.aget(key)
+    if result is None:
+        row = await ChatRoom.objects.filter(id=room_id).values('broadcast_mode', 'max_members').afirst()
+        result = _is_broadcast_row(row)
+        await cache.aset(key, result, get_fragment_timeout())
+    return result
+
+
+def _is_broadcast_row(row):
+    return bool(row) and (row['broadcast_mode'] or row['max_members'] >= get_broadcast_min_members())
+
+
+def invalidate_room_broadcast(room_id):
+    cache.delete(_broadcast_key(room_id))
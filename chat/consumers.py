@@ -1,62 +1,138 @@
 # chat/consumers.py
-import json
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
-from django.utils import timezone
-from .models import ChatRoom, Message, RoomMembership
+from .models import (
+    Message, MessageReaction, post_message, apost_message, add_reaction, remove_reaction,
+    edit_message, aedit_message, delete_message, adelete_message
+)
+from . import fanout, metrics, notifications, protocol, replicas
+from .db import database_sync_to_async, run_query
+from .caching import (
+    is_active_member, ais_active_member, room_uses_broadcast, aroom_uses_broadcast,
+    message_snippet, amessage_snippet, invalidate_message_snippet, ainvalidate_message_snippet
+)
+from .profiling import profile_event
 
 User = get_user_model()
 
 
+def room_group_name(room_id):
+    return f'chat_{room_id}'
+
+
+def message_payload(message):
+    """WebSocket আর JSON API দুই জায়গায় একই message format"""
+    payload = {
+        'id': str(message.id),
+        'content': message.content,
+        'sender': message.sender.username,
+        'timestamp': message.timestamp.strftime('%H:%M'),
+        'message_type': message.message_type,
+    }
+    # Reply হলে parent এর snippet সাথেই যায়, client কে আলাদা fetch করতে হয় না
+    if message.reply_to_id and getattr(message, 'reply_snippet', None):
+        payload['reply_to'] = message.reply_snippet
+    return payload
+
+
+def broadcast_message(room_id, message):
+    """Sync code (views) থেকে room group এ message পাঠায় - ChatConsumer.chat_message handle করে"""
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            room_group_name(room_id),
+            {
+                'type': 'chat_message',
+                'message': message_payload(message),
+            }
+        )
+        metrics.messages_broadcast.inc(type='chat_message')
+        return True
+    except Exception as e:
+        print(f"[WebSocket] Broadcast from HTTP failed: {e}")
+        return False
+
+
 class ChatConsumer(AsyncWebsocketConsumer):
+    @profile_event
     async def connect(self):
         self.room_id = self.scope['url_route']['kwargs']['room_id']
-        self.room_group_name = f'chat_{self.room_id}'
+        self.room_group_name = room_group_name(self.room_id)
         self.user = self.scope['user']
 
         print(f"[WebSocket] Connection attempt by {self.user} to room {self.room_id}")
 
         if not self.user.is_authenticated:
             print("[WebSocket] User not authenticated")
+            metrics.ws_rejects.inc(reason='unauthenticated')
             await self.close()
             return
 
+        # এই connection এর reads - user সম্প্রতি write করে থাকলে primary থেকে
+        if replicas.replica_enabled():
+            replicas.begin(self.user.id)
+
         # Check room permission
         has_permission = await self.check_room_permission()
         if not has_permission:
             print("[WebSocket] User has no permission for this room")
+            metrics.ws_rejects.inc(reason='forbidden')
             await self.close()
             return
 
-        # Join room group
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
+        # Join room group - বড় room এ worker এর shared subscription দিয়ে (chat.fanout)
+        self.is_broadcast = await self.get_broadcast_mode()
+        if self.is_broadcast:
+            await fanout.subscribe(self.room_id, self.room_group_name, self)
+        else:
+            await self.channel_layer.group_add(
+                self.room_group_name,
+                self.channel_name
+            )
         print(f"[WebSocket] Added {self.user} to group {self.room_group_name}")
 
-        await self.accept()
+        # Client binary subprotocol চাইলে সেটা, না হলে JSON
+        self.codec = protocol.negotiate(self.scope.get('subprotocols', []))
+        await self.accept(self.codec.subprotocol)
+        self.is_counted = True
+        metrics.ws_connects.inc()
+        metrics.ws_active.inc()
+
+        # Connected থাকা অবস্থায় এই room এর digest notifications বন্ধ
+        if notifications.is_enabled():
+            await notifications.amark_connected(self.room_id, self.user.id)
 
         # Send welcome message
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             'type': 'connection',
             'message': f'{self.user.username} connected to chat room!'
-        }))
+        })
 
     async def disconnect(self, close_code):
         print(f"[WebSocket] {self.user} disconnected from {self.room_group_name}")
+        if getattr(self, 'is_counted', False):
+            metrics.ws_disconnects.inc()
+            metrics.ws_active.dec()
+            if notifications.is_enabled():
+                await notifications.amark_disconnected(self.room_id, self.user.id)
+                await run_query(notifications.mark_seen, notifications.amark_seen, self.room_id, self.user.id)
         # Leave room group
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        if getattr(self, 'is_broadcast', False):
+            await fanout.unsubscribe(self.room_id, self)
+        else:
+            await self.channel_layer.group_discard(
+                self.room_group_name,
+                self.channel_name
+            )
 
-    async def receive(self, text_data):
-        print(f"[WebSocket] Received from {self.user}: {text_data}")
+    @profile_event
+    async def receive(self, text_data=None, bytes_data=None):
+        print(f"[WebSocket] Received from {self.user}: {text_data if text_data is not None else bytes_data}")
         try:
-            data = json.loads(text_data)
+            data = self.codec.decode(text_data, bytes_data)
             message_type = data.get('type')
+            metrics.messages_received.inc(type=message_type or 'unknown')
 
             if message_type == 'chat_message':
                 message_content = data.get('message', '').strip()
@@ -64,75 +140,242 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     print(f"[WebSocket] Processing message: {message_content}")
 
                     # Save to database
-                    message = await self.save_message(message_content)
+                    with metrics.save_message_seconds.time():
+                        message = await self.save_message(message_content, data.get('reply_to'))
 
                     if message:
                         print(f"[WebSocket] Message saved, broadcasting to group {self.room_group_name}")
 
                         # Send to group
-                        await self.channel_layer.group_send(
-                            self.room_group_name,
-                            {
-                                'type': 'chat_message',
-                                'message': {
-                                    'id': str(message.id),
-                                    'content': message.content,
-                                    'sender': message.sender.username,
-                                    'timestamp': message.timestamp.strftime('%H:%M'),
-                                }
-                            }
-                        )
+                        await self.broadcast({
+                            'type': 'chat_message',
+                            'message': message_payload(message),
+                        })
                     else:
                         print("[WebSocket] Failed to save message")
 
-        except json.JSONDecodeError as e:
-            print(f"[WebSocket] JSON decode error: {e}")
+            elif message_type == 'reaction':
+                await self.handle_reaction(data)
+
+            elif message_type == 'edit':
+                await self.handle_edit(data)
+
+            elif message_type == 'delete':
+                await self.handle_delete(data)
+
+        except ValueError as e:
+            print(f"[WebSocket] Frame decode error: {e}")
         except Exception as e:
             print(f"[WebSocket] Error in receive: {e}")
 
+    async def send_frame(self, frame, event=None):
+        """
+        Negotiated codec এ frame পাঠায়। Broadcast mode এ একই event dict অনেক socket এর
+        handler এ যায়, তাই encoded frame event এ codec অনুযায়ী cache থাকে।
+        """
+        if event is None:
+            kwargs = self.codec.encode(frame)
+        else:
+            frames = event.setdefault('_frames', {})
+            kwargs = frames.get(self.codec.name)
+            if kwargs is None:
+                kwargs = frames[self.codec.name] = self.codec.encode(frame)
+        await self.send(**kwargs)
+
+    async def broadcast(self, event):
+        """Room group এ event পাঠায় (metrics সহ)"""
+        with metrics.group_send_seconds.time():
+            await self.channel_layer.group_send(self.room_group_name, event)
+        metrics.messages_broadcast.inc(type=event['type'])
+
+    async def handle_reaction(self, data):
+        """{"type": "reaction", "message_id": ..., "reaction": "👍", "action": "add" | "remove"}"""
+        message_id = data.get('message_id')
+        reaction = data.get('reaction')
+        action = data.get('action', 'add')
+
+        if reaction not in dict(MessageReaction.REACTION_TYPES) or action not in ('add', 'remove'):
+            print(f"[WebSocket] Invalid reaction: {reaction} / {action}")
+            return
+
+        result = await self.save_reaction(message_id, reaction, action)
+        if result is None:
+            return
+        changed, counts = result
+        if not changed:
+            # Duplicate add বা না থাকা reaction remove - room এ জানানোর কিছু নেই
+            return
+
+        await self.broadcast({
+            'type': 'reaction_update',
+            'message_id': str(message_id),
+            'counts': counts,
+            'user': self.user.username,
+            'reaction': reaction,
+            'action': action,
+        })
+
+    async def handle_edit(self, data):
+        """{"type": "edit", "message_id": ..., "content": "..."} - শুধু নিজের message"""
+        message_id = data.get('message_id')
+        content = (data.get('content') or '').strip()
+        if not content:
+            return
+
+        edited_at = await self.update_message(message_id, content)
+        if edited_at is None:
+            print(f"[WebSocket] Edit rejected for message {message_id}")
+            return
+
+        # শুধু বদলানো fields পাঠাই
+        await self.broadcast({
+            'type': 'message_update',
+            'message': {
+                'id': str(message_id),
+                'content': content,
+                'edited_at': edited_at.strftime('%H:%M'),
+            }
+        })
+
+    async def handle_delete(self, data):
+        """{"type": "delete", "message_id": ...} - sender বা room admin/moderator"""
+        message_id = data.get('message_id')
+
+        if not await self.remove_message(message_id):
+            print(f"[WebSocket] Delete rejected for message {message_id}")
+            return
+
+        await self.broadcast({
+            'type': 'message_update',
+            'message': {
+                'id': str(message_id),
+                'is_deleted': True,
+            }
+        })
+
     # Handle message from room group
     async def chat_message(self, event):
         message = event['message']
         print(f"[WebSocket] Broadcasting message to {self.user}: {message}")
 
         # Send message to WebSocket
-        await self.send(text_data=json.dumps({
-            'type': 'message',
-            'message': message
-        }))
+        with metrics.recipient_send_seconds.time():
+            await self.send_frame({
+                'type': 'message',
+                'message': message
+            }, event)
 
-    @database_sync_to_async
-    def check_room_permission(self):
-        try:
-            room = ChatRoom.objects.get(id=self.room_id)
-            membership = RoomMembership.objects.get(
-                room=room,
-                user=self.user,
-                is_active=True
-            )
+    async def message_update(self, event):
+        with metrics.recipient_send_seconds.time():
+            await self.send_frame({
+                'type': 'message_update',
+                'message': event['message']
+            }, event)
+
+    async def reaction_update(self, event):
+        with metrics.recipient_send_seconds.time():
+            await self.send_frame({
+                'type': 'reaction',
+                'message_id': event['message_id'],
+                'counts': event['counts'],
+                'user': event['user'],
+                'reaction': event['reaction'],
+                'action': event['action'],
+            }, event)
+
+    # Data access - settings.CHAT_ASYNC_ORM চালু থাকলে async ORM, না হলে bounded pool এ
+    # sync ORM (chat.db.run_query)। দুই path এর behaviour একই।
+
+    async def get_broadcast_mode(self):
+        return await run_query(room_uses_broadcast, aroom_uses_broadcast, self.room_id)
+
+    async def check_room_permission(self):
+        # Membership cache থেকে - reconnect storm এ প্রতিটা socket এর জন্য query হয় না
+        if await run_query(is_active_member, ais_active_member, self.room_id, self.user.id):
             print(f"[WebSocket] Room permission OK for {self.user}")
             return True
-        except (ChatRoom.DoesNotExist, RoomMembership.DoesNotExist) as e:
-            print(f"[WebSocket] Room permission failed: {e}")
-            return False
+        print(f"[WebSocket] Room permission failed for {self.user}")
+        return False
 
-    @database_sync_to_async
-    def save_message(self, content):
+    async def save_message(self, content, reply_to=None):
         try:
-            room = ChatRoom.objects.get(id=self.room_id)
-            message = Message.objects.create(
-                room=room,
-                sender=self.user,
-                content=content,
-                message_type='text'
-            )
-
-            # Update room timestamp
-            room.updated_at = timezone.now()
-            room.save()
-
+            message = await run_query(self.post_text_message, self.apost_text_message, content, reply_to)
             print(f"[WebSocket] Message saved to DB: {message.id}")
             return message
         except Exception as e:
             print(f"[WebSocket] Error saving message: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def post_text_message(self, content, reply_to=None):
+        message = Message(content=content, message_type='text')
+        if reply_to:
+            self.attach_reply(message, message_snippet(self.room_id, reply_to))
+        return post_message(self.room_id, self.user, message)
+
+    async def apost_text_message(self, content, reply_to=None):
+        message = Message(content=content, message_type='text')
+        if reply_to:
+            self.attach_reply(message, await amessage_snippet(self.room_id, reply_to))
+        return await apost_message(self.room_id, self.user, message)
+
+    @staticmethod
+    def attach_reply(message, snippet):
+        if snippet:
+            message.reply_to_id = snippet['id']
+            message.reply_snippet = snippet
+
+    @database_sync_to_async
+    def save_reaction(self, message_id, reaction, action):
+        """
+        Reaction add/remove করে (changed, counts) return করে। Row lock আর
+        transaction.atomic async ORM এ নেই, তাই এটা সবসময় sync path এ।
+        """
+        try:
+            if not Message.objects.filter(id=message_id, room_id=self.room_id, is_deleted=False).exists():
+                print(f"[WebSocket] Reaction on unknown message: {message_id}")
+                return None
+
+            if action == 'add':
+                return add_reaction(message_id, self.user, reaction)
+            return remove_reaction(message_id, self.user, reaction)
+        except Exception as e:
+            print(f"[WebSocket] Error saving reaction: {e}")
+            return None
+
+    async def update_message(self, message_id, content):
+        try:
+            return await run_query(self.edit_own_message, self.aedit_own_message, message_id, content)
+        except Exception as e:
+            print(f"[WebSocket] Error editing message: {e}")
+            return None
+
+    def edit_own_message(self, message_id, content):
+        edited_at = edit_message(self.room_id, message_id, self.user, content)
+        if edited_at:
+            invalidate_message_snippet(self.room_id, message_id)
+        return edited_at
+
+    async def aedit_own_message(self, message_id, content):
+        edited_at = await aedit_message(self.room_id, message_id, self.user, content)
+        if edited_at:
+            await ainvalidate_message_snippet(self.room_id, message_id)
+        return edited_at
+
+    async def remove_message(self, message_id):
+        try:
+            return await run_query(self.delete_room_message, self.adelete_room_message, message_id)
+        except Exception as e:
+            print(f"[WebSocket] Error deleting message: {e}")
+            return False
+
+    def delete_room_message(self, message_id):
+        deleted = delete_message(self.room_id, message_id, self.user)
+        if deleted:
+            invalidate_message_snippet(self.room_id, message_id)
+        return deleted
+
+    async def adelete_room_message(self, message_id):
+        deleted = await adelete_message(self.room_id, message_id, self.user)
+        if deleted:
+            await ainvalidate_message_snippet(self.room_id, message_id)
+        return deleted
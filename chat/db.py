@@ -0,0 +1,91 @@
+# chat/db.py
+"""
+Database access from async code (ChatConsumer) আর database profile helpers
+
+channels.db.database_sync_to_async default এ thread_sensitive - কোনো ThreadSensitiveContext
+না থাকলে একটা process এর সব WebSocket এর সব query একটাই thread এ serialize হয়।
+এখানে তার বদলে CHAT_DB_THREADS size এর একটা bounded thread pool ব্যবহার হয়। প্রতিটা
+thread এর নিজের persistent connection থাকে (CONN_MAX_AGE), তাই এই pool ই connection
+pool - একটা worker process কখনো CHAT_DB_THREADS এর বেশি connection খোলে না।
+
+settings.CHAT_ASYNC_ORM চালু থাকলে ChatConsumer Django এর async ORM (aget, acreate,
+aupdate ...) ব্যবহার করে - run_query() দুই path এর মধ্যে বেছে নেয়।
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.db import DatabaseSyncToAsync
+from django.conf import settings
+from django.db import connections
+
+
+def get_pool_size():
+    return max(1, getattr(settings, 'CHAT_DB_THREADS', 4))
+
+
+executor = ThreadPoolExecutor(max_workers=get_pool_size(), thread_name_prefix='chat-db')
+
+
+def database_sync_to_async(func):
+    """channels.db.database_sync_to_async এর মতো, কিন্তু bounded pool এ চলে"""
+    return DatabaseSyncToAsync(func, thread_sensitive=False, executor=executor)
+
+
+def async_orm_enabled():
+    return getattr(settings, 'CHAT_ASYNC_ORM', False)
+
+
+async def run_query(func, afunc, *args, **kwargs):
+    """
+    Async ORM চালু থাকলে afunc await করে, না হলে sync func কে pool এ চালায়।
+    দুইটার signature আর return value একই হতে হবে।
+    """
+    if async_orm_enabled():
+        return await afunc(*args, **kwargs)
+    return await database_sync_to_async(func)(*args, **kwargs)
+
+
+def close_pool_connections():
+    """
+    Pool এর প্রতিটা thread এর connection বন্ধ করে (test database destroy করার আগে দরকার)।
+    Barrier সব task কে আলাদা thread এ চলতে বাধ্য করে।
+    """
+    size = executor._max_workers
+    barrier = threading.Barrier(size)
+
+    def close():
+        barrier.wait(timeout=10)
+        connections.close_all()
+
+    for future in [executor.submit(close) for _ in range(size)]:
+        future.result()
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    connection_created signal handler - single node profile এর জন্য SQLite WAL mode।
+    WAL এ writer চলার সময়ও readers block হয় না, busy_timeout lock এর জন্য অপেক্ষা করায়।
+    """
+    if connection.vendor != 'sqlite' or not getattr(settings, 'CHAT_SQLITE_WAL', False):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA busy_timeout=%d' % getattr(settings, 'CHAT_SQLITE_BUSY_TIMEOUT', 20000))
+
+
+def describe_profile(alias='default'):
+    """Benchmark result এ রাখার জন্য active database profile"""
+    database = settings.DATABASES[alias]
+    vendor = connections[alias].vendor
+    profile = {
+        'vendor': vendor,
+        'conn_max_age': database.get('CONN_MAX_AGE', 0),
+        'threads': get_pool_size(),
+        'async_orm': async_orm_enabled(),
+    }
+    if vendor == 'sqlite':
+        profile['wal'] = getattr(settings, 'CHAT_SQLITE_WAL', False)
+    else:
+        profile['pgbouncer'] = database.get('DISABLE_SERVER_SIDE_CURSORS', False)
+    return profile
@@ -0,0 +1,154 @@
+# chat/directory.py
+"""
+Public groups আর users এর paginated, cached directory
+
+Room এর sort keys ChatRoom এই denormalized থাকে:
+
+    last_message_at      - post_message() room UPDATE এর সাথেই set করে (extra query নেই)
+    active_member_count  - membership save/delete signal এ শুধু ওই room এর count আবার গোনে
+
+তাই directory page মানে (is_public, room_type, sort key) index এর উপর একটা LIMIT query।
+Pages CHAT_DIRECTORY_CACHE_TIMEOUT সেকেন্ড cache এ থাকে - public group এর দেখানো fields
+বা join/leave এ version bump হয় (chat.signals), activity order শুধু timeout পর্যন্ত পুরনো
+থাকতে পারে।
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator, EmptyPage
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import ChatRoom, RoomMembership, Message
+
+User = get_user_model()
+
+ROOM_SORTS = {
+    'activity': ('-last_message_at', '-created_at'),
+    'members': ('-active_member_count', '-last_message_at'),
+}
+USER_SORTS = {
+    'activity': ('-last_seen', 'username'),
+    'name': ('username',),
+}
+ROOM_FIELDS = ('id', 'name', 'description', 'active_member_count', 'max_members', 'last_message_at')
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'is_online', 'last_seen')
+
+
+def get_directory_timeout():
+    return getattr(settings, 'CHAT_DIRECTORY_CACHE_TIMEOUT', 60)
+
+
+def get_page_size():
+    return getattr(settings, 'CHAT_DIRECTORY_PAGE_SIZE', 20)
+
+
+def _version_key(kind):
+    return f'chat:directory:{kind}:v'
+
+
+def directory_version(kind):
+    version = cache.get(_version_key(kind))
+    if version is None:
+        version = int(time.time() * 1000)
+        cache.add(_version_key(kind), version, timeout=None)
+    return version
+
+
+def bump_directory_version(kind):
+    """'rooms' বা 'users' - পরের request নতুন pages বানায়"""
+    try:
+        cache.incr(_version_key(kind))
+    except ValueError:
+        cache.set(_version_key(kind), int(time.time() * 1000), timeout=None)
+
+
+def public_rooms():
+    return ChatRoom.objects.filter(is_public=True, room_type='group', is_active=True)
+
+
+def directory_users():
+    return User.objects.filter(is_active=True)
+
+
+def _page_number(number):
+    """?page= থেকে 1 বা তার বেশি int - বাকি সব কিছু প্রথম page"""
+    try:
+        return max(int(number), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _page_key(kind, sort, number):
+    return f'chat:directory:{kind}:{directory_version(kind)}:{sort}:{number}'
+
+
+def _page(kind, queryset, fields, sort, number):
+    """
+    Paginator page কে plain dicts হিসেবে cache করে। Key এ শুধু আসল page number যায় -
+    শেষ page এর পরের number এ শেষ page দেয়, কিন্তু সেটা আলাদা key এ cache হয় না।
+    """
+    number = _page_number(number)
+    page = cache.get(_page_key(kind, sort, number))
+    if page is None:
+        paginator = Paginator(queryset.values(*fields), get_page_size())
+        try:
+            current = paginator.page(number)
+        except EmptyPage:
+            current = paginator.page(paginator.num_pages)
+        page = {
+            'items': list(current.object_list),
+            'number': current.number,
+            'num_pages': paginator.num_pages,
+            'count': paginator.count,
+            'sort': sort,
+        }
+        cache.set(_page_key(kind, sort, current.number), page, get_directory_timeout())
+    page['has_previous'] = page['number'] > 1
+    page['has_next'] = page['number'] < page['num_pages']
+    return page
+
+
+def room_page(sort='activity', number=1):
+    """Public group rooms এর একটা page"""
+    if sort not in ROOM_SORTS:
+        sort = 'activity'
+    return _page('rooms', public_rooms().order_by(*ROOM_SORTS[sort]), ROOM_FIELDS, sort, number)
+
+
+def user_page(sort='name', number=1):
+    """Active users এর একটা page (name খুঁজতে search_users API)"""
+    if sort not in USER_SORTS:
+        sort = 'name'
+    return _page('users', directory_users().order_by(*USER_SORTS[sort]), USER_FIELDS, sort, number)
+
+
+def _active_member_count():
+    """Room (OuterRef) এর active memberships এর count - UPDATE এর subquery"""
+    active = RoomMembership.objects.filter(room_id=OuterRef('pk'), is_active=True).order_by()
+    return Coalesce(Subquery(active.values('room_id').annotate(total=Count('pk')).values('total')), 0)
+
+
+def refresh_room_stats(*room_ids):
+    """
+    Room গুলোর active_member_count আবার গোনে - একটা room এর membership index এর উপর
+    একটা UPDATE। Join/leave/reactivate সব একই ভাবে handle হয়, drift হয় না।
+    """
+    ChatRoom.objects.filter(id__in=room_ids).update(active_member_count=_active_member_count())
+
+
+def rebuild():
+    """
+    সব room এর sort keys নতুন করে বানায় - bulk import / seed_chat এর পর, যেগুলো
+    signals বা post_message ছাড়াই rows লেখে।
+    """
+    latest = Message.objects.filter(room_id=OuterRef('pk')).exclude(message_type='system').order_by('-timestamp')
+    updated = ChatRoom.objects.update(
+        active_member_count=_active_member_count(),
+        last_message_at=Subquery(latest.values('timestamp')[:1]),
+    )
+    bump_directory_version('rooms')
+    bump_directory_version('users')
+    return updated
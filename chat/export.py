@@ -0,0 +1,228 @@
+# chat/export.py
+"""
+Room history streaming export (JSONL / CSV, optional zip with attachments, optional gzip)
+
+সব কিছু generator - bytes chunk আকারে yield করে, তাই StreamingHttpResponse আর
+management command দুই জায়গাতেই চলে। ASGI তে aexport_room - sync generator দিলে Django
+পুরো response sync_to_async(list) দিয়ে memory তে জমায়। Hot table keyset pagination দিয়ে
+(timestamp, id) ক্রমে পড়া হয়, room যত বড়ই হোক memory একই থাকে।
+"""
+import csv
+import io
+import json
+import os
+import zipfile
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.db.models import Q
+
+from .archive import open_archive, archived_months
+from .models import Message
+
+FORMATS = ('jsonl', 'csv')
+ATTACHMENT_MODES = ('reference', 'zip')
+
+EXPORT_FIELDS = (
+    'id', 'datetime', 'sender', 'message_type', 'content', 'file', 'file_name', 'file_size',
+    'edited_at', 'is_deleted', 'reply_to_id', 'reaction_counts', 'archived',
+)
+
+_MESSAGE_FIELDS = (
+    'id', 'timestamp', 'sender__username', 'message_type', 'content', 'file', 'file_name', 'file_size',
+    'edited_at', 'is_deleted', 'reply_to_id', 'reaction_counts',
+)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _record(row, archived=False):
+    timestamp = row['timestamp']
+    edited_at = row['edited_at']
+    return {
+        'id': str(row['id']),
+        'datetime': timestamp if isinstance(timestamp, str) else timestamp.isoformat(),
+        'sender': row.get('sender', row.get('sender__username')),
+        'message_type': row['message_type'],
+        'content': row['content'],
+        'file': row['file'] or None,
+        'file_name': row['file_name'],
+        'file_size': row['file_size'],
+        'edited_at': edited_at if edited_at is None or isinstance(edited_at, str) else edited_at.isoformat(),
+        'is_deleted': row['is_deleted'],
+        'reply_to_id': str(row['reply_to_id']) if row['reply_to_id'] else None,
+        'reaction_counts': row['reaction_counts'],
+        'archived': archived,
+    }
+
+
+def iter_archived_records(room_id):
+    """
+    Archive files এর rows পুরনো month থেকে - line by line, পুরো file memory তে না এনে।
+    Interrupted archive run আবার চললে একই message দুইবার লেখা থাকে, তাই month প্রতি
+    দেখা ids রাখে (read_archive_month এর মতো) - memory তে শুধু ids, rows না।
+    """
+    for month, paths in reversed(archived_months(room_id)):
+        seen = set()
+        for path in sorted(paths):
+            with open_archive(path, 'rt') as handle:
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    row = json.loads(line)
+                    if row['id'] in seen:
+                        continue
+                    seen.add(row['id'])
+                    yield _record(row, archived=True)
+
+
+def iter_room_records(room_id, batch_size=1000, include_archive=True):
+    """Room এর সব message পুরনো থেকে নতুন - archive আগে, তারপর hot table (keyset pagination)"""
+    if include_archive:
+        yield from iter_archived_records(room_id)
+
+    messages = Message.objects.filter(room_id=room_id).order_by('timestamp', 'id').values(*_MESSAGE_FIELDS)
+    last = None
+    while True:
+        batch = messages
+        if last is not None:
+            batch = batch.filter(Q(timestamp__gt=last['timestamp']) |
+                                 Q(timestamp=last['timestamp'], id__gt=last['id']))
+        rows = 0
+        for row in batch[:batch_size].iterator(chunk_size=batch_size):
+            rows += 1
+            last = row
+            yield _record(row)
+        if rows < batch_size:
+            break
+
+
+def _attachment_name(record):
+    return f"attachments/{record['id']}_{os.path.basename(record['file'])}"
+
+
+class _Buffer(io.RawIOBase):
+    """ZipFile / csv এর output জমা রাখে, generator প্রতিবার drain করে"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _serialize(records, export_format, attachments):
+    """Records থেকে JSONL বা CSV bytes chunks"""
+    if export_format == 'csv':
+        text = io.StringIO()
+        writer = csv.DictWriter(text, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+    for record in records:
+        if attachments == 'zip' and record['file']:
+            record = dict(record, file=_attachment_name(record))
+        if export_format == 'csv':
+            writer.writerow(dict(record, reaction_counts=json.dumps(record['reaction_counts'], ensure_ascii=False)))
+            yield text.getvalue().encode('utf-8')
+            text.seek(0)
+            text.truncate()
+        else:
+            yield (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 - gzip header সহ
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _zip(room_id, export_format, include_archive):
+    """Messages file আর attachments নিয়ে zip stream - unseekable output এ লেখা হয়"""
+    buffer = _Buffer()
+
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        records = iter_room_records(room_id, include_archive=include_archive)
+        with archive.open(f'messages.{export_format}', 'w', force_zip64=True) as entry:
+            for chunk in _serialize(records, export_format, 'zip'):
+                entry.write(chunk)
+                data = buffer.drain()
+                if data:
+                    yield data
+
+        # Attachments এর জন্য আরেকবার records walk করি, যাতে file list memory তে রাখতে না হয়
+        for record in iter_room_records(room_id, include_archive=include_archive):
+            if not record['file'] or not default_storage.exists(record['file']):
+                continue
+            with default_storage.open(record['file'], 'rb') as source, \
+                    archive.open(_attachment_name(record), 'w', force_zip64=True) as entry:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    entry.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+
+    yield buffer.drain()
+
+
+def export_room(room_id, export_format='jsonl', attachments='reference', compress=False, include_archive=True):
+    """Room export এর bytes generator"""
+    if export_format not in FORMATS:
+        raise ValueError(f'Unknown export format: {export_format}')
+    if attachments not in ATTACHMENT_MODES:
+        raise ValueError(f'Unknown attachment mode: {attachments}')
+
+    if attachments == 'zip':
+        return _zip(room_id, export_format, include_archive)  # Zip নিজেই deflate করে
+
+    chunks = _serialize(iter_room_records(room_id, include_archive=include_archive), export_format, attachments)
+    return _gzip(chunks) if compress else chunks
+
+
+def _take(chunks):
+    """অন্তত CHUNK_SIZE bytes (বা বাকি যা আছে) - প্রতি record এ thread hop না করে"""
+    batch, size = [], 0
+    for chunk in chunks:
+        batch.append(chunk)
+        size += len(chunk)
+        if size >= CHUNK_SIZE:
+            break
+    return b''.join(batch)
+
+
+async def aexport_room(room_id, export_format='jsonl', attachments='reference', compress=False, include_archive=True):
+    """
+    export_room এর async iterator - sync generator টা request এর thread sensitive thread এ
+    CHUNK_SIZE করে টানা হয়, তাই DB cursor একই connection এ থাকে আর response incrementally যায়।
+    """
+    chunks = export_room(room_id, export_format, attachments, compress, include_archive)
+    take = sync_to_async(_take, thread_sensitive=True)
+    try:
+        while True:
+            data = await take(chunks)
+            if not data:
+                break
+            yield data
+    finally:
+        # Client মাঝপথে চলে গেলে ও cursor / zip বন্ধ হয়
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def export_filename(room_id, export_format='jsonl', attachments='reference', compress=False):
+    if attachments == 'zip':
+        return f'room-{room_id}.zip'
+    return f'room-{room_id}.{export_format}' + ('.gz' if compress else '')
@@ -0,0 +1,131 @@
+# chat/fanout.py
+"""
+Large room broadcast mode - worker level hierarchical fan-out
+
+সাধারণ room এ প্রতিটা socket নিজের channel দিয়ে chat_<room_id> group এ join করে,
+তাই একটা group_send মানে members সংখ্যক layer operation। Broadcast mode এ একটা
+worker process room প্রতি শুধু একটা channel দিয়ে group এ join করে, আর message
+এলে নিজের sockets এর handler সরাসরি call করে local ভাবে পৌঁছে দেয় - layer operations
+O(members) থেকে O(workers) হয়।
+
+Sender এর দিকে কিছু বদলায় না: group_send একই group এ যায়, mixed mode ও কাজ করে।
+"""
+import asyncio
+
+from channels.consumer import get_handler_name
+from channels.layers import get_channel_layer
+
+from . import metrics
+
+_rooms = {}  # room_id -> RoomFanout (এই process এর)
+
+# Layer error এ pump পরপর এতবার restart হয়, তারপর room এর sockets বন্ধ করে দেয়
+MAX_PUMP_RESTARTS = 5
+
+
+class RoomFanout:
+    """একটা room এর এই worker এর subscription - একটা layer channel আর local consumers"""
+
+    def __init__(self, room_id, group):
+        self.room_id = room_id
+        self.group = group
+        self.loop = asyncio.get_running_loop()
+        self.consumers = set()
+        self.channel = None
+        self.task = None
+        self.ready = asyncio.Event()
+        self.stopped = False
+        self.restarts = 0
+
+    async def start(self, layer):
+        self.channel = await layer.new_channel('broadcast.')
+        await layer.group_add(self.group, self.channel)
+        self._start_pump(layer)
+        self.ready.set()
+        metrics.broadcast_rooms.inc()
+
+    async def stop(self, layer):
+        if self.stopped:
+            return
+        self.stopped = True
+        if self.task is not None:
+            self.task.cancel()
+        if self.channel is not None:
+            await layer.group_discard(self.group, self.channel)
+            metrics.broadcast_rooms.dec()
+
+    def _start_pump(self, layer):
+        self.task = asyncio.ensure_future(self.pump(layer))
+        self.task.add_done_callback(lambda task: self._pump_done(task, layer))
+
+    def _pump_done(self, task, layer):
+        """
+        Pump থামলে এই worker এর সব socket চুপচাপ message পাওয়া বন্ধ করত। Layer error হলে
+        log করে backoff দিয়ে আবার চালায়; বারবার fail করলে sockets বন্ধ করে দেয় - clients
+        reconnect করে নতুন subscription পায়।
+        """
+        if task.cancelled() or self.stopped:
+            return
+        print(f"[Broadcast] Pump for room {self.room_id} failed: {task.exception()!r}")
+        if self.restarts < MAX_PUMP_RESTARTS:
+            self.restarts += 1
+            asyncio.ensure_future(self._restart_pump(layer, 0.1 * 2 ** self.restarts))
+            return
+
+        print(f"[Broadcast] Giving up on room {self.room_id}, closing {len(self.consumers)} sockets")
+        if _rooms.get(self.room_id) is self:
+            del _rooms[self.room_id]
+        for consumer in list(self.consumers):
+            asyncio.ensure_future(consumer.close(code=1011))
+        asyncio.ensure_future(self.stop(layer))
+
+    async def _restart_pump(self, layer, delay):
+        await asyncio.sleep(delay)
+        if not self.stopped:
+            self._start_pump(layer)
+
+    async def pump(self, layer):
+        while True:
+            message = await layer.receive(self.channel)
+            self.restarts = 0
+            # consumer.dispatch() প্রতিবার DB connections cleanup এর জন্য thread hop করে,
+            # হাজার socket এ সেটা খুব ধীর - event handlers DB ছোঁয় না, তাই সরাসরি call
+            handler_name = get_handler_name(message)
+            for consumer in list(self.consumers):
+                try:
+                    await getattr(consumer, handler_name)(message)
+                except Exception as e:
+                    # একটা socket এর error এ বাকিদের delivery থামবে না
+                    print(f"[Broadcast] Error delivering to {consumer.channel_name}: {e}")
+            metrics.broadcast_local_deliveries.inc(len(self.consumers))
+
+
+async def subscribe(room_id, group, consumer):
+    """Consumer কে room এর local fan-out এ যোগ করে - প্রথম subscriber এলে worker group এ join করে"""
+    room = _rooms.get(room_id)
+    if room is not None and room.loop is not asyncio.get_running_loop():
+        room = None  # আগের event loop এর (tests) - নতুন করে শুরু
+    if room is None:
+        room = _rooms[room_id] = RoomFanout(room_id, group)
+        room.consumers.add(consumer)
+        await room.start(get_channel_layer())
+    else:
+        room.consumers.add(consumer)
+        await room.ready.wait()
+
+
+async def unsubscribe(room_id, consumer):
+    """শেষ local subscriber চলে গেলে worker group ছেড়ে দেয়"""
+    room = _rooms.get(room_id)
+    if room is None:
+        return
+    room.consumers.discard(consumer)
+    if not room.consumers:
+        del _rooms[room_id]
+        await room.ready.wait()  # start() শেষ না হলে stop করার কিছু নেই
+        await room.stop(get_channel_layer())
+
+
+def local_subscribers(room_id):
+    room = _rooms.get(room_id)
+    return len(room.consumers) if room is not None else 0
@@ -51,6 +51,14 @@ class GroupChatForm(forms.Form):
         })
     )
 
+    is_public = forms.BooleanField(
+        required=False,
+        label='List in group directory',
+        widget=forms.CheckboxInput(attrs={
+            'class': 'form-check-input'
+        })
+    )
+
     members = forms.ModelMultipleChoiceField(
         queryset=User.objects.none(),
         required=False,
@@ -64,6 +72,8 @@ class GroupChatForm(forms.Form):
         super().__init__(*args, **kwargs)
 
         if current_user:
+            # Template পুরো queryset render করে না (directory pages দেখায়), এটা শুধু
+            # submitted ids validate করে - pk__in query
             self.fields['members'].queryset = User.objects.exclude(
                 id=current_user.id
             ).filter(is_active=True)
\ No newline at end of file
@@ -0,0 +1,247 @@
+# chat/layers.py
+"""
+Sharded channel layer - room groups consistent hash দিয়ে কয়েকটা layer (Redis host) এ ভাগ হয়
+
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'chat.layers.ShardedChannelLayer',
+            'CONFIG': {
+                'shards': [
+                    {'BACKEND': 'channels_redis.core.RedisChannelLayer', 'CONFIG': {'hosts': ['redis://10.0.0.1']}},
+                    {'BACKEND': 'channels_redis.core.RedisChannelLayer', 'CONFIG': {'hosts': ['redis://10.0.0.2']}},
+                ],
+            },
+        },
+    }
+
+একটা room এর group, তার group_add আর group_send সব একই shard এ যায়, তাই একটা
+room এর fan-out শুধু একটা Redis কে load দেয়। shard_for_room() দিয়ে load balancer এ
+একই ring এ WebSocket connections route করলে (room-to-worker affinity) একটা room এর
+সব socket একই worker pool আর একই shard এ থাকে।
+
+Channel name এ consumer এর "home" shard থাকে (direct send এর জন্য)। অন্য shard এর
+group এ join করলে ওই shard এ একটা আলাদা channel খোলা হয় আর receive() সবগুলো থেকে
+একসাথে পড়ে - তাই group_add একই process থেকে করতে হয় (Channels consumers তাই করে)।
+"""
+import asyncio
+import bisect
+import hashlib
+import random
+import time
+
+from channels.layers import BaseChannelLayer, InMemoryChannelLayer
+from django.utils.module_loading import import_string
+
+GROUP_PREFIX = 'chat_'
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Virtual nodes সহ consistent hash ring - shard যোগ করলে অল্প কিছু room ই সরে"""
+
+    def __init__(self, size, replicas=100):
+        self.size = size
+        points = sorted((_hash(f'{shard}:{replica}'), shard) for shard in range(size) for replica in range(replicas))
+        self.keys = [point for point, _ in points]
+        self.shards = [shard for _, shard in points]
+
+    def get(self, key):
+        if self.size == 1:
+            return 0
+        index = bisect.bisect(self.keys, _hash(str(key))) % len(self.keys)
+        return self.shards[index]
+
+
+def group_shard_key(group):
+    """chat_<room_id> group এর জন্য room_id, অন্য groups এর জন্য পুরো নাম"""
+    return group[len(GROUP_PREFIX):] if group.startswith(GROUP_PREFIX) else group
+
+
+def shard_for_room(room_id, shards):
+    """Load balancer / worker affinity এর জন্য - room কোন shard এ আছে"""
+    return HashRing(shards).get(str(room_id))
+
+
+class _LocalChannel:
+    """এই process এ তৈরি একটা channel - কোন shard এ কোন underlying channel name"""
+
+    def __init__(self, home, name):
+        self.names = {home: name}
+        self.groups = set()
+        self.queue = asyncio.Queue(maxsize=1)
+        self.pumps = {}  # shard -> receive task
+        self.idle_since = time.monotonic()  # শেষ receive() বা group থেকে শেষ discard
+
+    def is_receiving(self):
+        """Consumer এখনো receive() loop এ আছে - pump task চলছে"""
+        return any(not task.done() for task in self.pumps.values())
+
+
+class ShardedChannelLayer(BaseChannelLayer):
+    extensions = ['groups', 'flush']
+
+    def __init__(self, shards, expiry=60, **kwargs):
+        super().__init__(expiry=expiry, **kwargs)
+        if not shards:
+            raise ValueError('ShardedChannelLayer needs at least one shard')
+        self.shards = [import_string(shard['BACKEND'])(**shard.get('CONFIG', {})) for shard in shards]
+        self.ring = HashRing(len(self.shards))
+        self.local_channels = {}
+
+    def shard_for_group(self, group):
+        return self.ring.get(group_shard_key(group))
+
+    def _parse(self, channel):
+        prefix, _, underlying = channel.partition('.')
+        if not prefix.startswith('shard') or not underlying:
+            raise ValueError(f'{channel} was not created by ShardedChannelLayer')
+        return int(prefix[len('shard'):]), underlying
+
+    def _prune(self):
+        """
+        Disconnect হওয়া consumers এর local channels বাদ দেয় - কোনো group এ নেই, pump চলছে না
+        আর expiry এর মধ্যে receive() ও করেনি। Broadcast mode sockets কোনো group এ থাকে না,
+        কিন্তু তাদের pump চলতে থাকে, তাই সেগুলো থাকে।
+        """
+        cutoff = time.monotonic() - self.expiry
+        for channel, local in list(self.local_channels.items()):
+            if not local.groups and not local.is_receiving() and local.idle_since < cutoff:
+                del self.local_channels[channel]
+
+    async def new_channel(self, prefix='specific.'):
+        self._prune()
+        home = random.randrange(len(self.shards))
+        underlying = await self.shards[home].new_channel(prefix)
+        channel = f'shard{home}.{underlying}'
+        self.local_channels[channel] = _LocalChannel(home, underlying)
+        return channel
+
+    async def send(self, channel, message):
+        shard, underlying = self._parse(channel)
+        await self.shards[shard].send(underlying, message)
+
+    async def receive(self, channel):
+        local = self.local_channels.get(channel)
+        if local is None:
+            shard, underlying = self._parse(channel)
+            return await self.shards[shard].receive(underlying)
+
+        local.idle_since = time.monotonic()
+        self._start_pumps(local)
+        try:
+            return await local.queue.get()
+        except asyncio.CancelledError:
+            # Consumer বন্ধ হচ্ছে - shard receives ও বন্ধ করি
+            for task in local.pumps.values():
+                task.cancel()
+            local.pumps = {}
+            raise
+
+    def _start_pumps(self, local):
+        """প্রতিটা shard এর channel থেকে local queue তে message আনার task"""
+        for shard, name in local.names.items():
+            task = local.pumps.get(shard)
+            if task is None or task.done():  # নতুন shard, বা আগের pump layer error এ থেমেছে
+                local.pumps[shard] = asyncio.ensure_future(self._pump(self.shards[shard], name, local.queue))
+
+    @staticmethod
+    async def _pump(layer, name, queue):
+        while True:
+            message = await layer.receive(name)
+            await queue.put(message)  # Queue size 1 - consumer না পড়লে shard থেকেও পড়া থামে
+
+    async def group_add(self, group, channel):
+        shard = self.shard_for_group(group)
+        local = self.local_channels.get(channel)
+        if local is None:
+            home, underlying = self._parse(channel)
+            if home != shard:
+                raise ValueError(f'{channel} belongs to another process and cannot join {group} on shard {shard}')
+            await self.shards[shard].group_add(group, underlying)
+            return
+
+        underlying = local.names.get(shard)
+        if underlying is None:
+            underlying = local.names[shard] = await self.shards[shard].new_channel()
+            if local.pumps:  # receive() আগে থেকেই চলছে - নতুন shard থেকেও পড়া শুরু
+                self._start_pumps(local)
+        local.groups.add(group)
+        await self.shards[shard].group_add(group, underlying)
+
+    async def group_discard(self, group, channel):
+        shard = self.shard_for_group(group)
+        local = self.local_channels.get(channel)
+        if local is None:
+            underlying = self._parse(channel)[1]
+        else:
+            underlying = local.names.get(shard)
+            local.groups.discard(group)
+            if not local.groups:
+                local.idle_since = time.monotonic()
+            if underlying is None:
+                return
+        await self.shards[shard].group_discard(group, underlying)
+
+    async def group_send(self, group, message):
+        await self.shards[self.shard_for_group(group)].group_send(group, message)
+
+    async def flush(self):
+        self.local_channels = {}
+        for shard in self.shards:
+            if hasattr(shard, 'flush'):
+                await shard.flush()
+
+    async def close_pools(self):
+        for shard in self.shards:
+            if hasattr(shard, 'close_pools'):
+                await shard.close_pools()
+
+
+class StandInShardLayer(InMemoryChannelLayer):
+    """
+    Local test topology এর জন্য একটা Redis host এর stand-in। Redis single threaded,
+    তাই প্রতিটা group_send একটা lock নিয়ে service_time পরিমাণ সময় নেয় - এক shard এ
+    সব room থাকলে group_send গুলো queue হয়, shard বাড়ালে parallel চলে।
+    """
+
+    def __init__(self, service_time=0.001, **kwargs):
+        super().__init__(**kwargs)
+        self.service_time = service_time
+        self._server = None
+        self._cleaned_at = 0.0
+
+    def _clean_expired(self):
+        # InMemoryChannelLayer প্রতিটা operation এ সব channel scan করে - সেটা benchmark এ
+        # simulated server time কে ছাপিয়ে যায়, তাই সেকেন্ডে একবার
+        now = time.monotonic()
+        if now - self._cleaned_at >= 1:
+            self._cleaned_at = now
+            super()._clean_expired()
+
+    async def group_send(self, group, message):
+        if self._server is None:
+            self._server = asyncio.Lock()
+        async with self._server:
+            await asyncio.sleep(self.service_time)
+        await super().group_send(group, message)
+
+
+def stand_in_topology(shards, service_time=0.001, capacity=10000):
+    """In-process sharded topology এর CHANNEL_LAYERS config"""
+    return {
+        'default': {
+            'BACKEND': 'chat.layers.ShardedChannelLayer',
+            'CONFIG': {
+                'shards': [
+                    {
+                        'BACKEND': 'chat.layers.StandInShardLayer',
+                        'CONFIG': {'service_time': service_time, 'capacity': capacity},
+                    }
+                    for _ in range(shards)
+                ],
+            },
+        },
+    }
@@ -0,0 +1,551 @@
+# chat/loadtest.py
+"""
+Load-testing helpers - seed data, WebSocket fan-out এবং HTTP endpoints benchmark করে
+
+`manage.py loadtest` command এটা use করে। সব কিছু in-process চলে:
+WebSocket এর জন্য Channels এর WebsocketCommunicator, HTTP এর জন্য Django test Client।
+"""
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import protocol
+from .db import database_sync_to_async, close_pool_connections
+from .models import ChatRoom, RoomMembership, Message, post_message
+
+User = get_user_model()
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        'CONFIG': {
+            'capacity': 10000,
+        },
+    },
+}
+
+
+def percentiles(values, points=(50, 90, 95, 99)):
+    """Sorted values থেকে p50/p90/... বের করে (nearest-rank)"""
+    if not values:
+        return {f'p{p}': None for p in points}
+
+    ordered = sorted(values)
+    result = {}
+    for p in points:
+        index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+        result[f'p{p}'] = ordered[index]
+    return result
+
+
+def summarize(values):
+    """Latency list এর summary - milliseconds এ"""
+    values_ms = [v * 1000 for v in values]
+    summary = {
+        'count': len(values_ms),
+        'mean_ms': statistics.fmean(values_ms) if values_ms else None,
+        'max_ms': max(values_ms) if values_ms else None,
+    }
+    for key, value in percentiles(values_ms).items():
+        summary[f'{key}_ms'] = value
+    return summary
+
+
+def seed(users=50, rooms=10, room_size=5, history=100, prefix='load'):
+    """
+    Benchmark এর জন্য users, group rooms, memberships আর message history তৈরি করে।
+    সব কিছু bulk_create দিয়ে, তাই বড় scale এও দ্রুত হয়।
+    """
+
+    password = make_password('loadtest')
+    User.objects.bulk_create([
+        User(username=f'{prefix}_user_{i}', password=password, first_name='Load', last_name=f'User {i}')
+        for i in range(users)
+    ])
+    seeded_users = list(User.objects.filter(username__startswith=f'{prefix}_user_').order_by('id'))
+
+    room_objects = [
+        ChatRoom(name=f'{prefix} room {i}', room_type='group', created_by=seeded_users[0])
+        for i in range(rooms)
+    ]
+    ChatRoom.objects.bulk_create(room_objects)
+
+    memberships = []
+    messages = []
+    size = min(room_size, len(seeded_users))
+    for index, room in enumerate(room_objects):
+        members = [seeded_users[(index + offset) % len(seeded_users)] for offset in range(size)]
+        for position, user in enumerate(members):
+            memberships.append(RoomMembership(room=room, user=user, role='admin' if position == 0 else 'member'))
+        for i in range(history):
+            messages.append(Message(room=room, sender=members[i % len(members)], content=f'History message {i}'))
+
+    RoomMembership.objects.bulk_create(memberships, batch_size=1000)
+    Message.objects.bulk_create(messages, batch_size=1000)
+
+    return seeded_users, room_objects
+
+
+def create_room_with_members(members, name, broadcast_mode=False):
+    """নির্দিষ্ট members নিয়ে একটা group room (fan-out benchmark এর জন্য)"""
+    room = ChatRoom.objects.create(name=name, room_type='group', created_by=members[0],
+                                   max_members=max(100, len(members)), broadcast_mode=broadcast_mode)
+    RoomMembership.objects.bulk_create([
+        RoomMembership(room=room, user=user, role='admin' if i == 0 else 'member')
+        for i, user in enumerate(members)
+    ])
+    return room
+
+
+async def _receive_at(communicator, timeout):
+    frame = await communicator.receive_from(timeout=timeout)
+    return time.perf_counter(), len(frame.encode() if isinstance(frame, str) else frame)
+
+
+async def bench_room_fanout(application, room, members, messages=20, timeout=10, codec=protocol.JSON):
+    """
+    একটা room এ len(members) টা ChatConsumer connect করে, প্রথম member message পাঠায়
+    আর বাকি সবার কাছে পৌঁছাতে কত সময় লাগে সেটা মাপে। codec দিলে সেই subprotocol এ।
+    """
+    from channels.testing import WebsocketCommunicator
+
+    path = f'/ws/chat/{room.id}/'
+    subprotocols = [codec.subprotocol] if codec.subprotocol else None
+    communicators = []
+    connect_times = []
+
+    for user in members:
+        communicator = WebsocketCommunicator(application, path, subprotocols=subprotocols)
+        communicator.scope['user'] = user
+        started = time.perf_counter()
+        connected, _ = await communicator.connect(timeout=timeout)
+        if not connected:
+            raise RuntimeError(f'{user.username} could not connect to room {room.id}')
+        connect_times.append(time.perf_counter() - started)
+        await communicator.receive_from(timeout=timeout)  # welcome message
+        communicators.append(communicator)
+
+    sender = communicators[0]
+    latencies = []
+    received_bytes = 0
+    started = time.perf_counter()
+    try:
+        for i in range(messages):
+            sent_at = time.perf_counter()
+            await sender.send_to(**codec.encode({'type': 'chat_message', 'message': f'Load message {i}'}))
+            arrived = await asyncio.gather(*(_receive_at(c, timeout) for c in communicators))
+            latencies.extend(at - sent_at for at, _ in arrived)
+            received_bytes += sum(size for _, size in arrived)
+        elapsed = time.perf_counter() - started
+    finally:
+        for communicator in communicators:
+            await communicator.disconnect()
+
+    return {
+        'room_size': len(members),
+        'messages': messages,
+        'deliveries': len(latencies),
+        'elapsed_s': elapsed,
+        'messages_per_s': messages / elapsed if elapsed else None,
+        'deliveries_per_s': len(latencies) / elapsed if elapsed else None,
+        'protocol': codec.name,
+        'bytes_per_delivery': received_bytes / len(latencies) if latencies else None,
+        'connect': summarize(connect_times),
+        'latency': summarize(latencies),
+    }
+
+
+def run_websocket_benchmarks(users, room_sizes, messages=20, quiet=True, broadcast=False, codec=protocol.JSON):
+    """
+    প্রতিটা room size এর জন্য আলাদা room বানিয়ে fan-out benchmark চালায়।
+    broadcast=True হলে rooms broadcast mode এ (worker level fan-out) চলে।
+    """
+    from channels.routing import URLRouter
+    from .routing import websocket_urlpatterns
+
+    application = URLRouter(websocket_urlpatterns)
+    results = []
+
+    for size in room_sizes:
+        if size > len(users):
+            raise ValueError(f'Room size {size} needs at least {size} seeded users')
+        members = users[:size]
+        room = create_room_with_members(members, f'fanout {size}', broadcast_mode=broadcast)
+
+        # Consumer এর print() output benchmark কে noisy করে, তাই default এ চুপ রাখি
+        output = io.StringIO() if quiet else None
+        with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+            result = asyncio.run(bench_room_fanout(application, room, members, messages, codec=codec))
+        result['mode'] = 'broadcast' if broadcast else 'group'
+        results.append(result)
+
+    return results
+
+
+def _write_message(room_id, sender, content):
+    return post_message(room_id, sender, Message(content=content))
+
+
+def _recent_messages(room_id):
+    return list(Message.objects.filter(room_id=room_id).select_related('sender').order_by('-timestamp')[:50])
+
+
+async def bench_db_access(room, members, writers=8, readers=8, operations=50):
+    """
+    ChatConsumer এর মতো database_sync_to_async দিয়ে concurrent writes (post_message)
+    আর history reads চালায় - database profile (SQLite WAL / Postgres, pool size) তুলনার জন্য।
+    """
+    save = database_sync_to_async(_write_message)
+    read = database_sync_to_async(_recent_messages)
+    write_times = []
+    read_times = []
+    errors = []
+
+    async def writer(index):
+        sender = members[index % len(members)]
+        for i in range(operations):
+            started = time.perf_counter()
+            try:
+                await save(room.id, sender, f'DB bench {index}-{i}')
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            write_times.append(time.perf_counter() - started)
+
+    async def reader():
+        for _ in range(operations):
+            started = time.perf_counter()
+            try:
+                await read(room.id)
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            read_times.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[writer(i) for i in range(writers)], *[reader() for _ in range(readers)])
+    elapsed = time.perf_counter() - started
+
+    return {
+        'writers': writers,
+        'readers': readers,
+        'operations': operations,
+        'elapsed_s': elapsed,
+        'writes_per_s': len(write_times) / elapsed if elapsed else None,
+        'reads_per_s': len(read_times) / elapsed if elapsed else None,
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'write': summarize(write_times),
+        'read': summarize(read_times),
+    }
+
+
+def run_db_benchmark(users, room, writers=8, readers=8, operations=50):
+    try:
+        return asyncio.run(bench_db_access(room, users, writers, readers, operations))
+    finally:
+        # Pool threads এর connection খোলা থাকলে test database drop করা যায় না
+        close_pool_connections()
+
+
+async def bench_consumer_throughput(application, pairs, messages=50, timeout=30):
+    """
+    প্রতিটা (room, user) এর জন্য একটা ChatConsumer - সবাই একসাথে messages টা করে
+    chat_message পাঠায়, প্রতিটার save হয়ে echo ফেরা পর্যন্ত অপেক্ষা করে। একটা worker
+    process কত messages/s save আর broadcast করতে পারে সেটা মাপে।
+    """
+    from channels.testing import WebsocketCommunicator
+
+    communicators = []
+    for room, user in pairs:
+        communicator = WebsocketCommunicator(application, f'/ws/chat/{room.id}/')
+        communicator.scope['user'] = user
+        connected, _ = await communicator.connect(timeout=timeout)
+        if not connected:
+            raise RuntimeError(f'{user.username} could not connect to room {room.id}')
+        await communicator.receive_from(timeout=timeout)  # welcome message
+        communicators.append(communicator)
+
+    latencies = []
+
+    async def client(communicator, index):
+        for i in range(messages):
+            sent_at = time.perf_counter()
+            await communicator.send_json_to({'type': 'chat_message', 'message': f'ORM bench {index}-{i}'})
+            await communicator.receive_from(timeout=timeout)
+            latencies.append(time.perf_counter() - sent_at)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(client(c, i) for i, c in enumerate(communicators)))
+        elapsed = time.perf_counter() - started
+    finally:
+        for communicator in communicators:
+            await communicator.disconnect()
+        # Async ORM এর queries asgiref এর shared thread এ চলে - তার connection ও বন্ধ করি
+        await sync_to_async(connections.close_all)()
+
+    return {
+        'clients': len(communicators),
+        'messages': len(latencies),
+        'elapsed_s': elapsed,
+        'messages_per_s': len(latencies) / elapsed if elapsed else None,
+        'latency': summarize(latencies),
+    }
+
+
+def run_orm_benchmarks(users, clients=8, messages=50, quiet=True):
+    """একই consumer workload sync ORM (thread pool) আর async ORM দুই mode এ"""
+    from channels.routing import URLRouter
+    from .routing import websocket_urlpatterns
+
+    if clients > len(users):
+        raise ValueError(f'{clients} clients need at least {clients} seeded users')
+
+    application = URLRouter(websocket_urlpatterns)
+    pairs = [(create_room_with_members([user], f'orm bench {i}'), user) for i, user in enumerate(users[:clients])]
+    results = []
+
+    for mode in ('sync', 'async'):
+        output = io.StringIO() if quiet else None
+        try:
+            with override_settings(CHAT_ASYNC_ORM=mode == 'async'):
+                with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+                    result = asyncio.run(bench_consumer_throughput(application, pairs, messages))
+        finally:
+            close_pool_connections()
+        result['orm'] = mode
+        results.append(result)
+
+    return results
+
+
+async def bench_layer_fanout(layer, rooms=16, room_size=20, messages=20, timeout=30):
+    """
+    Channel layer level fan-out - প্রতিটা room এ room_size টা channel, সব room একসাথে
+    messages টা করে group_send করে। সব delivery পৌঁছাতে কত সময় লাগে মাপে।
+    """
+    groups = [f'chat_{uuid.uuid4()}' for _ in range(rooms)]
+    receivers = []
+    for group in groups:
+        for _ in range(room_size):
+            channel = await layer.new_channel()
+            await layer.group_add(group, channel)
+            receivers.append(channel)
+
+    async def receive_all(channel):
+        for _ in range(messages):
+            await layer.receive(channel)
+
+    async def send_all(group):
+        for i in range(messages):
+            await layer.group_send(group, {'type': 'chat_message', 'message': f'Layer message {i}'})
+
+    started = time.perf_counter()
+    receiving = asyncio.gather(*(receive_all(channel) for channel in receivers))
+    await asyncio.gather(*(send_all(group) for group in groups))
+    await asyncio.wait_for(receiving, timeout)
+    elapsed = time.perf_counter() - started
+
+    shard_rooms = [0] * len(getattr(layer, 'shards', [layer]))
+    if hasattr(layer, 'shard_for_group'):
+        for group in groups:
+            shard_rooms[layer.shard_for_group(group)] += 1
+
+    return {
+        'rooms': rooms,
+        'room_size': room_size,
+        'messages': messages,
+        'elapsed_s': elapsed,
+        'group_sends_per_s': rooms * messages / elapsed if elapsed else None,
+        'deliveries_per_s': rooms * messages * room_size / elapsed if elapsed else None,
+        'rooms_per_shard': shard_rooms,
+    }
+
+
+def run_layer_benchmarks(shard_counts, rooms=16, room_size=20, messages=20, service_time=0.001):
+    """
+    Stand-in shards (chat.layers.StandInShardLayer) দিয়ে প্রতিটা shard count এর জন্য
+    layer fan-out benchmark - throughput shard সংখ্যার সাথে কীভাবে বাড়ে দেখায়।
+    """
+    from .layers import ShardedChannelLayer, stand_in_topology
+
+    results = []
+    for shards in shard_counts:
+        config = stand_in_topology(shards, service_time, capacity=max(100, messages * 2))['default']['CONFIG']
+        result = asyncio.run(bench_layer_fanout(ShardedChannelLayer(**config), rooms, room_size, messages))
+        result['shards'] = shards
+        results.append(result)
+    return results
+
+
+def sample_frames():
+    """Wire protocol benchmark এর জন্য সাধারণ server -> client frames"""
+    message_id = str(uuid.uuid4())
+    return [
+        {
+            'type': 'message',
+            'message': {
+                'id': message_id,
+                'content': 'Hello everyone, the meeting moved to 3pm',
+                'sender': 'load_user_1',
+                'timestamp': '14:05',
+                'message_type': 'text',
+                'reply_to': {'id': str(uuid.uuid4()), 'sender': 'load_user_2', 'content': 'When is the meeting?'},
+            },
+        },
+        {
+            'type': 'reaction',
+            'message_id': message_id,
+            'counts': {'👍': 3, '❤️': 1},
+            'user': 'load_user_3',
+            'reaction': '👍',
+            'action': 'add',
+        },
+        {'type': 'message_update', 'message': {'id': message_id, 'content': 'Moved to 4pm', 'edited_at': '14:07'}},
+    ]
+
+
+def bench_wire_protocol(iterations=2000):
+    """
+    প্রতিটা codec এর frame size (raw আর per-message deflate এর মতো আলাদা করে compressed)
+    আর encode/decode CPU time per frame।
+    """
+    import zlib
+
+    frames = sample_frames()
+    results = {}
+    for codec in [protocol.JSON] + protocol.enabled_codecs():
+        payloads = []
+        for frame in frames:
+            data = codec.encode(frame)
+            payloads.append(data['text_data'].encode() if 'text_data' in data else data['bytes_data'])
+
+        deflated = []
+        for payload in payloads:
+            # permessage-deflate, no context takeover - প্রতিটা frame আলাদা raw deflate
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            deflated.append(len(compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4)
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for frame in frames:
+                codec.encode(frame)
+        encode_time = time.perf_counter() - started
+
+        decode_args = [{'text_data': payload.decode()} if codec is protocol.JSON else {'bytes_data': payload}
+                       for payload in payloads]
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for kwargs in decode_args:
+                codec.decode(**kwargs)
+        decode_time = time.perf_counter() - started
+
+        count = iterations * len(frames)
+        results[codec.name] = {
+            'bytes_per_frame': statistics.fmean(len(p) for p in payloads),
+            'deflated_bytes_per_frame': statistics.fmean(deflated),
+            'encode_us': encode_time / count * 1e6,
+            'decode_us': decode_time / count * 1e6,
+        }
+    return results
+
+
+def bench_endpoint(client, url, repeat=20):
+    """একটা URL কয়েকবার hit করে query count আর wall time মাপে"""
+    timings = []
+    query_counts = []
+
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f'GET {url} returned {response.status_code}')
+        query_counts.append(len(queries))
+
+    return {
+        'url': url,
+        'repeat': repeat,
+        'queries': max(query_counts),
+        'wall': summarize(timings),
+    }
+
+
+def run_http_benchmarks(user, room, repeat=20):
+    """home_view, chat_room_view আর search_users benchmark"""
+    client = Client()
+    client.force_login(user)
+
+    endpoints = {
+        'home_view': reverse('chat:home'),
+        'chat_room_view': reverse('chat:room', kwargs={'room_id': room.id}),
+        'search_users': reverse('chat:search_users') + '?q=user',
+    }
+
+    return {name: bench_endpoint(client, url, repeat) for name, url in endpoints.items()}
+
+
+def compare(baseline, current):
+    """দুইটা run এর result থেকে important metrics এর পরিবর্তন বের করে"""
+    rows = []
+
+    def add(label, old, new):
+        if old is None or new is None:
+            return
+        change = ((new - old) / old * 100) if old else None
+        rows.append((label, old, new, change))
+
+    def ws_key(result):
+        return result['room_size'], result.get('mode', 'group'), result.get('protocol', 'json')
+
+    old_ws = {ws_key(r): r for r in baseline.get('websocket', [])}
+    for result in current.get('websocket', []):
+        old = old_ws.get(ws_key(result))
+        if not old:
+            continue
+        label = 'ws {1} {2} room_size={0}'.format(*ws_key(result))
+        add(f'{label} latency p50 ms', old['latency']['p50_ms'], result['latency']['p50_ms'])
+        add(f'{label} latency p95 ms', old['latency']['p95_ms'], result['latency']['p95_ms'])
+        add(f'{label} deliveries/s', old['deliveries_per_s'], result['deliveries_per_s'])
+
+    old_layers = {r['shards']: r for r in baseline.get('layers', [])}
+    for result in current.get('layers', []):
+        old = old_layers.get(result['shards'])
+        if old:
+            add(f"layer shards={result['shards']} deliveries/s", old['deliveries_per_s'], result['deliveries_per_s'])
+
+    for name, result in current.get('protocol', {}).items():
+        old = baseline.get('protocol', {}).get(name)
+        if old:
+            add(f'{name} bytes/frame', old['bytes_per_frame'], result['bytes_per_frame'])
+            add(f'{name} encode us', old['encode_us'], result['encode_us'])
+
+    old_db = baseline.get('database')
+    new_db = current.get('database')
+    if old_db and new_db:
+        add('db writes/s', old_db['writes_per_s'], new_db['writes_per_s'])
+        add('db write p95 ms', old_db['write']['p95_ms'], new_db['write']['p95_ms'])
+        add('db reads/s', old_db['reads_per_s'], new_db['reads_per_s'])
+        add('db read p95 ms', old_db['read']['p95_ms'], new_db['read']['p95_ms'])
+
+    for name, result in current.get('http', {}).items():
+        old = baseline.get('http', {}).get(name)
+        if not old:
+            continue
+        add(f'{name} queries', old['queries'], result['queries'])
+        add(f'{name} wall p50 ms', old['wall']['p50_ms'], result['wall']['p50_ms'])
+
+    return rows
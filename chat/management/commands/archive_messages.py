@@ -0,0 +1,30 @@
+# chat/management/commands/archive_messages.py
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.archive import archive_expired_messages, get_compression
+
+
+class Command(BaseCommand):
+    help = 'Retention policy অনুযায়ী পুরনো messages compressed archive files এ সরিয়ে hot table থেকে delete করে'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--room', action='append', dest='rooms', help='Only archive this room (repeatable)')
+        parser.add_argument('--batch-size', type=int, help='Messages per batch (default CHAT_ARCHIVE_BATCH_SIZE)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count messages that would be archived')
+
+    def handle(self, *args, **options):
+        try:
+            get_compression()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        results = archive_expired_messages(
+            room_ids=options['rooms'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+
+        verb = 'would be archived' if options['dry_run'] else 'archived'
+        for room_id, count in results.items():
+            self.stdout.write(f'{room_id}: {count} messages {verb}')
+        self.stdout.write(self.style.SUCCESS(f'{sum(results.values())} messages {verb} in {len(results)} rooms'))
@@ -0,0 +1,45 @@
+# chat/management/commands/export_room.py
+import sys
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.export import export_room, FORMATS, ATTACHMENT_MODES
+from chat.models import ChatRoom
+
+
+class Command(BaseCommand):
+    help = 'Room এর পুরো history (archive সহ) JSONL/CSV বা zip আকারে stream করে export করে'
+
+    def add_arguments(self, parser):
+        parser.add_argument('room_id')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--attachments', choices=ATTACHMENT_MODES, default='reference',
+                            help='Reference attachment paths or bundle them into a zip')
+        parser.add_argument('--compress', action='store_true', help='gzip the output (ignored for zip)')
+        parser.add_argument('--no-archive', action='store_true', help='Skip archived messages')
+        parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            room = ChatRoom.objects.get(id=options['room_id'])
+        except (ChatRoom.DoesNotExist, ValidationError):
+            raise CommandError(f"Room {options['room_id']} does not exist")
+
+        chunks = export_room(
+            room.id,
+            export_format=options['format'],
+            attachments=options['attachments'],
+            compress=options['compress'],
+            include_archive=not options['no_archive'],
+        )
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
@@ -0,0 +1,217 @@
+# chat/management/commands/loadtest.py
+import json
+import os
+import platform
+import tempfile
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from chat import loadtest, protocol
+from chat.db import describe_profile
+
+
+class Command(BaseCommand):
+    help = 'Throwaway test database এ data seed করে WebSocket fan-out আর HTTP endpoints benchmark করে'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Number of users to seed')
+        parser.add_argument('--rooms', type=int, default=10, help='Number of group rooms to seed')
+        parser.add_argument('--room-size', type=int, default=5, help='Members per seeded room')
+        parser.add_argument('--history', type=int, default=100, help='Messages per seeded room')
+        parser.add_argument('--fanout-sizes', default='2,10,50',
+                            help='Comma separated room sizes for the WebSocket benchmark')
+        parser.add_argument('--messages', type=int, default=20, help='Messages sent per fan-out room')
+        parser.add_argument('--modes', default='group',
+                            help='Comma separated fan-out modes to benchmark: group, broadcast')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per HTTP endpoint')
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--compare', help='Compare against a previous JSON result file')
+        parser.add_argument('--db-writers', type=int, default=8, help='Concurrent writers in the database benchmark')
+        parser.add_argument('--db-readers', type=int, default=8, help='Concurrent readers in the database benchmark')
+        parser.add_argument('--db-operations', type=int, default=50, help='Operations per database writer/reader')
+        parser.add_argument('--orm-clients', type=int, default=8,
+                            help='Concurrent sockets in the sync vs async ORM consumer benchmark')
+        parser.add_argument('--orm-messages', type=int, default=50, help='Messages per socket in the ORM benchmark')
+        parser.add_argument('--shards', default='1,2,4',
+                            help='Comma separated shard counts for the sharded channel layer benchmark')
+        parser.add_argument('--shard-rooms', type=int, default=16, help='Rooms in the sharded layer benchmark')
+        parser.add_argument('--shard-service-ms', type=float, default=2.0,
+                            help='Simulated per group_send service time of one stand-in layer host')
+        parser.add_argument('--protocols', default='json',
+                            help='Comma separated wire protocols for the WebSocket benchmark: json, msgpack')
+        parser.add_argument('--skip-websocket', action='store_true')
+        parser.add_argument('--skip-http', action='store_true')
+        parser.add_argument('--skip-db', action='store_true')
+        parser.add_argument('--skip-orm', action='store_true')
+        parser.add_argument('--skip-shards', action='store_true')
+        parser.add_argument('--skip-protocol', action='store_true')
+        parser.add_argument('--verbose-consumer', action='store_true',
+                            help="Don't silence ChatConsumer print output")
+
+    def handle(self, *args, **options):
+        try:
+            fanout_sizes = [int(size) for size in options['fanout_sizes'].split(',') if size.strip()]
+            shard_counts = [int(count) for count in options['shards'].split(',') if count.strip()]
+        except ValueError:
+            raise CommandError('--fanout-sizes and --shards must be comma separated lists of integers')
+
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        if not modes or set(modes) - {'group', 'broadcast'}:
+            raise CommandError('--modes must be a comma separated list of: group, broadcast')
+
+        codecs = {codec.name: codec for codec in [protocol.JSON] + protocol.enabled_codecs()}
+        try:
+            protocols = [codecs[name.strip()] for name in options['protocols'].split(',') if name.strip()]
+        except KeyError as e:
+            raise CommandError(f'Unknown or unavailable wire protocol: {e.args[0]}')
+
+        users_needed = max(fanout_sizes + [options['room_size'], options['orm_clients'], 1])
+        if options['users'] < users_needed:
+            raise CommandError(f'--users must be at least {users_needed}')
+
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+
+        results = {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'database_profile': describe_profile(),
+            },
+            'params': {
+                key: options[key]
+                for key in ('users', 'rooms', 'room_size', 'history', 'messages', 'repeat')
+            },
+        }
+        results['params']['fanout_sizes'] = fanout_sizes
+        results['params']['modes'] = modes
+        results['params']['protocols'] = [codec.name for codec in protocols]
+
+        if connection.vendor == 'sqlite' and not connection.settings_dict['TEST']['NAME']:
+            # In-memory test database এ WAL বা file locking এর আচরণ দেখা যায় না
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.gettempdir(), 'chat_loadtest.sqlite3')
+
+        # Real database এ হাত না দিয়ে একটা আলাদা test database এ সব চালাই
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(CHANNEL_LAYERS=loadtest.IN_MEMORY_CHANNEL_LAYERS):
+                self.stdout.write('Seeding data...')
+                users, rooms = loadtest.seed(
+                    users=options['users'],
+                    rooms=options['rooms'],
+                    room_size=options['room_size'],
+                    history=options['history'],
+                )
+
+                if not options['skip_http']:
+                    self.stdout.write('Running HTTP benchmarks...')
+                    results['http'] = loadtest.run_http_benchmarks(users[0], rooms[0], options['repeat'])
+
+                if not options['skip_websocket']:
+                    self.stdout.write('Running WebSocket fan-out benchmarks...')
+                    results['websocket'] = []
+                    for mode in modes:
+                        for codec in protocols:
+                            results['websocket'].extend(loadtest.run_websocket_benchmarks(
+                                users, fanout_sizes, options['messages'], quiet=not options['verbose_consumer'],
+                                broadcast=mode == 'broadcast', codec=codec,
+                            ))
+
+                if not options['skip_db']:
+                    self.stdout.write('Running database benchmark...')
+                    results['database'] = loadtest.run_db_benchmark(
+                        users, rooms[0], options['db_writers'], options['db_readers'], options['db_operations']
+                    )
+
+                if not options['skip_orm']:
+                    self.stdout.write('Running consumer sync vs async ORM benchmark...')
+                    results['orm'] = loadtest.run_orm_benchmarks(
+                        users, options['orm_clients'], options['orm_messages'], quiet=not options['verbose_consumer']
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if not options['skip_protocol']:
+            self.stdout.write('Running wire protocol benchmark...')
+            results['protocol'] = loadtest.bench_wire_protocol()
+
+        if not options['skip_shards']:
+            # Database লাগে না - শুধু channel layer
+            self.stdout.write('Running sharded channel layer benchmark...')
+            results['layers'] = loadtest.run_layer_benchmarks(
+                shard_counts, options['shard_rooms'], options['room_size'], options['messages'],
+                options['shard_service_ms'] / 1000,
+            )
+
+        self.print_results(results)
+
+        if baseline:
+            self.print_comparison(loadtest.compare(baseline, results))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results saved to {options['output']}"))
+
+    def print_results(self, results):
+        for name, result in results.get('http', {}).items():
+            wall = result['wall']
+            self.stdout.write(
+                f"{name:<16} queries={result['queries']:<4} "
+                f"p50={wall['p50_ms']:.2f}ms p95={wall['p95_ms']:.2f}ms"
+            )
+
+        for result in results.get('websocket', []):
+            latency = result['latency']
+            self.stdout.write(
+                f"{result.get('mode', 'group'):<9} {result.get('protocol', 'json'):<7} room_size={result['room_size']:<5} "
+                f"p50={latency['p50_ms']:.2f}ms p95={latency['p95_ms']:.2f}ms p99={latency['p99_ms']:.2f}ms "
+                f"msgs/s={result['messages_per_s']:.1f} deliveries/s={result['deliveries_per_s']:.1f} "
+                f"bytes/delivery={result['bytes_per_delivery']:.0f}"
+            )
+
+        for name, result in results.get('protocol', {}).items():
+            self.stdout.write(
+                f"protocol {name:<8} bytes/frame={result['bytes_per_frame']:.0f} "
+                f"deflated={result['deflated_bytes_per_frame']:.0f} "
+                f"encode={result['encode_us']:.2f}us decode={result['decode_us']:.2f}us"
+            )
+
+        for result in results.get('layers', []):
+            self.stdout.write(
+                f"shards={result['shards']:<3} group_sends/s={result['group_sends_per_s']:.1f} "
+                f"deliveries/s={result['deliveries_per_s']:.1f} rooms/shard={result['rooms_per_shard']}"
+            )
+
+        for result in results.get('orm', []):
+            latency = result['latency']
+            self.stdout.write(
+                f"orm {result['orm']:<5} clients={result['clients']:<4} msgs/s={result['messages_per_s']:.1f} "
+                f"p50={latency['p50_ms']:.2f}ms p95={latency['p95_ms']:.2f}ms"
+            )
+
+        database = results.get('database')
+        if database:
+            profile = results['environment']['database_profile']
+            self.stdout.write(
+                f"database {' '.join(f'{key}={value}' for key, value in profile.items())}: "
+                f"writes/s={database['writes_per_s']:.1f} write p95={database['write']['p95_ms']:.2f}ms "
+                f"reads/s={database['reads_per_s']:.1f} read p95={database['read']['p95_ms']:.2f}ms "
+                f"errors={database['errors']}"
+            )
+
+    def print_comparison(self, rows):
+        self.stdout.write('\nCompared with baseline:')
+        for label, old, new, change in rows:
+            change_text = f'{change:+.1f}%' if change is not None else 'n/a'
+            self.stdout.write(f'{label:<40} {old:>10.2f} -> {new:>10.2f} ({change_text})')
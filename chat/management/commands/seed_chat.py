@@ -0,0 +1,89 @@
+# chat/management/commands/seed_chat.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from chat import directory
+from chat.seeding import Seeder, DISTRIBUTIONS, room_sizes, message_counts
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Performance testing এর জন্য বড় synthetic dataset তৈরি করে, অথবা exported JSONL import করে'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--rooms', type=int, default=100)
+        parser.add_argument('--messages', type=int, default=100000, help='Total messages across all rooms')
+        parser.add_argument('--room-size', default='zipf', choices=DISTRIBUTIONS,
+                            help='Room size distribution')
+        parser.add_argument('--min-room-size', type=int, default=2)
+        parser.add_argument('--max-room-size', type=int, default=100)
+        parser.add_argument('--message-rate', default='zipf', choices=('uniform', 'zipf'),
+                            help='How messages are spread across rooms')
+        parser.add_argument('--private-ratio', type=float, default=0.3, help='Fraction of private rooms')
+        parser.add_argument('--reaction-ratio', type=float, default=0.05, help='Fraction of messages with reactions')
+        parser.add_argument('--span-days', type=int, default=30, help='History spread over this many days')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed_', help='Username prefix for generated users')
+        parser.add_argument('--seed', type=int, help='Random seed for reproducible datasets')
+        parser.add_argument('--import', dest='import_file',
+                            help='Import an exported JSONL file into a new room. Content, timestamps, edits, '
+                                 'replies and file references are kept; reaction counts, replies to messages '
+                                 'outside the file and zip-bundled attachments are dropped and reported')
+        parser.add_argument('--room-name', default='Imported room', help='Room name for --import')
+        parser.add_argument('--owner', help='Username that owns the imported room')
+
+    def handle(self, *args, **options):
+        seeder = Seeder(batch_size=options['batch_size'], seed=options['seed'], log=self.stdout.write)
+
+        if options['import_file']:
+            self.import_file(seeder, options)
+        else:
+            self.generate(seeder, options)
+
+        # Raw inserts signals চালায় না - directory এর sort keys একবারে বানাই
+        self.stdout.write('Rebuilding directory sort keys...')
+        directory.rebuild()
+
+        summary = ', '.join(f'{count} {name}' for name, count in seeder.created.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary}'))
+
+    def generate(self, seeder, options):
+        if options['rooms'] < 1:
+            raise CommandError('--rooms must be at least 1')
+        if options['messages'] < 0:
+            raise CommandError('--messages cannot be negative')
+        if options['min_room_size'] < 2 or options['max_room_size'] < options['min_room_size']:
+            raise CommandError('Room sizes must satisfy 2 <= --min-room-size <= --max-room-size')
+        if options['users'] < options['max_room_size']:
+            raise CommandError('--users must be at least --max-room-size')
+        if User.objects.filter(username__startswith=options['prefix']).exists():
+            raise CommandError(f"Users with prefix '{options['prefix']}' already exist, use another --prefix")
+
+        self.stdout.write(f"Creating {options['users']} users...")
+        user_ids = seeder.create_users(options['users'], options['prefix'])
+
+        self.stdout.write(f"Creating {options['rooms']} rooms...")
+        sizes = room_sizes(options['rooms'], options['room_size'], options['min_room_size'],
+                           options['max_room_size'], seeder.rng)
+        rooms = seeder.create_rooms(user_ids, sizes, options['private_ratio'], options['prefix'].rstrip('_'))
+
+        self.stdout.write(f"Creating {options['messages']} messages...")
+        counts = message_counts(options['messages'], len(rooms), options['message_rate'], seeder.rng)
+        seeder.create_messages(rooms, counts, options['span_days'], options['reaction_ratio'])
+
+    def import_file(self, seeder, options):
+        if not options['owner']:
+            raise CommandError('--owner is required with --import')
+        try:
+            owner = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['owner']} does not exist")
+
+        with open(options['import_file'], encoding='utf-8') as lines:
+            room = seeder.import_jsonl(lines, options['room_name'], owner)
+        self.stdout.write(f'Imported into room {room.id}')
+        dropped = ', '.join(f'{field} on {count} messages' for field, count in seeder.dropped.items() if count)
+        if dropped:
+            self.stdout.write(self.style.WARNING(f'Not imported: {dropped}'))
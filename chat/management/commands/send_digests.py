@@ -0,0 +1,34 @@
+# chat/management/commands/send_digests.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+from chat.notifications import get_sink, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Offline members এর pending notifications থেকে user প্রতি digest বানিয়ে notification sink এ পাঠায়'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, sending digests every --interval seconds')
+        parser.add_argument('--interval', type=float,
+                            help='Seconds between runs with --loop (default CHAT_DIGEST_INTERVAL)')
+        parser.add_argument('--sink', help='Sink class path, overrides CHAT_NOTIFICATION_SINK')
+        parser.add_argument('--batch-size', type=int, help='Users per transaction (default CHAT_DIGEST_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        sink = import_string(options['sink'])() if options['sink'] else get_sink()
+        interval = options['interval'] or getattr(settings, 'CHAT_DIGEST_INTERVAL', 300)
+
+        while True:
+            started = time.perf_counter()
+            sent = send_digests(sink, options['batch_size'])
+            self.stdout.write(f'Sent {sent} digests in {(time.perf_counter() - started) * 1000:.0f}ms')
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(interval)
@@ -0,0 +1,44 @@
+# chat/management/commands/sync_replica.py
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.replicas import PRIMARY_ALIAS, REPLICA_ALIAS
+
+
+class Command(BaseCommand):
+    help = 'Local development: SQLite primary কে replica file এ copy করে (replication এর stand-in)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='Keep copying every N seconds (simulates replication lag)')
+
+    def handle(self, *args, **options):
+        if REPLICA_ALIAS not in settings.DATABASES:
+            raise CommandError('No replica database configured, set DB_REPLICA_NAME')
+
+        primary = settings.DATABASES[PRIMARY_ALIAS]
+        replica = settings.DATABASES[REPLICA_ALIAS]
+        if 'sqlite3' not in primary['ENGINE'] or 'sqlite3' not in replica['ENGINE']:
+            raise CommandError('sync_replica only works with SQLite; use real replication for Postgres')
+        if str(primary['NAME']) == str(replica['NAME']):
+            raise CommandError('Primary and replica point to the same file')
+
+        while True:
+            self.copy(primary['NAME'], replica['NAME'])
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, source_name, target_name):
+        started = time.perf_counter()
+        source = sqlite3.connect(source_name)
+        target = sqlite3.connect(target_name)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self.stdout.write(f'Copied {source_name} -> {target_name} in {(time.perf_counter() - started) * 1000:.0f}ms')
@@ -0,0 +1,277 @@
+# chat/metrics.py
+"""
+Prometheus text format এ chat hot paths এর counters/gauges/histograms
+
+settings.CHAT_METRICS_ENABLED False থাকলে সব recording call সাথে সাথে return করে,
+তাই disabled অবস্থায় overhead প্রায় শূন্য। Values per worker process রাখা হয় -
+প্রতিটা worker আলাদাভাবে scrape করতে হবে।
+"""
+import contextlib
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+REGISTRY = []
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def is_enabled():
+    return getattr(settings, 'CHAT_METRICS_ENABLED', False)
+
+
+def is_allowed(request):
+    """
+    Scrape করতে পারে staff users আর CHAT_METRICS_ALLOWED_IPS (Prometheus server, default খালি)।
+    REMOTE_ADDR দেখা হয় - proxy এর পিছনে সেটা proxy এর address, তাই loopback allow করা নিরাপদ না।
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return True
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'CHAT_METRICS_ALLOWED_IPS', ())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return '{' + pairs + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """সব metric type এর base - label values অনুযায়ী আলাদা series রাখে"""
+
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple((name, labels.get(name, '')) for name in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if not is_enabled():
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function  # Scrape এর সময় value হিসাব করার জন্য
+
+    def inc(self, amount=1, **labels):
+        if not is_enabled():
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        if not is_enabled():
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        if self.function is not None:
+            value = self.function()
+            return [] if value is None else [(self.name, (), value)]
+        return super().samples()
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        if not is_enabled():
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def time(self, **labels):
+        """`with histogram.time():` block এর duration observe করে"""
+        if not is_enabled():
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def samples(self):
+        result = []
+        with self._lock:
+            items = [(key, dict(series, buckets=list(series['buckets']))) for key, series in self._values.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['buckets']):
+                cumulative += count
+                result.append((f'{self.name}_bucket', key + (('le', _format_value(bound)),), cumulative))
+            result.append((f'{self.name}_sum', key, series['sum']))
+            result.append((f'{self.name}_count', key, series['count']))
+        return result
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+def _channel_layer_queue_depth():
+    """
+    এই worker এ যত message deliver হওয়ার অপেক্ষায় আছে তার সংখ্যা।
+    InMemoryChannelLayer এর `channels` আর RedisChannelLayer এর local `receive_buffer` দেখে।
+    """
+    from channels.layers import get_channel_layer
+
+    layer = get_channel_layer()
+    depth = None
+    for shard in getattr(layer, 'shards', [layer]):  # ShardedChannelLayer হলে সব shard মিলিয়ে
+        queues = getattr(shard, 'channels', None)
+        if queues is None:
+            queues = getattr(shard, 'receive_buffer', None)
+        if queues is not None:
+            depth = (depth or 0) + sum(queue.qsize() for queue in list(queues.values()))
+    return depth
+
+
+# WebSocket lifecycle
+ws_connects = Counter('chat_ws_connects_total', 'Accepted WebSocket connections')
+ws_rejects = Counter('chat_ws_rejects_total', 'Rejected WebSocket connections', ['reason'])
+ws_disconnects = Counter('chat_ws_disconnects_total', 'WebSocket disconnects')
+ws_active = Gauge('chat_ws_active_sockets', 'Open WebSocket connections in this worker')
+
+# Message flow
+messages_received = Counter('chat_messages_received_total', 'Frames received from clients', ['type'])
+messages_broadcast = Counter('chat_messages_broadcast_total', 'Events sent to a room group', ['type'])
+save_message_seconds = Histogram('chat_save_message_seconds', 'Time spent persisting a message')
+group_send_seconds = Histogram('chat_group_send_seconds', 'Time spent in channel_layer.group_send')
+recipient_send_seconds = Histogram('chat_recipient_send_seconds', 'Time spent sending one event to one socket')
+
+# Large room broadcast mode (chat.fanout)
+broadcast_rooms = Gauge('chat_broadcast_rooms', 'Broadcast mode rooms this worker is subscribed to')
+broadcast_local_deliveries = Counter('chat_broadcast_local_deliveries_total',
+                                     'Events delivered to local sockets by worker fan-out')
+
+# HTTP views
+view_queries = Histogram('chat_view_queries', 'ORM queries executed per request', ['view'], buckets=QUERY_BUCKETS)
+view_seconds = Histogram('chat_view_seconds', 'Request handling time', ['view'])
+
+# Channel layer
+channel_layer_queue_depth = Gauge(
+    'chat_channel_layer_queue_depth',
+    'Messages buffered for this worker in the channel layer',
+    function=_channel_layer_queue_depth,
+)
+
+
+def render():
+    """Registry এর সব metric Prometheus exposition format এ"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    প্রতিটা request এর ORM query count আর duration view name অনুযায়ী record করে।
+    সব database alias গোনা হয় - replica তে route হওয়া reads ও (chat.replicas)।
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_enabled():
+            return self.get_response(request)
+
+        counter = _QueryCounter()
+        started = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(counter))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        view_queries.observe(counter.count, view=view)
+        view_seconds.observe(elapsed, view=view)
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.24 on 2026-10-19 03:21
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_reaction_counts(apps, schema_editor):
+    Message = apps.get_model('chat', 'Message')
+    MessageReaction = apps.get_model('chat', 'MessageReaction')
+
+    counts = {}
+    rows = MessageReaction.objects.values('message_id', 'reaction').annotate(total=Count('id'))
+    for row in rows.iterator():
+        counts.setdefault(row['message_id'], {})[row['reaction']] = row['total']
+
+    for message_id, reaction_counts in counts.items():
+        Message.objects.filter(id=message_id).update(reaction_counts=reaction_counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='reaction_counts',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(populate_reaction_counts, migrations.RunPython.noop),
+    ]
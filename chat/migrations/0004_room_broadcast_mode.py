@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-19 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_message_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='broadcast_mode',
+            field=models.BooleanField(default=False),
+        ),
+    ]
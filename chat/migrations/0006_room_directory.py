@@ -0,0 +1,53 @@
+# Generated by Django 4.2.24 on 2026-10-19 03:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_directory_keys(apps, schema_editor):
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    RoomMembership = apps.get_model('chat', 'RoomMembership')
+    Message = apps.get_model('chat', 'Message')
+
+    active = RoomMembership.objects.filter(room_id=OuterRef('pk'), is_active=True).order_by()
+    counts = active.values('room_id').annotate(total=Count('pk')).values('total')
+    latest = Message.objects.filter(room_id=OuterRef('pk')).exclude(message_type='system').order_by('-timestamp')
+    ChatRoom.objects.update(
+        active_member_count=Coalesce(Subquery(counts), 0),
+        last_message_at=Subquery(latest.values('timestamp')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_pending_notifications'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='active_member_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='is_public',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(fields=['is_public', 'room_type', '-last_message_at'], name='chat_room_dir_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(fields=['is_public', 'room_type', '-active_member_count'], name='chat_room_dir_members_idx'),
+        ),
+        migrations.RunPython(populate_directory_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.24 on 2026-10-19 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0006_room_directory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('collected_until', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.utils.functional import cached_property
 import uuid
 
+from . import replicas
+
 User = get_user_model()
 
 
@@ -26,8 +29,25 @@ class ChatRoom(models.Model):
     description = models.TextField(blank=True, null=True)
     max_members = models.IntegerField(default=100)  # Group size limit
 
+    # এর চেয়ে পুরনো messages archive এ চলে যায় (None হলে CHAT_DEFAULT_RETENTION_DAYS)
+    retention_days = models.PositiveIntegerField(blank=True, null=True)
+
+    # বড় announcement room - worker level fan-out (chat.fanout)। max_members
+    # CHAT_BROADCAST_MIN_MEMBERS বা তার বেশি হলেও broadcast mode চালু থাকে।
+    broadcast_mode = models.BooleanField(default=False)
+
+    # Group directory (chat.directory) - public groups যে কেউ খুঁজে join করতে পারে।
+    # Sort keys message/membership events এ update হয়, directory তে count/scan লাগে না।
+    is_public = models.BooleanField(default=False)
+    active_member_count = models.PositiveIntegerField(default=0)
+    last_message_at = models.DateTimeField(blank=True, null=True)
+
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['is_public', 'room_type', '-last_message_at'], name='chat_room_dir_activity_idx'),
+            models.Index(fields=['is_public', 'room_type', '-active_member_count'], name='chat_room_dir_members_idx'),
+        ]
 
     def __str__(self):
         if self.room_type == 'group':
@@ -43,9 +63,10 @@ class ChatRoom(models.Model):
     def member_count(self):
         return self.members.count()
 
-    @property
+    @cached_property
     def last_message(self):
-        return self.messages.first()  # ordering এর কারণে first = latest
+        # ordering এর কারণে first = latest। List page এ view আগে থেকেই set করে দেয় (home_view)
+        return self.messages.first()
 
 
 class RoomMembership(models.Model):
@@ -92,6 +113,8 @@ class Message(models.Model):
         ('system', 'System Message'),  # যেমন "User joined", "User left" etc
     ]
 
+    DELETED_CONTENT = "This message was deleted"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
@@ -113,8 +136,14 @@ class Message(models.Model):
     # Reply functionality
     reply_to = models.ForeignKey('self', on_delete=models.SET_NULL, blank=True, null=True, related_name='replies')
 
+    # Denormalized reaction summary - {"👍": 3, "❤️": 1}, add_reaction/remove_reaction maintain করে
+    reaction_counts = models.JSONField(default=dict, blank=True)
+
     class Meta:
         ordering = ['-timestamp']  # Latest first
+        indexes = [
+            models.Index(fields=['room', '-timestamp'], name='chat_msg_room_ts_idx'),
+        ]
 
     def __str__(self):
         if self.message_type == 'text':
@@ -127,11 +156,16 @@ class Message(models.Model):
     def is_edited(self):
         return self.edited_at is not None
 
+    @property
+    def reaction_summary(self):
+        """Template এর জন্য [(emoji, count), ...] - reaction table এ query করে না"""
+        return [(emoji, count) for emoji, count in self.reaction_counts.items() if count > 0]
+
     def soft_delete(self):
         """Message delete করার পরিবর্তে hide করবে"""
         self.is_deleted = True
-        self.content = "This message was deleted"
-        self.save()
+        self.content = self.DELETED_CONTENT
+        self.save(update_fields=['is_deleted', 'content'])
 
 
 class MessageReaction(models.Model):
@@ -158,6 +192,38 @@ class MessageReaction(models.Model):
         return f"{self.user.username} {self.reaction} on {self.message.id}"
 
 
+class PendingNotification(models.Model):
+    """
+    Offline member এর জন্য জমে থাকা notifications - user আর room প্রতি একটা row,
+    নতুন message এলে শুধু count বাড়ে। Digest worker (chat.notifications) পড়ে মুছে ফেলে।
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pending_notifications')
+    room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='pending_notifications')
+    message_count = models.PositiveIntegerField(default=0)
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['user', 'room']
+
+    def __str__(self):
+        return f"{self.user.username}: {self.message_count} in {self.room}"
+
+
+class DigestWatermark(models.Model):
+    """
+    Digest worker কোন সময় পর্যন্ত messages collect করেছে - PendingNotification rows এর সাথে
+    একই transaction এ বদলায়, তাই crash করলে দুটোই rollback হয় (count দুইবার বা বাদ পড়ে না)।
+    """
+
+    name = models.CharField(max_length=50, unique=True)
+    collected_until = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.collected_until}"
+
+
 # Helper functions for chat operations
 def get_or_create_private_chat(user1, user2):
     """দুইজন user এর মধ্যে private chat room তৈরি করে বা existing টা return করে"""
@@ -186,14 +252,15 @@ def get_or_create_private_chat(user1, user2):
     return room
 
 
-def create_group_chat(creator, name, description=None, members=None):
+def create_group_chat(creator, name, description=None, members=None, is_public=False):
     """Group chat তৈরি করে"""
 
     room = ChatRoom.objects.create(
         name=name,
         room_type='group',
         description=description,
-        created_by=creator
+        created_by=creator,
+        is_public=is_public
     )
 
     # Add creator as admin
@@ -213,4 +280,162 @@ def create_group_chat(creator, name, description=None, members=None):
         content=f"{creator.username} created the group '{name}'"
     )
 
-    return room
\ No newline at end of file
+    return room
+
+
+def post_message(room_id, sender, message):
+    """
+    নতুন message save করে room এর updated_at bump করে।
+    Room object load করে না - মোট একটা INSERT আর একটা UPDATE।
+    """
+
+    message.room_id = room_id
+    message.sender = sender
+    if message.file and message.message_type == 'text':
+        message.message_type = 'file'
+        message.file_name = message.file.name
+        message.file_size = message.file.size
+    message.save()
+
+    now = timezone.now()
+    ChatRoom.objects.filter(id=room_id).update(updated_at=now, last_message_at=now)
+    replicas.pin()
+
+    return message
+
+
+async def apost_message(room_id, sender, message):
+    """post_message() এর async ORM version"""
+
+    message.room_id = room_id
+    message.sender = sender
+    if message.file and message.message_type == 'text':
+        message.message_type = 'file'
+        message.file_name = message.file.name
+        message.file_size = message.file.size
+    await message.asave()
+
+    now = timezone.now()
+    await ChatRoom.objects.filter(id=room_id).aupdate(updated_at=now, last_message_at=now)
+    await replicas.apin()
+
+    return message
+
+
+def _update_reaction_count(message_id, reaction, delta, change):
+    """
+    Message row lock করে reaction_counts এ delta যোগ করে। change() True return করলে
+    (অর্থাৎ MessageReaction row আসলেই add/delete হলে) তবেই count বদলায়।
+    (changed, counts) return করে - changed False হলে কিছুই লেখা হয়নি।
+    """
+
+    with transaction.atomic():
+        message = Message.objects.select_for_update().only('id', 'reaction_counts').get(id=message_id)
+        counts = dict(message.reaction_counts)
+
+        changed = change()
+        if changed:
+            counts[reaction] = counts.get(reaction, 0) + delta
+            if counts[reaction] <= 0:
+                del counts[reaction]
+            Message.objects.filter(id=message_id).update(reaction_counts=counts)
+    if changed:
+        replicas.pin()
+
+    return changed, counts
+
+
+def add_reaction(message_id, user, reaction):
+    """User এর reaction যোগ করে (created, counts) return করে - আগেই থাকলে created False"""
+
+    def change():
+        _, created = MessageReaction.objects.get_or_create(message_id=message_id, user=user, reaction=reaction)
+        return created
+
+    return _update_reaction_count(message_id, reaction, 1, change)
+
+
+def remove_reaction(message_id, user, reaction):
+    """User এর reaction সরিয়ে (deleted, counts) return করে - না থাকলে deleted False"""
+
+    def change():
+        deleted, _ = MessageReaction.objects.filter(message_id=message_id, user=user, reaction=reaction).delete()
+        return deleted > 0
+
+    return _update_reaction_count(message_id, reaction, -1, change)
+
+
+def get_user_reactions(user, message_ids):
+    """User কোন message এ কী react করেছে - {message_id: {emoji, ...}} একটা query তে"""
+
+    result = {}
+    rows = MessageReaction.objects.filter(user=user, message_id__in=message_ids).values_list('message_id', 'reaction')
+    for message_id, reaction in rows:
+        result.setdefault(message_id, set()).add(reaction)
+    return result
+
+
+def edit_message(room_id, message_id, user, content):
+    """
+    শুধু sender নিজের text message edit করতে পারে। Field-limited UPDATE -
+    message load করে না। Edit হলে edited_at return করে, না হলে None।
+    """
+
+    edited_at = timezone.now()
+    updated = Message.objects.filter(
+        id=message_id, room_id=room_id, sender=user, message_type='text', is_deleted=False
+    ).update(content=content, edited_at=edited_at)
+    if updated:
+        replicas.pin()
+
+    return edited_at if updated else None
+
+
+async def aedit_message(room_id, message_id, user, content):
+    """edit_message() এর async ORM version"""
+
+    edited_at = timezone.now()
+    updated = await Message.objects.filter(
+        id=message_id, room_id=room_id, sender=user, message_type='text', is_deleted=False
+    ).aupdate(content=content, edited_at=edited_at)
+    if updated:
+        await replicas.apin()
+
+    return edited_at if updated else None
+
+
+def delete_message(room_id, message_id, user):
+    """
+    Sender নিজে অথবা room এর admin/moderator message soft delete করতে পারে।
+    Delete হলে True।
+    """
+
+    messages = Message.objects.filter(id=message_id, room_id=room_id, is_deleted=False)
+    changes = {'is_deleted': True, 'content': Message.DELETED_CONTENT}
+
+    deleted = messages.filter(sender=user).update(**changes)
+    if not deleted:
+        is_moderator = RoomMembership.objects.filter(
+            room_id=room_id, user=user, is_active=True, role__in=['admin', 'moderator']
+        ).exists()
+        deleted = is_moderator and messages.update(**changes)
+    if deleted:
+        replicas.pin()
+    return bool(deleted)
+
+
+async def adelete_message(room_id, message_id, user):
+    """delete_message() এর async ORM version"""
+
+    messages = Message.objects.filter(id=message_id, room_id=room_id, is_deleted=False)
+    changes = {'is_deleted': True, 'content': Message.DELETED_CONTENT}
+
+    deleted = await messages.filter(sender=user).aupdate(**changes)
+    if not deleted:
+        is_moderator = await RoomMembership.objects.filter(
+            room_id=room_id, user=user, is_active=True, role__in=['admin', 'moderator']
+        ).aexists()
+        deleted = is_moderator and await messages.aupdate(**changes)
+    if deleted:
+        await replicas.apin()
+    return bool(deleted)
@@ -0,0 +1,284 @@
+# chat/notifications.py
+"""
+Offline members এর জন্য notification digests
+
+Send path এ কোনো কাজ নেই - digest worker (`manage.py send_digests`) প্রতিটা run এ
+DigestWatermark এর পরে আসা messages গোনে (ChatRoom.last_message_at দিয়ে শুধু active
+rooms)। Member যে message দেখেনি সেটাই গোনা হয় - membership এর last_read_at এর পরের, আর
+WebSocket বন্ধ হওয়ার সময় last_read_at এগিয়ে যায়, তাই message আসার সময় যে connected
+ছিল সে পরে disconnect করলেও digest পায় না। Muted members বাদ, আর এখন যারা room এ
+connected তারাও বাদ। PendingNotification row তে (user/room প্রতি একটা) count বাড়ে, watermark
+একই transaction এ এগোয়। তারপর user প্রতি একটা digest ("12 new messages in 3 rooms")
+CHAT_NOTIFICATION_SINK এ যায়।
+
+Presence cache এ room/user counter হিসেবে থাকে (ChatConsumer connect/disconnect এ
+বদলায়)। Web workers আর digest worker আলাদা process, তাই shared cache (CACHE_URL) ছাড়া
+presence দেখা যায় না - LocMemCache এ notifications বন্ধ থাকে। Worker crash করলে counter
+CHAT_PRESENCE_TIMEOUT পর্যন্ত থেকে যায়।
+"""
+import json
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .caching import uses_shared_cache
+from .models import DigestWatermark, Message, PendingNotification, RoomMembership
+
+WATERMARK_NAME = 'notifications'
+
+_warned = False
+
+
+def is_enabled():
+    """CHAT_NOTIFICATIONS_ENABLED আর shared cache দুইটাই লাগে"""
+    global _warned
+    if not getattr(settings, 'CHAT_NOTIFICATIONS_ENABLED', False):
+        return False
+    if not uses_shared_cache():
+        if not _warned:
+            print("[Notifications] CHAT_NOTIFICATIONS_ENABLED needs a shared cache (CACHE_URL) - disabled")
+            _warned = True
+        return False
+    return True
+
+
+def get_presence_timeout():
+    return getattr(settings, 'CHAT_PRESENCE_TIMEOUT', 24 * 60 * 60)
+
+
+def _presence_key(room_id, user_id):
+    return f'chat:presence:{room_id}:{user_id}'
+
+
+async def amark_connected(room_id, user_id):
+    """ChatConsumer.connect থেকে - একই user এর কয়েকটা tab হলে counter বাড়ে"""
+    key = _presence_key(room_id, user_id)
+    if await cache.aadd(key, 1, get_presence_timeout()):
+        return
+    try:
+        await cache.aincr(key)
+        await cache.atouch(key, get_presence_timeout())
+    except ValueError:  # এর মধ্যে expire হয়ে গেছে
+        await cache.aset(key, 1, get_presence_timeout())
+
+
+async def amark_disconnected(room_id, user_id):
+    key = _presence_key(room_id, user_id)
+    try:
+        if await cache.adecr(key) <= 0:
+            await cache.adelete(key)
+    except ValueError:
+        pass
+
+
+def connected_user_ids(room_id, user_ids):
+    """user_ids এর মধ্যে যারা এখন room এ connected"""
+    keys = {_presence_key(room_id, user_id): user_id for user_id in user_ids}
+    return {keys[key] for key, count in cache.get_many(keys).items() if count and count > 0}
+
+
+def mark_seen(room_id, user_id):
+    """Socket বন্ধ হওয়ার সময় - connected থাকা অবস্থায় আসা messages user দেখে ফেলেছে"""
+    return RoomMembership.objects.filter(room_id=room_id, user_id=user_id).update(last_read_at=timezone.now())
+
+
+async def amark_seen(room_id, user_id):
+    return await RoomMembership.objects.filter(room_id=room_id, user_id=user_id).aupdate(last_read_at=timezone.now())
+
+
+def unread_counts(since, until):
+    """
+    since..until এর মধ্যে আসা messages থেকে (room, user) প্রতি না দেখা message count - active,
+    not muted memberships, last_read_at এর পরের, নিজের আর system messages বাদ। একটাই query
+    (home_view এর unread count এর মতো subquery)।
+    """
+    messages = (
+        Message.objects.filter(room_id=OuterRef('room_id'), timestamp__gt=since, timestamp__lte=until)
+        .filter(timestamp__gt=OuterRef('last_read_at'))
+        .exclude(sender_id=OuterRef('user_id')).exclude(message_type='system')
+        .order_by().values('room_id')
+    )
+
+    def aggregate(expression):
+        return Subquery(messages.annotate(value=expression).values('value'))
+
+    return (
+        RoomMembership.objects.filter(is_active=True, is_muted=False, last_read_at__lt=until,
+                                      room__last_message_at__gt=since)
+        .annotate(count=Coalesce(aggregate(Count('pk')), 0),
+                  first_at=aggregate(Min('timestamp')), last_at=aggregate(Max('timestamp')))
+        .filter(count__gt=0)
+        .values('room_id', 'user_id', 'count', 'first_at', 'last_at')
+    )
+
+
+def buffer_counts(rows):
+    """
+    unread_counts এর rows PendingNotification এ যোগ করে - আগের rows এ count বাড়ে (একটা
+    bulk UPDATE), নতুনগুলো একটা bulk INSERT।
+    """
+    if not rows:
+        return 0
+    existing = {
+        (pending.room_id, pending.user_id): pending
+        for pending in PendingNotification.objects.filter(room_id__in={row['room_id'] for row in rows},
+                                                          user_id__in={row['user_id'] for row in rows})
+    }
+    updates, creates = [], []
+    for row in rows:
+        pending = existing.get((row['room_id'], row['user_id']))
+        if pending is None:
+            creates.append(PendingNotification(user_id=row['user_id'], room_id=row['room_id'],
+                                               message_count=row['count'], first_at=row['first_at'],
+                                               last_at=row['last_at']))
+        else:
+            pending.message_count = F('message_count') + row['count']
+            pending.last_at = row['last_at']
+            updates.append(pending)
+    PendingNotification.objects.bulk_update(updates, ['message_count', 'last_at'], batch_size=500)
+    PendingNotification.objects.bulk_create(creates, batch_size=500, ignore_conflicts=True)
+    return len(rows)
+
+
+def get_collect_lag():
+    return getattr(settings, 'CHAT_DIGEST_COLLECT_LAG', 5)
+
+
+def collect_messages(until=None):
+    """
+    Watermark থেকে until পর্যন্ত আসা messages offline recipients এর buffer এ তোলে। Commit
+    হতে দেরি হওয়া messages হারাতে না দিতে until এর default এখন থেকে CHAT_DIGEST_COLLECT_LAG
+    সেকেন্ড আগে। প্রথম run (watermark নেই) শুধু watermark set করে। Watermark row lock থাকে,
+    তাই দুইটা worker একসাথে চললেও একই messages দুইবার গোনা হয় না। Buffered rows return করে।
+    """
+    until = until or timezone.now() - timedelta(seconds=get_collect_lag())
+    with transaction.atomic():
+        watermark, created = DigestWatermark.objects.select_for_update().get_or_create(
+            name=WATERMARK_NAME, defaults={'collected_until': until}
+        )
+        since = watermark.collected_until
+        if created or until <= since:
+            return 0
+
+        rows = list(unread_counts(since, until))
+        # এখন room এ connected users live দেখছে - disconnect এর সময় last_read_at এগোবে
+        user_ids = {}
+        for row in rows:
+            user_ids.setdefault(row['room_id'], set()).add(row['user_id'])
+        connected = {
+            (room_id, user_id)
+            for room_id, members in user_ids.items()
+            for user_id in connected_user_ids(room_id, members)
+        }
+        buffered = buffer_counts([row for row in rows if (row['room_id'], row['user_id']) not in connected])
+
+        watermark.collected_until = until
+        watermark.save(update_fields=['collected_until'])
+    return buffered
+
+
+def build_digest(user, rows):
+    """একজন user এর সব pending rows থেকে একটা digest dict"""
+    rooms = [
+        {
+            'room_id': str(row.room_id),
+            'room': row.room.name or 'Private chat',
+            'messages': row.message_count,
+        }
+        for row in sorted(rows, key=lambda row: row.last_at, reverse=True)
+    ]
+    total = sum(room['messages'] for room in rooms)
+    return {
+        'user_id': user.pk,
+        'username': user.username,
+        'email': user.email,
+        'messages': total,
+        'rooms': rooms,
+        'first_at': min(row.first_at for row in rows).isoformat(),
+        'last_at': max(row.last_at for row in rows).isoformat(),
+        'text': f"{total} new message{'s' if total != 1 else ''} in "
+                f"{len(rooms)} room{'s' if len(rooms) != 1 else ''}",
+    }
+
+
+def get_batch_size():
+    return getattr(settings, 'CHAT_DIGEST_BATCH_SIZE', 500)
+
+
+def send_digests(sink=None, batch_size=None):
+    """
+    নতুন messages collect করে, তারপর pending notifications থেকে user প্রতি digest বানিয়ে
+    sink এ পাঠায় আর rows মুছে দেয়। Sink error দিলে transaction rollback হয় আর পরের run এ আবার চেষ্টা হয় (at-least-once)।
+    পাঠানো digest সংখ্যা return করে।
+    """
+    sink = sink or get_sink()
+    batch_size = batch_size or get_batch_size()
+    sent = 0
+    if is_enabled():
+        collect_messages()
+
+    while True:
+        with transaction.atomic():
+            user_ids = list(
+                PendingNotification.objects.order_by('user_id')
+                .values_list('user_id', flat=True).distinct()[:batch_size]
+            )
+            if not user_ids:
+                break
+            # Lock থাকার সময় অন্য কেউ এই rows বদলাতে পারে না, তাই কোনো count হারায় না
+            rows = list(
+                PendingNotification.objects.select_for_update()
+                .filter(user_id__in=user_ids).select_related('user', 'room')
+            )
+            by_user = {}
+            for row in rows:
+                by_user.setdefault(row.user_id, []).append(row)
+
+            digests = [build_digest(user_rows[0].user, user_rows) for user_rows in by_user.values()]
+            sink.send(digests)
+            PendingNotification.objects.filter(pk__in=[row.pk for row in rows]).delete()
+        sent += len(digests)
+
+    return sent
+
+
+class ConsoleSink:
+    """Development - digests stdout এ লেখে"""
+
+    def __init__(self, stream=None, **kwargs):
+        self.stream = stream or sys.stdout
+
+    def send(self, digests):
+        for digest in digests:
+            rooms = ', '.join(f"{room['room']} ({room['messages']})" for room in digest['rooms'])
+            self.stream.write(f"[Digest] {digest['username']}: {digest['text']} - {rooms}\n")
+        self.stream.flush()
+
+
+class FileSink:
+    """Testing - প্রতিটা digest একটা JSON line হিসেবে file এ append করে"""
+
+    def __init__(self, path=None, **kwargs):
+        self.path = Path(path or getattr(settings, 'CHAT_NOTIFICATION_FILE', settings.BASE_DIR / 'digests.jsonl'))
+
+    def send(self, digests):
+        if not digests:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for digest in digests:
+                f.write(json.dumps(digest, ensure_ascii=False) + '\n')
+
+
+def get_sink():
+    """settings.CHAT_NOTIFICATION_SINK - send(digests) method সহ যেকোনো class (email, push ...)"""
+    backend = getattr(settings, 'CHAT_NOTIFICATION_SINK', 'chat.notifications.ConsoleSink')
+    return import_string(backend)(**getattr(settings, 'CHAT_NOTIFICATION_SINK_OPTIONS', {}))
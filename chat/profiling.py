@@ -0,0 +1,185 @@
+# chat/profiling.py
+"""
+Per-request / per-WebSocket-event SQL profiling আর N+1 detection
+
+Opt-in: settings.CHAT_QUERY_PROFILING True হলে QueryProfilingMiddleware আর
+@profile_event দেওয়া consumer handlers query record করে। একই query shape
+CHAT_N_PLUS_ONE_THRESHOLD বার বা তার বেশি চললে সেটাকে N+1 হিসেবে flag করা হয়।
+"""
+import contextlib
+import contextvars
+import functools
+import logging
+import re
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger('chat.profiling')
+
+_current_recorder = contextvars.ContextVar('chat_query_recorder', default=None)
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def is_enabled():
+    return getattr(settings, 'CHAT_QUERY_PROFILING', False)
+
+
+def get_threshold():
+    return getattr(settings, 'CHAT_N_PLUS_ONE_THRESHOLD', 5)
+
+
+def query_shape(sql):
+    """Params বাদ দিয়ে query এর structure - IN (%s, %s, ...) কে এক রকম ধরে"""
+    sql = _WHITESPACE_RE.sub(' ', sql).strip()
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """একটা request বা event এর সময় চলা সব query জমা রাখে"""
+
+    def __init__(self, label='', parent=None):
+        self.label = label
+        self.parent = parent  # Nested recording হলে বাইরের recorder ও query পায়
+        self.queries = []  # (sql, duration)
+
+    def add(self, sql, duration):
+        recorder = self
+        while recorder is not None:
+            recorder.queries.append((sql, duration))
+            recorder = recorder.parent
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def shapes(self):
+        """Query shape অনুযায়ী group - সবচেয়ে বেশি repeat হওয়া আগে"""
+        groups = {}
+        for sql, duration in self.queries:
+            shape = query_shape(sql)
+            group = groups.setdefault(shape, {'sql': shape, 'count': 0, 'time': 0.0})
+            group['count'] += 1
+            group['time'] += duration
+        return sorted(groups.values(), key=lambda g: g['count'], reverse=True)
+
+    def repeated(self, threshold=None):
+        threshold = threshold or get_threshold()
+        return [group for group in self.shapes() if group['count'] >= threshold]
+
+    def summary(self, threshold=None):
+        """Header / log line এর জন্য compact text"""
+        return 'queries={} time={:.1f}ms repeated={}'.format(
+            len(self), self.total_time * 1000, len(self.repeated(threshold))
+        )
+
+    def report(self, threshold=None):
+        lines = [f'{self.label}: {self.summary(threshold)}']
+        for group in self.repeated(threshold):
+            lines.append('  {}x ({:.1f}ms) {}'.format(group['count'], group['time'] * 1000, group['sql'][:300]))
+        return '\n'.join(lines)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper - সব connection এ install করা থাকে কিন্তু কোনো recorder
+    active না থাকলে শুধু একটা contextvar lookup করে।
+    """
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.add(sql, time.perf_counter() - started)
+
+
+def install_wrapper(sender, connection, **kwargs):
+    """connection_created signal handler"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextlib.contextmanager
+def recording(label=''):
+    """
+    Block এর ভিতরে চলা সব query record করে। contextvar ব্যবহার করে, তাই
+    database_sync_to_async এর thread এ চলা query গুলোও ধরা পড়ে।
+    """
+    recorder = QueryRecorder(label, parent=_current_recorder.get())
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+
+def log_report(recorder):
+    threshold = get_threshold()
+    if recorder.repeated(threshold):
+        logger.warning('Possible N+1 in %s', recorder.report(threshold))
+    else:
+        logger.debug('%s: %s', recorder.label, recorder.summary(threshold))
+
+
+class QueryProfilingMiddleware:
+    """Request প্রতি SQL record করে X-Query-Profile header দেয়, N+1 পেলে warning log করে"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_enabled():
+            return self.get_response(request)
+
+        with recording(f'{request.method} {request.path}') as recorder:
+            response = self.get_response(request)
+
+        response['X-Query-Profile'] = recorder.summary()
+        log_report(recorder)
+        return response
+
+
+def profile_event(handler):
+    """
+    Consumer এর async handler (connect, receive ...) এর জন্য decorator।
+    প্রতিটা WebSocket event এর query আলাদা report হিসেবে log হয়।
+    """
+
+    @functools.wraps(handler)
+    async def wrapper(self, *args, **kwargs):
+        if not is_enabled():
+            return await handler(self, *args, **kwargs)
+
+        with recording(f'ws {type(self).__name__}.{handler.__name__}') as recorder:
+            result = await handler(self, *args, **kwargs)
+        log_report(recorder)
+        return result
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def assert_no_n_plus_one(threshold=None, max_queries=None):
+    """
+    Test helper - block এ N+1 pattern বা max_queries এর বেশি query হলে AssertionError।
+
+        with assert_no_n_plus_one(max_queries=10):
+            self.client.get(reverse('chat:home'))
+    """
+    with recording('assert_no_n_plus_one') as recorder:
+        yield recorder
+
+    threshold = threshold or get_threshold()
+    if recorder.repeated(threshold):
+        raise AssertionError('N+1 query pattern detected\n' + recorder.report(threshold))
+    if max_queries is not None and len(recorder) > max_queries:
+        raise AssertionError(f'{len(recorder)} queries executed, expected at most {max_queries}\n'
+                             + recorder.report(threshold))
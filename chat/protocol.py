@@ -0,0 +1,133 @@
+# chat/protocol.py
+"""
+WebSocket wire formats - JSON (default) আর negotiated MessagePack subprotocol
+
+Client `new WebSocket(url, ['chat.msgpack.v1'])` দিলে আর server এ msgpack install করা
+থাকলে frames binary MessagePack এ যায়:
+
+    - dict keys KEYS এর index (ছোট int) হয়ে যায়
+    - 'type' এর value TYPES এর index হয়
+    - UUID fields (UUID_KEYS) 36 char string এর বদলে 16 bytes
+
+Subprotocol না চাইলে আগের মতো JSON text frames। Key/type table client এ
+client_config() দিয়ে যায়, তাই দুই দিক সবসময় একই table ব্যবহার করে - table এ
+শুধু শেষে নতুন entry যোগ করতে হবে, না হলে subprotocol version বদলাতে হবে।
+"""
+import json
+import uuid
+
+from django.conf import settings
+
+try:
+    import msgpack
+except ImportError:  # Optional - না থাকলে শুধু JSON
+    msgpack = None
+
+MSGPACK_SUBPROTOCOL = 'chat.msgpack.v1'
+
+KEYS = (
+    'type', 'message', 'id', 'content', 'sender', 'timestamp', 'message_type', 'reply_to',
+    'message_id', 'counts', 'user', 'reaction', 'action', 'edited_at', 'is_deleted', 'is_typing',
+)
+TYPES = (
+    'message', 'connection', 'message_update', 'reaction', 'chat_message', 'edit', 'delete',
+    'typing', 'user_status',
+)
+UUID_KEYS = frozenset({'id', 'message_id', 'reply_to'})
+
+KEY_CODES = {key: code for code, key in enumerate(KEYS)}
+TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+
+
+def compact(value, key=None):
+    """Frame কে short keys / binary UUID এ বদলায়"""
+    if isinstance(value, dict):
+        return {KEY_CODES.get(k, k): compact(v, k) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [compact(v) for v in value]
+    if key == 'type' and value in TYPE_CODES:
+        return TYPE_CODES[value]
+    if key in UUID_KEYS and isinstance(value, str):
+        try:
+            return uuid.UUID(value).bytes
+        except ValueError:
+            return value
+    return value
+
+
+def expand(value, key=None):
+    """compact() এর উল্টো - client এর frame decode করতে"""
+    if isinstance(value, dict):
+        result = {}
+        for k, v in value.items():
+            name = KEYS[k] if isinstance(k, int) and 0 <= k < len(KEYS) else k
+            result[name] = expand(v, name)
+        return result
+    if isinstance(value, list):
+        return [expand(v) for v in value]
+    if key == 'type' and isinstance(value, int) and 0 <= value < len(TYPES):
+        return TYPES[value]
+    if key in UUID_KEYS and isinstance(value, bytes) and len(value) == 16:
+        return str(uuid.UUID(bytes=value))
+    return value
+
+
+class JSONCodec:
+    name = 'json'
+    subprotocol = None
+
+    def encode(self, frame):
+        """AsyncWebsocketConsumer.send() এর kwargs"""
+        return {'text_data': json.dumps(frame)}
+
+    def decode(self, text_data=None, bytes_data=None):
+        return json.loads(text_data if text_data is not None else bytes_data)
+
+
+class MsgPackCodec:
+    name = 'msgpack'
+    subprotocol = MSGPACK_SUBPROTOCOL
+
+    def encode(self, frame):
+        return {'bytes_data': msgpack.packb(compact(frame), use_bin_type=True)}
+
+    def decode(self, text_data=None, bytes_data=None):
+        if bytes_data is None:
+            # Binary protocol এও কেউ text frame পাঠালে JSON হিসেবে পড়ি
+            return json.loads(text_data)
+        data = msgpack.unpackb(bytes_data, raw=False, strict_map_key=False)
+        if not isinstance(data, dict):
+            raise ValueError('Frame must be a map')
+        return expand(data)
+
+
+JSON = JSONCodec()
+MSGPACK = MsgPackCodec()
+
+
+def enabled_codecs():
+    """settings.CHAT_WIRE_PROTOCOLS অনুযায়ী available binary codecs (পছন্দের ক্রমে)"""
+    codecs = []
+    for name in getattr(settings, 'CHAT_WIRE_PROTOCOLS', ('msgpack',)):
+        if name == 'msgpack' and msgpack is not None:
+            codecs.append(MSGPACK)
+    return codecs
+
+
+def negotiate(subprotocols):
+    """Client এর offered subprotocols থেকে codec বেছে নেয় - না মিললে JSON"""
+    for codec in enabled_codecs():
+        if codec.subprotocol in subprotocols:
+            return codec
+    return JSON
+
+
+def client_config():
+    """room.html এর জন্য - subprotocol আর key/type tables"""
+    codecs = enabled_codecs()
+    return {
+        'subprotocol': codecs[0].subprotocol if codecs else None,
+        'keys': KEYS,
+        'types': TYPES,
+        'uuid_keys': sorted(UUID_KEYS),
+    }
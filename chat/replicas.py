@@ -0,0 +1,154 @@
+# chat/replicas.py
+"""
+Read replica routing - chat আর accounts এর read queries replica তে যায়, writes primary তে
+
+Read-your-writes: কোনো user message লিখলে (post, edit, delete, reaction - chat.models
+pin() call করে) পরের CHAT_REPLICA_STICKY_SECONDS সেকেন্ড তার সব read primary থেকে হয়, যাতে
+replication lag এর জন্য নিজের পাঠানো message হারিয়ে না যায়। last_read_at, presence বা
+session এর মতো বাকি writes pin করে না - না হলে প্রায় সব read primary তে চলে যেত।
+Sticky deadline cache এ রাখা হয় (CACHE_URL দিলে সব worker এ shared), আর request /
+WebSocket connection এর state একটা contextvar এ থাকে, যা database_sync_to_async এর
+thread এও copy হয়।
+
+DATABASES এ REPLICA_ALIAS না থাকলে router কিছুই করে না।
+"""
+import contextvars
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+PRIMARY_ALIAS = 'default'
+REPLICA_ALIAS = 'replica'
+
+_current_state = contextvars.ContextVar('chat_replica_state', default=None)
+
+
+def replica_enabled():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'CHAT_REPLICA_STICKY_SECONDS', 5)
+
+
+def sticky_key(user_id):
+    return f'chat:replica:sticky:{user_id}'
+
+
+class RoutingState:
+    """একটা request বা WebSocket connection এর routing state"""
+
+    def __init__(self, user_id=None, pinned_until=0.0, primary=False):
+        self.user_id = user_id
+        self.pinned_until = pinned_until
+        self.primary = primary  # শুধু এই request এর reads primary তে (non-GET)
+
+    def is_pinned(self):
+        return self.primary or time.time() < self.pinned_until
+
+    def _extend(self):
+        """Sticky window বাড়ায় - cache এ লিখতে হলে seconds, না হলে None"""
+        seconds = get_sticky_seconds()
+        now = time.time()
+        # একই request এ অনেকগুলো write হলে প্রতিবার cache এ লিখি না
+        if self.pinned_until - now > seconds / 2:
+            return None
+        self.pinned_until = now + seconds
+        return seconds if self.user_id is not None else None
+
+    def pin(self):
+        """এখন থেকে sticky window শেষ হওয়া পর্যন্ত reads primary তে"""
+        seconds = self._extend()
+        if seconds is not None:
+            cache.set(sticky_key(self.user_id), self.pinned_until, seconds)
+
+    async def apin(self):
+        seconds = self._extend()
+        if seconds is not None:
+            await cache.aset(sticky_key(self.user_id), self.pinned_until, seconds)
+
+
+def begin(user_id=None, pinned=False, primary=False):
+    """
+    নতুন routing state চালু করে (token return করে, end() এ দিতে হবে)।
+    User এর আগের write এর sticky deadline cache থেকে নেয়। primary=True হলে এই state এর
+    সব reads primary তে, কিন্তু পরের requests এ কোনো প্রভাব নেই।
+    """
+    pinned_until = cache.get(sticky_key(user_id), 0.0) if user_id is not None else 0.0
+    state = RoutingState(user_id, pinned_until, primary)
+    if pinned:
+        state.pin()
+    return _current_state.set(state)
+
+
+def end(token):
+    _current_state.reset(token)
+
+
+def pin():
+    """Message mutation এর পর - current user এর reads sticky window জুড়ে primary তে"""
+    state = _current_state.get()
+    if state is not None:
+        state.pin()
+
+
+async def apin():
+    state = _current_state.get()
+    if state is not None:
+        await state.apin()
+
+
+class ReplicaRouter:
+    """settings.DATABASE_ROUTERS এ দেওয়া থাকে"""
+
+    def db_for_read(self, model, **hints):
+        if not replica_enabled() or model._meta.app_label not in getattr(settings, 'CHAT_REPLICA_APPS', ()):
+            return None
+        # Transaction এর ভিতরের reads সবসময় primary তে - না হলে নিজের uncommitted write দেখা যায় না
+        if connections[PRIMARY_ALIAS].in_atomic_block:
+            return PRIMARY_ALIAS
+        state = _current_state.get()
+        if state is not None and state.is_pinned():
+            return PRIMARY_ALIAS
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if not replica_enabled():
+            return None
+        return PRIMARY_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY_ALIAS, REPLICA_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replica schema replication থেকেই আসে
+        if db == REPLICA_ALIAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Request এর জন্য routing state - AuthenticationMiddleware এর পরে থাকতে হবে।
+    GET/HEAD ছাড়া অন্য requests পুরোটা primary তে চলে, তবে sticky হয় না।
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_enabled():
+            return self.get_response(request)
+
+        user = getattr(request, 'user', None)
+        user_id = user.pk if user is not None and user.is_authenticated else None
+        token = begin(user_id, primary=request.method not in ('GET', 'HEAD', 'OPTIONS'))
+        try:
+            return self.get_response(request)
+        finally:
+            end(token)
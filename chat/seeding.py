@@ -0,0 +1,306 @@
+# chat/seeding.py
+"""
+বড় synthetic dataset তৈরি আর JSONL import - `manage.py seed_chat` এটা use করে
+
+create_group_chat / Message.objects.create এর বদলে users, rooms আর memberships
+batched bulk_create এ, আর messages/reactions (সংখ্যায় সবচেয়ে বেশি) সরাসরি
+executemany দিয়ে - প্রতিটা batch একটা transaction এ। Messages room ধরে stream
+হয়, তাই memory batch size এর উপর নির্ভর করে, মোট message সংখ্যার উপর না।
+"""
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ChatRoom, RoomMembership, Message, MessageReaction
+
+User = get_user_model()
+
+DISTRIBUTIONS = ('uniform', 'zipf', 'fixed')
+REACTIONS = [emoji for emoji, _ in MessageReaction.REACTION_TYPES]
+
+
+# এই types এর Python value সরাসরি DB তে যায়, বাকিগুলো field.get_db_prep_save দিয়ে convert হয়
+PASSTHROUGH_TYPES = {
+    'CharField', 'TextField', 'BooleanField', 'IntegerField', 'BigIntegerField',
+    'PositiveIntegerField', 'AutoField', 'BigAutoField',
+}
+
+MESSAGE_COLUMNS = ('id', 'room', 'sender', 'message_type', 'content', 'timestamp', 'is_deleted', 'reaction_counts')
+IMPORT_COLUMNS = MESSAGE_COLUMNS + ('edited_at', 'reply_to', 'file', 'file_name', 'file_size')
+REACTION_COLUMNS = ('message', 'user', 'reaction', 'created_at')
+
+
+class RawInserter:
+    """
+    Model.objects.bulk_create এর ORM SQL compile খরচ ছাড়া executemany দিয়ে insert।
+    Signals, auto_now_add বা defaults কিছুই চলে না - সব column এর value দিতে হয়।
+    """
+
+    def __init__(self, model, field_names):
+        fields = [model._meta.get_field(name) for name in field_names]
+        quote = connection.ops.quote_name
+        self.sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        self.converters = [None if self._is_passthrough(field) else field.get_db_prep_save for field in fields]
+
+    @staticmethod
+    def _is_passthrough(field):
+        target = field.target_field if field.is_relation else field
+        return target.get_internal_type() in PASSTHROUGH_TYPES
+
+    def insert(self, rows):
+        converters = self.converters
+        prepared = [
+            tuple(value if convert is None or value is None else convert(value, connection)
+                  for convert, value in zip(converters, row))
+            for row in rows
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(self.sql, prepared)
+
+
+def room_sizes(rooms, distribution, min_size, max_size, rng):
+    """প্রতিটা room এর member সংখ্যা"""
+    sizes = []
+    for _ in range(rooms):
+        if distribution == 'fixed':
+            size = min_size
+        elif distribution == 'zipf':
+            # অনেক ছোট room, অল্প কয়েকটা বিশাল room
+            size = int(min_size * rng.paretovariate(1.2))
+        else:
+            size = rng.randint(min_size, max_size)
+        sizes.append(max(min_size, min(size, max_size)))
+    return sizes
+
+
+def message_counts(total, rooms, distribution, rng):
+    """মোট messages room গুলোর মধ্যে ভাগ করে - zipf হলে কয়েকটা room খুব active"""
+    if rooms < 1:
+        return []
+    if distribution == 'zipf':
+        weights = [1.0 / (i + 1) for i in range(rooms)]
+        rng.shuffle(weights)
+    else:
+        weights = [1.0] * rooms
+
+    scale = total / sum(weights)
+    counts = [int(w * scale) for w in weights]
+    for i in range(total - sum(counts)):
+        counts[i % rooms] += 1
+    return counts
+
+
+class Seeder:
+    def __init__(self, batch_size=5000, seed=None, log=None):
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.log = log or (lambda text: None)
+        self.created = {'users': 0, 'rooms': 0, 'memberships': 0, 'messages': 0, 'reactions': 0}
+        # Import এ যা রাখা যায়নি - field প্রতি message সংখ্যা
+        self.dropped = {'reaction_counts': 0, 'reply_to': 0, 'file': 0}
+        self.started = time.perf_counter()
+        self.message_inserter = None
+        self.reaction_inserter = None
+
+    def _progress(self, label):
+        elapsed = time.perf_counter() - self.started
+        self.log(f"{label}: {self.created['messages']} messages, {self.created['reactions']} reactions "
+                 f"({self.created['messages'] / elapsed if elapsed else 0:.0f} msg/s)")
+
+    def _bulk_create(self, model, objects, key):
+        with transaction.atomic():
+            model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.created[key] += len(objects)
+
+    def create_users(self, count, prefix):
+        password = make_password('seed-password')
+        user_ids = []
+        for start in range(0, count, self.batch_size):
+            batch = [
+                User(username=f'{prefix}{i}', password=password, first_name='Seed', last_name=str(i))
+                for i in range(start, min(start + self.batch_size, count))
+            ]
+            self._bulk_create(User, batch, 'users')
+        user_ids.extend(User.objects.filter(username__startswith=prefix).values_list('id', flat=True))
+        return user_ids
+
+    def create_rooms(self, user_ids, sizes, private_ratio=0.0, prefix='seed'):
+        """Rooms আর memberships তৈরি করে - [(room_id, [member_ids]), ...]"""
+        rooms = []
+        room_objects = []
+        memberships = []
+
+        for index, size in enumerate(sizes):
+            is_private = self.rng.random() < private_ratio
+            members = self.rng.sample(user_ids, 2 if is_private else min(size, len(user_ids)))
+            room = ChatRoom(
+                id=uuid.uuid4(),
+                name=None if is_private else f'{prefix} group {index}',
+                room_type='private' if is_private else 'group',
+                created_by_id=members[0],
+                max_members=max(100, len(members)),
+            )
+            room_objects.append(room)
+            rooms.append((room.id, members))
+            memberships.extend(
+                RoomMembership(room_id=room.id, user_id=user_id, role='admin' if i == 0 else 'member')
+                for i, user_id in enumerate(members)
+            )
+
+            if len(memberships) >= self.batch_size:
+                self._flush_rooms(room_objects, memberships)
+                room_objects, memberships = [], []
+
+        self._flush_rooms(room_objects, memberships)
+        return rooms
+
+    def _flush_rooms(self, room_objects, memberships):
+        with transaction.atomic():
+            ChatRoom.objects.bulk_create(room_objects, batch_size=self.batch_size)
+            RoomMembership.objects.bulk_create(memberships, batch_size=self.batch_size)
+        self.created['rooms'] += len(room_objects)
+        self.created['memberships'] += len(memberships)
+
+    def create_messages(self, rooms, counts, span_days=30, reaction_ratio=0.05):
+        """প্রতিটা room এর messages span_days জুড়ে ছড়িয়ে batch এ insert করে"""
+        end = timezone.now()
+        start = end - timedelta(days=span_days)
+        rng = self.rng
+        messages, reactions = [], []
+
+        for (room_id, members), count in zip(rooms, counts):
+            if not count:
+                continue
+            step = (end - start) / count
+            for i in range(count):
+                message_id = uuid.uuid4()
+                timestamp = start + step * (i + rng.random())
+                reaction_counts = {}
+                if rng.random() < reaction_ratio:
+                    reactions.extend(self._reactions_for(message_id, members, timestamp, reaction_counts))
+                messages.append((message_id, room_id, rng.choice(members), 'text', f'Seed message {i}',
+                                 timestamp, False, reaction_counts))
+
+                if len(messages) >= self.batch_size:
+                    self._flush_messages(messages, reactions)
+                    messages, reactions = [], []
+
+        self._flush_messages(messages, reactions)
+
+    def _reactions_for(self, message_id, members, timestamp, reaction_counts):
+        """কয়েকজন member এর reaction - denormalized reaction_counts ও একসাথে set করে"""
+        reactors = self.rng.sample(members, self.rng.randint(1, min(len(members), 5)))
+        reactions = []
+        for user_id in reactors:
+            emoji = self.rng.choice(REACTIONS)
+            reactions.append((message_id, user_id, emoji, timestamp))
+            reaction_counts[emoji] = reaction_counts.get(emoji, 0) + 1
+        return reactions
+
+    def _flush_messages(self, messages, reactions, inserter=None):
+        if not messages:
+            return
+        if self.message_inserter is None:
+            self.message_inserter = RawInserter(Message, MESSAGE_COLUMNS)
+            self.reaction_inserter = RawInserter(MessageReaction, REACTION_COLUMNS)
+
+        with transaction.atomic():
+            (inserter or self.message_inserter).insert(messages)
+            if reactions:
+                self.reaction_inserter.insert(reactions)
+        self.created['messages'] += len(messages)
+        self.created['reactions'] += len(reactions)
+        self._progress('Seeding')
+
+    def import_jsonl(self, lines, room_name, creator):
+        """
+        Export (chat.export) এর JSONL একটা নতুন group room এ import করে। Messages নতুন id
+        পায়, reply_to export এর id থেকে নতুন id তে remap হয় (parent আগে থাকতে হয় - export
+        পুরনো থেকে নতুন ক্রমে লেখে)। edited_at আর file reference (storage path, file_name,
+        file_size) থাকে। অচেনা sender থাকলে unusable password দিয়ে user তৈরি হয়।
+
+        যা রাখা যায় না তা self.dropped এ গোনা হয়: কে react করেছে export এ থাকে না, তাই
+        MessageReaction rows বানানো যায় না - reaction_counts বাদ, না হলে denormalized counts
+        source table এর সাথে মিলবে না। Zip export এর attachments/ paths storage এ নেই, তাই
+        শুধু file_name/file_size থাকে। File এ নেই এমন parent এর reply_to বাদ।
+        """
+        users = {creator.username: creator.id}
+        password = make_password(None)
+        inserter = RawInserter(Message, IMPORT_COLUMNS)
+        new_ids = {}  # export id -> নতুন id
+
+        def user_id_for(username):
+            if username not in users:
+                user, _ = User.objects.get_or_create(username=username, defaults={'password': password})
+                users[username] = user.id
+            return users[username]
+
+        room = ChatRoom.objects.create(name=room_name, room_type='group', created_by=creator)
+        messages = []
+
+        for line in lines:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            message_id = new_ids[record['id']] = uuid.uuid4()
+
+            if record.get('reaction_counts'):
+                self.dropped['reaction_counts'] += 1
+            reply_to = None
+            if record.get('reply_to_id'):
+                reply_to = new_ids.get(record['reply_to_id'])
+                if reply_to is None:
+                    self.dropped['reply_to'] += 1
+            file = record.get('file')
+            if file and file.startswith('attachments/'):
+                self.dropped['file'] += 1
+                file = None
+
+            messages.append((
+                message_id,
+                room.id,
+                user_id_for(record['sender']),
+                record.get('message_type', 'text'),
+                record.get('content'),
+                _parse_datetime(record['datetime']),
+                record.get('is_deleted', False),
+                {},
+                _parse_datetime(record['edited_at']) if record.get('edited_at') else None,
+                reply_to,
+                file or '',
+                record.get('file_name'),
+                record.get('file_size'),
+            ))
+            if len(messages) >= self.batch_size:
+                self._flush_messages(messages, [], inserter)
+                messages = []
+        self._flush_messages(messages, [], inserter)
+
+        RoomMembership.objects.bulk_create(
+            [RoomMembership(room_id=room.id, user_id=user_id, role='admin' if user_id == creator.id else 'member')
+             for user_id in users.values()],
+            batch_size=self.batch_size,
+        )
+        self.created['rooms'] += 1
+        self.created['memberships'] += len(users)
+        return room
+
+
+def _parse_datetime(value):
+    """Export এর ISO datetime, DB যেভাবে রাখে সেভাবে (USE_TZ অনুযায়ী naive বা aware)"""
+    value = datetime.fromisoformat(value)
+    if settings.USE_TZ:
+        return timezone.make_aware(value) if timezone.is_naive(value) else value
+    return timezone.make_naive(value) if timezone.is_aware(value) else value
@@ -0,0 +1,123 @@
+# chat/signals.py
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from . import directory
+from .auth import invalidate_user_cache
+from .caching import bump_membership_version, invalidate_room_broadcast
+from .models import ChatRoom, RoomMembership
+
+User = get_user_model()
+
+
+# এই fields বদলালে member list এ কিছু বদলায় না (যেমন mark as read)
+MEMBERSHIP_CACHE_NEUTRAL_FIELDS = {'last_read_at', 'is_muted'}
+
+# Room header / member list আর users directory তে user এর যা দেখা যায়
+USER_DISPLAY_FIELDS = ('username', 'first_name', 'last_name', 'is_online')
+
+# Rooms directory তে room এর যা দেখা যায় (is_active - list এ থাকবে কিনা)
+ROOM_DIRECTORY_FIELDS = ('name', 'description', 'is_public', 'max_members', 'is_active')
+
+
+def _is_listed(room_type, is_public):
+    return room_type == 'group' and bool(is_public)
+
+
+@receiver(post_init, sender=RoomMembership)
+def remember_membership_state(sender, instance, **kwargs):
+    instance._chat_is_active = instance.__dict__.get('is_active')
+
+
+@receiver([post_save, post_delete], sender=RoomMembership)
+def membership_changed(sender, instance, signal, created=False, update_fields=None, **kwargs):
+    """
+    Join, leave আর role change - room এর member list cache invalid করে। Active member count
+    শুধু join/leave এ বদলায়, আর directory তে শুধু public groups থাকে।
+    """
+    if update_fields and set(update_fields) <= MEMBERSHIP_CACHE_NEUTRAL_FIELDS:
+        return
+    bump_membership_version(instance.room_id)
+
+    joined_or_left = created or signal is post_delete or instance.is_active != instance._chat_is_active
+    instance._chat_is_active = instance.is_active
+    if not joined_or_left:
+        return
+    # Directory এর member count sort key
+    directory.refresh_room_stats(instance.room_id)
+    if directory.public_rooms().filter(pk=instance.room_id).exists():
+        directory.bump_directory_version('rooms')
+
+
+def _room_listing(room):
+    # __dict__ থেকে - deferred field পড়তে গিয়ে query হবে না
+    return {field: room.__dict__.get(field) for field in ROOM_DIRECTORY_FIELDS}
+
+
+@receiver(post_init, sender=ChatRoom)
+def remember_room_listing(sender, instance, **kwargs):
+    instance._chat_listing = _room_listing(instance)
+
+
+@receiver(post_save, sender=ChatRoom)
+def room_changed(sender, instance, created, **kwargs):
+    """
+    broadcast_mode বা max_members বদলালে নতুন connections নতুন mode পায়। Rename বা
+    description edit এ room header fragment ও পুরনো - তাই room এর version ও bump।
+    Rooms directory শুধু public group এর দেখানো fields বদলালে (আগে বা এখন public হলে)।
+    """
+    if not created:
+        invalidate_room_broadcast(instance.pk)
+        bump_membership_version(instance.pk)
+
+    listing, previous = _room_listing(instance), getattr(instance, '_chat_listing', None)
+    instance._chat_listing = listing
+    if not created and listing == previous:
+        return
+    was_listed = previous is not None and not created and _is_listed(instance.room_type, previous['is_public'])
+    if was_listed or _is_listed(instance.room_type, instance.is_public):
+        directory.bump_directory_version('rooms')
+
+
+def _display_values(user):
+    # __dict__ থেকে - deferred field পড়তে গিয়ে query হবে না
+    return tuple(user.__dict__.get(field) for field in USER_DISPLAY_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_user_display(sender, instance, **kwargs):
+    """Load হওয়ার সময়ের display values - save এ কী বদলেছে বুঝতে"""
+    instance._chat_display = _display_values(instance)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Password change বা deactivate এর পর WebSocket auth cache এর user আর ব্যবহার করা যাবে না,
+    তাই সেটা প্রতিটা save এ মোছে (একটা cache delete)। Room headers আর users directory শুধু
+    display fields (presence, নাম) আসলেই বদলালে - login এর last_login বা last_seen এ না।
+    """
+    display = _display_values(instance)
+    changed = created or display != getattr(instance, '_chat_display', None)
+    if update_fields and not set(update_fields) & set(USER_DISPLAY_FIELDS):
+        changed = False
+    instance._chat_display = display
+
+    if not created:
+        invalidate_user_cache(instance.pk)
+    if not changed:
+        return
+    directory.bump_directory_version('users')
+    if created:
+        return
+    room_ids = RoomMembership.objects.filter(user=instance, is_active=True).values_list('room_id', flat=True)
+    bump_membership_version(*room_ids)
+
+
+@receiver(user_logged_out)
+def user_logged_out_handler(sender, request, user, **kwargs):
+    """Logout এর পর পরের WebSocket handshake user কে আবার database থেকে load করবে"""
+    if user is not None:
+        invalidate_user_cache(user.pk)
@@ -0,0 +1,46 @@
+// chat/static/chat/js/chat.js
+// সব chat page এর shared code - hashed, long-cache static bundle
+
+// User search functionality
+document.addEventListener('DOMContentLoaded', function() {
+    const search = document.getElementById('userSearch');
+    if (!search) {
+        return;
+    }
+
+    search.addEventListener('input', function() {
+        const query = this.value;
+        const results = document.getElementById('userResults');
+        if (query.length < 2) {
+            results.innerHTML = '';
+            return;
+        }
+
+        fetch(`${this.dataset.searchUrl}?q=${encodeURIComponent(query)}`)
+            .then(response => response.json())
+            .then(data => {
+                results.innerHTML = '';
+
+                data.users.forEach(user => {
+                    const userDiv = document.createElement('div');
+                    userDiv.className = 'list-group-item list-group-item-action';
+                    userDiv.innerHTML = `
+                        <div class="d-flex justify-content-between align-items-center">
+                            <div>
+                                <strong class="user-name"></strong>
+                                <br><small class="text-muted user-handle"></small>
+                            </div>
+                            <div>
+                                ${user.is_online ? '<span class="badge bg-success">Online</span>' : '<span class="badge bg-secondary">Offline</span>'}
+                                <a class="btn btn-sm btn-primary ms-2">Chat</a>
+                            </div>
+                        </div>
+                    `;
+                    userDiv.querySelector('.user-name').textContent = user.name;
+                    userDiv.querySelector('.user-handle').textContent = `@${user.username}`;
+                    userDiv.querySelector('a').href = this.dataset.chatUrl.replace('/0/', `/${user.id}/`);
+                    results.appendChild(userDiv);
+                });
+            });
+    });
+});
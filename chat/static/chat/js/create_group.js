@@ -0,0 +1,52 @@
+// chat/static/chat/js/create_group.js
+// Member picker এর পরের directory pages - আগের selections থেকে যায়
+document.addEventListener('DOMContentLoaded', function() {
+    const loadMoreButton = document.getElementById('loadMoreMembers');
+    if (!loadMoreButton) {
+        return;
+    }
+
+    const currentUserId = Number(loadMoreButton.dataset.currentUser);
+    const selected = new Set(JSON.parse(document.getElementById('selectedMembers').textContent));
+
+    loadMoreButton.addEventListener('click', function() {
+        fetch(`${this.dataset.directoryUrl}?sort=name&page=${this.dataset.nextPage}`)
+            .then(response => response.json())
+            .then(page => {
+                const list = document.getElementById('memberList');
+                page.items.forEach(person => {
+                    if (person.id === currentUserId || document.getElementById(`id_members_${person.id}`)) {
+                        return;
+                    }
+                    const item = document.createElement('div');
+                    item.className = 'form-check';
+
+                    const input = document.createElement('input');
+                    input.type = 'checkbox';
+                    input.name = 'members';
+                    input.value = person.id;
+                    input.className = 'form-check-input';
+                    input.id = `id_members_${person.id}`;
+                    input.checked = selected.has(String(person.id));
+
+                    const label = document.createElement('label');
+                    label.className = 'form-check-label';
+                    label.htmlFor = input.id;
+                    label.textContent = `${person.first_name || person.username} `;
+                    const handle = document.createElement('small');
+                    handle.className = 'text-muted';
+                    handle.textContent = `(@${person.username})`;
+                    label.appendChild(handle);
+
+                    item.append(input, label);
+                    list.appendChild(item);
+                });
+
+                if (page.has_next) {
+                    this.dataset.nextPage = page.number + 1;
+                } else {
+                    this.remove();
+                }
+            });
+    });
+});
@@ -0,0 +1,581 @@
+// chat/static/chat/js/room.js
+// Auto-scroll to bottom
+function scrollToBottom() {
+    const container = document.getElementById('messagesContainer');
+    container.scrollTop = container.scrollHeight;
+}
+
+// File upload handling
+document.addEventListener('DOMContentLoaded', function() {
+    const fileInput = document.getElementById('fileInput');
+    const fileInfo = document.getElementById('fileInfo');
+    const fileName = document.getElementById('fileName');
+    const fileButton = document.getElementById('fileButton');
+    const removeFileBtn = document.getElementById('removeFile');
+    
+    if (fileInput && fileInfo && fileName && fileButton) {
+        fileInput.addEventListener('change', function() {
+            if (this.files.length > 0) {
+                const file = this.files[0];
+                fileName.textContent = file.name;
+                fileInfo.style.display = 'block';
+                fileButton.classList.add('btn-success');
+                fileButton.classList.remove('btn-outline-secondary');
+            } else {
+                fileInfo.style.display = 'none';
+                fileButton.classList.remove('btn-success');
+                fileButton.classList.add('btn-outline-secondary');
+            }
+        });
+
+        removeFileBtn.addEventListener('click', function() {
+            fileInput.value = '';
+            fileInfo.style.display = 'none';
+            fileButton.classList.remove('btn-success');
+            fileButton.classList.add('btn-outline-secondary');
+        });
+    }
+
+    // Auto-resize textarea
+    const messageInput = document.getElementById('messageInput');
+    if (messageInput) {
+        messageInput.addEventListener('input', function() {
+            this.style.height = 'auto';
+            this.style.height = Math.min(this.scrollHeight, 120) + 'px';
+        });
+
+        // Submit on Enter (but not Shift+Enter)
+        messageInput.addEventListener('keydown', function(e) {
+            if (e.key === 'Enter' && !e.shiftKey) {
+                e.preventDefault();
+                document.getElementById('messageForm').submit();
+            }
+        });
+    }
+
+    // Scroll to bottom on page load
+    scrollToBottom();
+});
+
+// WebSocket connection
+// Page specific values room.html এর roomConfig থেকে - এই file hashed, long-cache static
+const roomConfig = JSON.parse(document.getElementById('roomConfig').textContent);
+const roomId = roomConfig.room_id;
+const currentUser = roomConfig.username;
+const canModerate = roomConfig.can_moderate;
+
+let chatSocket = null;
+let typingTimer = null;
+let isTyping = false;
+
+// Wire protocol - server MessagePack subprotocol দিলে binary frames, না হলে JSON
+const wireProtocol = JSON.parse(document.getElementById('wireProtocol').textContent);
+const wireKeyCodes = Object.fromEntries(wireProtocol.keys.map((key, i) => [key, i]));
+const wireTypeCodes = Object.fromEntries(wireProtocol.types.map((type, i) => [type, i]));
+const wireUuidKeys = new Set(wireProtocol.uuid_keys);
+const textEncoder = new TextEncoder();
+const textDecoder = new TextDecoder();
+
+function uuidToBytes(value) {
+    const hex = value.replace(/-/g, '');
+    if (!/^[0-9a-f]{32}$/i.test(hex)) return value;
+    const bytes = new Uint8Array(16);
+    for (let i = 0; i < 16; i++) bytes[i] = parseInt(hex.substr(i * 2, 2), 16);
+    return bytes;
+}
+
+function bytesToUuid(bytes) {
+    const hex = Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+    return hex.substr(0, 8) + '-' + hex.substr(8, 4) + '-' + hex.substr(12, 4) + '-' + hex.substr(16, 4) + '-' + hex.substr(20);
+}
+
+// chat.protocol.compact() / expand() এর JavaScript version
+function compactFrame(value, key) {
+    if (value instanceof Uint8Array) return value;
+    if (Array.isArray(value)) return value.map(v => compactFrame(v));
+    if (value !== null && typeof value === 'object') {
+        const result = new Map();
+        for (const [k, v] of Object.entries(value)) {
+            result.set(k in wireKeyCodes ? wireKeyCodes[k] : k, compactFrame(v, k));
+        }
+        return result;
+    }
+    if (key === 'type' && value in wireTypeCodes) return wireTypeCodes[value];
+    if (wireUuidKeys.has(key) && typeof value === 'string') return uuidToBytes(value);
+    return value;
+}
+
+function expandFrame(value, key) {
+    if (value instanceof Uint8Array) {
+        return wireUuidKeys.has(key) && value.length === 16 ? bytesToUuid(value) : value;
+    }
+    if (Array.isArray(value)) return value.map(v => expandFrame(v));
+    if (value instanceof Map) {
+        const result = {};
+        for (const [k, v] of value) {
+            const name = typeof k === 'number' && k < wireProtocol.keys.length ? wireProtocol.keys[k] : k;
+            result[name] = expandFrame(v, name);
+        }
+        return result;
+    }
+    if (key === 'type' && typeof value === 'number') return wireProtocol.types[value];
+    return value;
+}
+
+// Minimal MessagePack - nil, bool, int, float64, str, bin, array, map
+function msgpackEncode(value) {
+    const bytes = [];
+    const pushUint = (n, size) => { for (let i = size - 1; i >= 0; i--) bytes.push(Math.floor(n / 2 ** (8 * i)) & 0xff); };
+    const pushHeader = (n, fix, tags, fixLimit) => {
+        if (fix !== null && n < fixLimit) bytes.push(fix | n);
+        else if (tags[0] !== null && n < 0x100) { bytes.push(tags[0]); pushUint(n, 1); }
+        else if (n < 0x10000) { bytes.push(tags[1]); pushUint(n, 2); }
+        else { bytes.push(tags[2]); pushUint(n, 4); }
+    };
+    const write = (v) => {
+        if (v === null || v === undefined) bytes.push(0xc0);
+        else if (v === true) bytes.push(0xc3);
+        else if (v === false) bytes.push(0xc2);
+        else if (typeof v === 'number' && Number.isInteger(v) && Math.abs(v) < 2 ** 31) {
+            if (v >= 0 && v < 0x80) bytes.push(v);
+            else if (v < 0 && v >= -32) bytes.push(v & 0xff);
+            else if (v >= 0) { bytes.push(0xce); pushUint(v, 4); }
+            else { bytes.push(0xd2); pushUint(v >>> 0, 4); }
+        } else if (typeof v === 'number') {
+            const view = new DataView(new ArrayBuffer(8));
+            view.setFloat64(0, v);
+            bytes.push(0xcb, ...new Uint8Array(view.buffer));
+        } else if (typeof v === 'string') {
+            const data = textEncoder.encode(v);
+            pushHeader(data.length, 0xa0, [0xd9, 0xda, 0xdb], 32);
+            bytes.push(...data);
+        } else if (v instanceof Uint8Array) {
+            pushHeader(v.length, null, [0xc4, 0xc5, 0xc6], 0);
+            bytes.push(...v);
+        } else if (Array.isArray(v)) {
+            pushHeader(v.length, 0x90, [null, 0xdc, 0xdd], 16);
+            v.forEach(write);
+        } else if (v instanceof Map) {
+            pushHeader(v.size, 0x80, [null, 0xde, 0xdf], 16);
+            for (const [k, item] of v) { write(k); write(item); }
+        }
+    };
+    write(value);
+    return new Uint8Array(bytes);
+}
+
+function msgpackDecode(buffer) {
+    const view = new DataView(buffer);
+    let pos = 0;
+    const uint = (size) => { let n = 0; for (let i = 0; i < size; i++) n = n * 256 + view.getUint8(pos++); return n; };
+    const str = (n) => { const s = textDecoder.decode(new Uint8Array(buffer, pos, n)); pos += n; return s; };
+    const bin = (n) => { const b = new Uint8Array(buffer.slice(pos, pos + n)); pos += n; return b; };
+    const array = (n) => { const a = []; for (let i = 0; i < n; i++) a.push(read()); return a; };
+    const map = (n) => { const m = new Map(); for (let i = 0; i < n; i++) { const k = read(); m.set(k, read()); } return m; };
+    const read = () => {
+        const tag = view.getUint8(pos++);
+        if (tag < 0x80) return tag;
+        if (tag >= 0xe0) return tag - 0x100;
+        if (tag >= 0x80 && tag <= 0x8f) return map(tag & 0x0f);
+        if (tag >= 0x90 && tag <= 0x9f) return array(tag & 0x0f);
+        if (tag >= 0xa0 && tag <= 0xbf) return str(tag & 0x1f);
+        let value;
+        switch (tag) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: return bin(uint(1));
+            case 0xc5: return bin(uint(2));
+            case 0xc6: return bin(uint(4));
+            case 0xca: value = view.getFloat32(pos); pos += 4; return value;
+            case 0xcb: value = view.getFloat64(pos); pos += 8; return value;
+            case 0xcc: return uint(1);
+            case 0xcd: return uint(2);
+            case 0xce: return uint(4);
+            case 0xcf: return uint(8);
+            case 0xd0: value = view.getInt8(pos); pos += 1; return value;
+            case 0xd1: value = view.getInt16(pos); pos += 2; return value;
+            case 0xd2: value = view.getInt32(pos); pos += 4; return value;
+            case 0xd3: value = Number(view.getBigInt64(pos)); pos += 8; return value;
+            case 0xd9: return str(uint(1));
+            case 0xda: return str(uint(2));
+            case 0xdb: return str(uint(4));
+            case 0xdc: return array(uint(2));
+            case 0xdd: return array(uint(4));
+            case 0xde: return map(uint(2));
+            case 0xdf: return map(uint(4));
+        }
+        throw new Error('Unsupported MessagePack type 0x' + tag.toString(16));
+    };
+    return read();
+}
+
+function usesBinaryProtocol() {
+    return chatSocket && wireProtocol.subprotocol && chatSocket.protocol === wireProtocol.subprotocol;
+}
+
+function sendFrame(frame) {
+    chatSocket.send(usesBinaryProtocol() ? msgpackEncode(compactFrame(frame)) : JSON.stringify(frame));
+}
+
+function decodeFrame(data) {
+    return typeof data === 'string' ? JSON.parse(data) : expandFrame(msgpackDecode(data));
+}
+
+function connectWebSocket() {
+    const wsScheme = window.location.protocol == "https:" ? "wss" : "ws";
+    const wsPath = wsScheme + '://' + window.location.host + '/ws/chat/' + roomId + '/';
+    
+    chatSocket = wireProtocol.subprotocol ? new WebSocket(wsPath, [wireProtocol.subprotocol]) : new WebSocket(wsPath);
+    chatSocket.binaryType = 'arraybuffer';
+    
+    chatSocket.onopen = function(e) {
+        console.log('WebSocket connected');
+        const statusElement = document.getElementById('connectionStatus');
+        if (statusElement) {
+            statusElement.className = 'badge bg-success';
+            statusElement.textContent = 'Connected';
+        }
+    };
+    
+    chatSocket.onmessage = function(e) {
+        const data = decodeFrame(e.data);
+        console.log('Received:', data);
+        
+        if (data.type === 'message') {
+            displayMessage(data.message);
+        } else if (data.type === 'connection') {
+            console.log('Connection confirmed:', data.message);
+        } else if (data.type === 'user_status') {
+            displaySystemMessage(data.message);
+        } else if (data.type === 'typing') {
+            handleTypingIndicator(data);
+        } else if (data.type === 'reaction') {
+            handleReactionUpdate(data);
+        } else if (data.type === 'message_update') {
+            handleMessageUpdate(data.message);
+        }
+    };
+    
+    chatSocket.onclose = function(e) {
+        console.log('WebSocket disconnected');
+        const statusElement = document.getElementById('connectionStatus');
+        if (statusElement) {
+            statusElement.className = 'badge bg-danger';
+            statusElement.textContent = 'Disconnected';
+        }
+        
+        // Attempt to reconnect after 3 seconds
+        setTimeout(connectWebSocket, 3000);
+    };
+    
+    chatSocket.onerror = function(e) {
+        console.error('WebSocket error:', e);
+    };
+}
+
+// Display new message
+function displayMessage(message) {
+    const messagesContainer = document.getElementById('messagesContainer');
+    const isOwnMessage = message.sender === currentUser;
+    
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'message mb-3 ' + (isOwnMessage ? 'text-end' : '');
+    messageDiv.dataset.messageId = message.id;
+    
+    const messageContent = document.createElement('div');
+    messageContent.className = 'd-inline-block max-width-75 rounded p-2 ' + 
+        (isOwnMessage ? 'bg-primary text-white' : 'bg-light');
+    
+    let htmlContent = '';
+    if (!isOwnMessage) {
+        htmlContent += '<small class="fw-bold text-primary">' + message.sender + '</small><br>';
+    }
+    if (message.reply_to) {
+        htmlContent += '<div class="reply-preview small border-start ps-2 mb-1"><strong>' +
+            escapeHtml(message.reply_to.sender) + '</strong>: ' + escapeHtml(message.reply_to.content) + '</div>';
+    }
+    htmlContent += '<div class="message-content">' + escapeHtml(message.content).replace(/\n/g, '<br>') + '</div>';
+    htmlContent += '<small class="' + (isOwnMessage ? 'text-light' : 'text-muted') + '">';
+    htmlContent += message.timestamp + ' <span class="edited-marker"></span></small>';
+    
+    messageContent.innerHTML = htmlContent;
+    messageDiv.appendChild(messageContent);
+
+    if (message.message_type !== 'system') {
+        const actionsDiv = document.createElement('div');
+        actionsDiv.className = 'message-actions small';
+        let actionsHtml = '<button type="button" class="btn btn-sm btn-link p-0 text-muted" data-action="reply" data-sender="' +
+            escapeHtml(message.sender) + '">Reply</button>';
+        if (isOwnMessage) {
+            actionsHtml += '<button type="button" class="btn btn-sm btn-link p-0 text-muted ms-2" data-action="edit">Edit</button>';
+        }
+        if (isOwnMessage || canModerate) {
+            actionsHtml += '<button type="button" class="btn btn-sm btn-link p-0 text-danger ms-2" data-action="delete">Delete</button>';
+        }
+        actionsDiv.innerHTML = actionsHtml;
+        messageDiv.appendChild(actionsDiv);
+
+        const reactionsDiv = document.createElement('div');
+        reactionsDiv.className = 'reactions mt-1';
+        reactionsDiv.dataset.messageId = message.id;
+        reactionsDiv.innerHTML = reactionsHtml(message.id, {});
+        messageDiv.appendChild(reactionsDiv);
+    }
+
+    messagesContainer.appendChild(messageDiv);
+    
+    scrollToBottom();
+}
+
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+// Edit / delete - server শুধু বদলানো fields পাঠায়
+function handleMessageUpdate(delta) {
+    const messageDiv = document.querySelector('.message[data-message-id="' + delta.id + '"]');
+    if (!messageDiv) {
+        return;
+    }
+
+    if (delta.is_deleted) {
+        messageDiv.remove();
+        return;
+    }
+
+    if (delta.content !== undefined) {
+        const contentDiv = messageDiv.querySelector('.message-content');
+        if (contentDiv) {
+            contentDiv.innerHTML = escapeHtml(delta.content).replace(/\n/g, '<br>');
+        }
+    }
+    if (delta.edited_at) {
+        const marker = messageDiv.querySelector('.edited-marker');
+        if (marker) {
+            marker.innerHTML = '<em>(edited)</em>';
+        }
+    }
+}
+
+let replyTo = null;
+
+function setReplyTo(messageId, sender, snippet) {
+    replyTo = messageId;
+    document.getElementById('replySender').textContent = sender;
+    document.getElementById('replySnippet').textContent = snippet.length > 80 ? snippet.slice(0, 77) + '...' : snippet;
+    document.getElementById('replyInfo').style.display = messageId ? 'block' : 'none';
+}
+
+function handleMessageAction(action, messageDiv, button) {
+    const messageId = messageDiv.dataset.messageId;
+    const contentDiv = messageDiv.querySelector('.message-content');
+    const currentContent = contentDiv ? contentDiv.innerText.trim() : '';
+
+    if (!chatSocket || chatSocket.readyState !== WebSocket.OPEN) {
+        alert('Connection failed. Please refresh the page.');
+        return;
+    }
+
+    if (action === 'reply') {
+        setReplyTo(messageId, button.dataset.sender, currentContent);
+        document.getElementById('messageInput').focus();
+    } else if (action === 'edit') {
+        const content = prompt('Edit message', currentContent);
+        if (content && content.trim() && content.trim() !== currentContent) {
+            sendFrame({'type': 'edit', 'message_id': messageId, 'content': content.trim()});
+        }
+    } else if (action === 'delete') {
+        if (confirm('Delete this message?')) {
+            sendFrame({'type': 'delete', 'message_id': messageId});
+        }
+    }
+}
+
+// Reactions - counts server থেকে আসে, নিজের reactions এখানে track করি
+const reactionChoices = roomConfig.reactions;
+const myReactions = {};
+
+function reactionsHtml(messageId, counts) {
+    const mine = myReactions[messageId] || new Set();
+    let html = '';
+    Object.entries(counts).forEach(([emoji, count]) => {
+        if (count > 0) {
+            html += '<button type="button" class="btn btn-sm reaction-badge ' +
+                (mine.has(emoji) ? 'btn-primary' : 'btn-outline-secondary') +
+                '" data-reaction="' + emoji + '">' + emoji + ' ' + count + '</button> ';
+        }
+    });
+    html += '<button type="button" class="btn btn-sm btn-link text-muted p-0 reaction-add" title="Add reaction">+</button>';
+    html += '<span class="reaction-picker d-none">';
+    reactionChoices.forEach(([emoji, label]) => {
+        html += '<button type="button" class="btn btn-sm reaction-choice" data-reaction="' + emoji +
+            '" title="' + label + '">' + emoji + '</button>';
+    });
+    html += '</span>';
+    return html;
+}
+
+function handleReactionUpdate(data) {
+    if (data.user === currentUser) {
+        const mine = myReactions[data.message_id] || (myReactions[data.message_id] = new Set());
+        if (data.action === 'add') {
+            mine.add(data.reaction);
+        } else {
+            mine.delete(data.reaction);
+        }
+    }
+
+    const reactionsDiv = document.querySelector('.reactions[data-message-id="' + data.message_id + '"]');
+    if (reactionsDiv) {
+        reactionsDiv.innerHTML = reactionsHtml(data.message_id, data.counts);
+    }
+}
+
+function toggleReaction(messageId, emoji) {
+    const mine = myReactions[messageId] || new Set();
+    if (chatSocket && chatSocket.readyState === WebSocket.OPEN) {
+        sendFrame({
+            'type': 'reaction',
+            'message_id': messageId,
+            'reaction': emoji,
+            'action': mine.has(emoji) ? 'remove' : 'add'
+        });
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.reactions').forEach(function(reactionsDiv) {
+        const initial = reactionsDiv.dataset.myReactions;
+        myReactions[reactionsDiv.dataset.messageId] = new Set(initial ? initial.split(',') : []);
+    });
+
+    document.getElementById('cancelReply').addEventListener('click', function() {
+        setReplyTo(null, '', '');
+    });
+
+    document.getElementById('messagesContainer').addEventListener('click', function(e) {
+        const button = e.target.closest('button');
+        if (button && button.dataset.action) {
+            handleMessageAction(button.dataset.action, button.closest('.message'), button);
+            return;
+        }
+
+        const reactionsDiv = button && button.closest('.reactions');
+        if (!reactionsDiv) {
+            return;
+        }
+
+        if (button.classList.contains('reaction-add')) {
+            reactionsDiv.querySelector('.reaction-picker').classList.toggle('d-none');
+        } else if (button.dataset.reaction) {
+            toggleReaction(reactionsDiv.dataset.messageId, button.dataset.reaction);
+        }
+    });
+});
+
+// Display system message
+function displaySystemMessage(message) {
+    const messagesContainer = document.getElementById('messagesContainer');
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'text-center my-2';
+    messageDiv.innerHTML = '<small class="text-muted"><em>' + message + '</em></small>';
+    messagesContainer.appendChild(messageDiv);
+    scrollToBottom();
+}
+
+// Handle typing indicator
+function handleTypingIndicator(data) {
+    const typingDiv = document.getElementById('typingIndicator');
+    
+    if (data.is_typing) {
+        typingDiv.innerHTML = '<small class="text-muted"><em>' + data.user + ' is typing...</em></small>';
+        typingDiv.style.display = 'block';
+    } else {
+        typingDiv.style.display = 'none';
+    }
+}
+
+// Send message via WebSocket
+function sendMessage(content) {
+    if (chatSocket && chatSocket.readyState === WebSocket.OPEN) {
+        sendFrame({
+            'type': 'chat_message',
+            'message': content
+        });
+        return true;
+    }
+    return false;
+}
+
+// Send typing indicator
+function sendTypingIndicator(isTyping) {
+    if (chatSocket && chatSocket.readyState === WebSocket.OPEN) {
+        sendFrame({
+            'type': 'typing',
+            'is_typing': isTyping
+        });
+    }
+}
+
+
+// Updated form handler that waits for WebSocket
+document.addEventListener('DOMContentLoaded', function() {
+    const messageForm = document.getElementById('messageForm');
+    const messageInput = document.getElementById('messageInput');
+
+    if (messageForm) {
+        messageForm.addEventListener('submit', function(e) {
+            e.preventDefault(); // Always prevent default form submission
+
+            const content = messageInput.value.trim();
+
+            if (content) {
+                // Wait for WebSocket if it's connecting
+                if (chatSocket === null) {
+                    console.log('WebSocket not initialized yet, waiting...');
+                    setTimeout(() => {
+                        this.dispatchEvent(new Event('submit'));
+                    }, 500);
+                    return;
+                }
+
+                if (chatSocket.readyState === WebSocket.CONNECTING) {
+                    console.log('WebSocket still connecting, waiting...');
+                    setTimeout(() => {
+                        this.dispatchEvent(new Event('submit'));
+                    }, 500);
+                    return;
+                }
+
+                if (chatSocket.readyState === WebSocket.OPEN) {
+                    console.log('Sending via WebSocket');
+                    sendFrame({
+                        'type': 'chat_message',
+                        'message': content,
+                        'reply_to': replyTo
+                    });
+
+                    messageInput.value = '';
+                    setReplyTo(null, '', '');
+                    messageInput.style.height = 'auto';
+                } else {
+                    console.log('WebSocket failed, connection status:', chatSocket.readyState);
+                    alert('Connection failed. Please refresh the page.');
+                }
+            }
+        });
+    }
+
+    // Connect WebSocket immediately
+    connectWebSocket();
+});
+
+// Cleanup on page unload
+window.addEventListener('beforeunload', function() {
+    if (chatSocket) {
+        chatSocket.close();
+    }
+});
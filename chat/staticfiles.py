@@ -0,0 +1,103 @@
+# chat/staticfiles.py
+"""
+Static bundles এর hashed names, precompressed copies আর long-cache serving
+
+Production এ (DEBUG False) `manage.py collectstatic` প্রতিটা file কে content hash সহ
+নামে (room.3f2a9c.js) লেখে আর staticfiles.json manifest বানায় - content বদলালে URL ও
+বদলায়, তাই browser বছরখানেক cache রাখতে পারে। Text files এর পাশে .gz
+(আর brotli থাকলে .br) copy ও লেখা হয়: nginx `gzip_static on;` সেগুলো সরাসরি দেয়।
+
+Proxy ছাড়া চালালে CHAT_SERVE_STATIC = True দিলে serve() একই কাজ করে।
+"""
+import functools
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_GET
+
+try:
+    import brotli
+except ImportError:  # Optional - না থাকলে শুধু gzip
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.txt', '.map', '.html')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+LONG_CACHE = 'public, max-age=31536000, immutable'
+
+
+def _compress(path):
+    """path এর পাশে .gz / .br লেখে - ছোট না হলে লেখে না"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data)
+    for extension, compressed in variants.items():
+        if len(compressed) < len(data):
+            with open(path + extension, 'wb') as f:
+                f.write(compressed)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """ManifestStaticFilesStorage, সাথে hashed text files এর precompressed copies"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for hashed_name in hashed_names:
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                _compress(self.path(hashed_name))
+
+
+@functools.lru_cache(maxsize=None)
+def _hashed_names():
+    return frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def _is_hashed(path):
+    """Manifest এর hashed name হলে content কখনো বদলাবে না"""
+    return path in _hashed_names()
+
+
+def _accepted_encodings(request):
+    header = request.headers.get('Accept-Encoding', '')
+    return {part.split(';')[0].strip() for part in header.split(',')}
+
+
+@require_GET
+def serve(request, path):
+    """STATIC_ROOT থেকে file - client নিলে precompressed copy, hashed হলে long cache"""
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+
+    filename = os.path.basename(full_path)
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    accepted = _accepted_encodings(request)
+    encoding = None
+    for name, extension in ENCODINGS:
+        if name in accepted and os.path.isfile(full_path + extension):
+            encoding, full_path = name, full_path + extension
+            break
+
+    response = FileResponse(open(full_path, 'rb'), content_type=content_type, filename=filename)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = LONG_CACHE if _is_hashed(path) else 'no-cache'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
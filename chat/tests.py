@@ -1,3 +1,999 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+from datetime import timedelta, timezone as dt_timezone
+from unittest import mock, skipIf
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import archive, auth, caching, db, directory, export, fanout, notifications, protocol, replicas, seeding
+from .db import close_pool_connections
+from .layers import HashRing
+from .models import (
+    ChatRoom, Message, MessageReaction, PendingNotification, RoomMembership, create_group_chat, post_message,
+    add_reaction, remove_reaction, edit_message, delete_message, get_or_create_private_chat
+)
+from .profiling import assert_no_n_plus_one
+from .routing import websocket_urlpatterns
+
+User = get_user_model()
+
+IN_MEMORY_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+LIKE = MessageReaction.REACTION_TYPES[0][0]
+LOVE = MessageReaction.REACTION_TYPES[1][0]
+
+
+def make_users(*names):
+    return [User.objects.create_user(name, f'{name}@example.com', 'password') for name in names]
+
+
+class ChatTestCase(TestCase):
+    """Users alice (admin), bob, carol (member) আর একটা group room"""
+
+    def setUp(self):
+        cache.clear()
+        self.alice, self.bob, self.carol = make_users('alice', 'bob', 'carol')
+        self.room = create_group_chat(self.alice, 'Team', members=[self.bob, self.carol])
+
+    def post(self, sender, content):
+        return post_message(self.room.id, sender, Message(content=content))
+
+
+class ReactionCountTests(ChatTestCase):
+    def test_counts_follow_reaction_rows(self):
+        message = self.post(self.alice, 'hello')
+
+        self.assertEqual(add_reaction(message.id, self.bob, LIKE), (True, {LIKE: 1}))
+        self.assertEqual(add_reaction(message.id, self.carol, LIKE), (True, {LIKE: 2}))
+        self.assertEqual(add_reaction(message.id, self.carol, LOVE), (True, {LIKE: 2, LOVE: 1}))
+        self.assertEqual(remove_reaction(message.id, self.bob, LIKE), (True, {LIKE: 1, LOVE: 1}))
+
+        message.refresh_from_db()
+        rows = MessageReaction.objects.filter(message=message)
+        self.assertEqual(message.reaction_counts, {LIKE: rows.filter(reaction=LIKE).count(),
+                                                   LOVE: rows.filter(reaction=LOVE).count()})
+
+    def test_noop_changes_report_unchanged(self):
+        message = self.post(self.alice, 'hello')
+        add_reaction(message.id, self.bob, LIKE)
+
+        self.assertEqual(add_reaction(message.id, self.bob, LIKE), (False, {LIKE: 1}))
+        self.assertEqual(remove_reaction(message.id, self.carol, LIKE), (False, {LIKE: 1}))
+        remove_reaction(message.id, self.bob, LIKE)
+
+        message.refresh_from_db()
+        self.assertEqual(message.reaction_counts, {})
+
+
+class EditDeleteTests(ChatTestCase):
+    def test_only_sender_can_edit(self):
+        message = self.post(self.bob, 'original')
+
+        self.assertIsNone(edit_message(self.room.id, message.id, self.alice, 'admin edit'))
+        self.assertIsNotNone(edit_message(self.room.id, message.id, self.bob, 'fixed'))
+
+        message.refresh_from_db()
+        self.assertEqual(message.content, 'fixed')
+        self.assertTrue(message.is_edited)
+
+    def test_member_cannot_delete_others_message(self):
+        message = self.post(self.bob, 'mine')
+
+        self.assertFalse(delete_message(self.room.id, message.id, self.carol))
+        message.refresh_from_db()
+        self.assertFalse(message.is_deleted)
+
+    def test_sender_and_admin_can_delete(self):
+        own = self.post(self.bob, 'mine')
+        other = self.post(self.carol, 'theirs')
+
+        self.assertTrue(delete_message(self.room.id, own.id, self.bob))
+        self.assertTrue(delete_message(self.room.id, other.id, self.alice))
+        self.assertEqual(
+            set(Message.objects.filter(is_deleted=True).values_list('content', flat=True)),
+            {Message.DELETED_CONTENT},
+        )
+
+    def test_edit_in_another_room_is_rejected(self):
+        message = self.post(self.bob, 'original')
+        other_room = create_group_chat(self.bob, 'Other')
+
+        self.assertIsNone(edit_message(other_room.id, message.id, self.bob, 'moved'))
+
+
+class ProtocolTests(SimpleTestCase):
+    frame = {
+        'type': 'chat_message',
+        'message': {
+            'id': '0b6c1c3e-8f51-4d8a-9a4e-1f7e6d3b2a10',
+            'content': 'hello',
+            'sender': 'alice',
+            'reply_to': {'id': '5f0a9d7e-2b1c-4e3f-8a6b-9c0d1e2f3a4b', 'content': 'hi'},
+            'unknown_key': [1, 'two'],
+        },
+    }
+
+    def test_compact_expand_round_trip(self):
+        compacted = protocol.compact(self.frame)
+
+        self.assertNotIn('type', compacted)
+        self.assertIsInstance(compacted[protocol.KEY_CODES['message']][protocol.KEY_CODES['id']], bytes)
+        self.assertEqual(protocol.expand(compacted), self.frame)
+
+    def test_non_uuid_ids_pass_through(self):
+        frame = {'type': 'reaction', 'message_id': 'not-a-uuid'}
+        self.assertEqual(protocol.expand(protocol.compact(frame)), frame)
+
+    @skipIf(protocol.msgpack is None, 'msgpack is not installed')
+    def test_msgpack_codec_round_trip(self):
+        encoded = protocol.MSGPACK.encode(self.frame)
+        self.assertEqual(protocol.MSGPACK.decode(**encoded), self.frame)
+
+    def test_negotiate_falls_back_to_json(self):
+        self.assertIs(protocol.negotiate([]), protocol.JSON)
+        self.assertIs(protocol.negotiate(['unknown.v1']), protocol.JSON)
+
+
+class HashRingTests(SimpleTestCase):
+    keys = [f'room-{i}' for i in range(4000)]
+
+    def test_distribution_is_even(self):
+        ring = HashRing(4)
+        counts = [0] * 4
+        for key in self.keys:
+            counts[ring.get(key)] += 1
+
+        for count in counts:
+            self.assertGreater(count, len(self.keys) / 4 * 0.7)
+            self.assertLess(count, len(self.keys) / 4 * 1.3)
+
+    def test_same_key_same_shard(self):
+        self.assertEqual([HashRing(4).get(key) for key in self.keys[:100]],
+                         [HashRing(4).get(key) for key in self.keys[:100]])
+
+    def test_adding_a_shard_only_moves_keys_to_it(self):
+        before, after = HashRing(4), HashRing(5)
+        moved = [key for key in self.keys if before.get(key) != after.get(key)]
+
+        self.assertTrue(all(after.get(key) == 4 for key in moved))
+        self.assertLess(len(moved), len(self.keys) * 0.3)
+
+
+class FakeLayer:
+    """Broadcast pump এর জন্য layer - প্রথম `failures` বার receive এ error দেয়"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.queue = asyncio.Queue()
+        self.groups = {}
+
+    async def new_channel(self, prefix='specific.'):
+        return f'{prefix}fake'
+
+    async def group_add(self, group, channel):
+        self.groups.setdefault(group, set()).add(channel)
+
+    async def group_discard(self, group, channel):
+        self.groups.get(group, set()).discard(channel)
+
+    async def receive(self, channel):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('layer down')
+        return await self.queue.get()
+
+
+class FakeConsumer:
+    def __init__(self, name):
+        self.channel_name = name
+        self.events = []
+        self.close_code = None
+
+    async def chat_message(self, event):
+        self.events.append(event['message'])
+
+    async def close(self, code=None):
+        self.close_code = code
+
+
+class FanoutTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(fanout._rooms.clear)
+
+    def run_with(self, layer, scenario):
+        with mock.patch.object(fanout, 'get_channel_layer', return_value=layer):
+            asyncio.run(scenario())
+
+    def test_one_subscription_per_worker(self):
+        layer = FakeLayer()
+        first, second = FakeConsumer('a'), FakeConsumer('b')
+
+        async def scenario():
+            await fanout.subscribe(1, 'chat_1', first)
+            await fanout.subscribe(1, 'chat_1', second)
+            self.assertEqual(fanout.local_subscribers(1), 2)
+            self.assertEqual(layer.groups['chat_1'], {'broadcast.fake'})
+
+            await layer.queue.put({'type': 'chat_message', 'message': 'hello'})
+            await asyncio.sleep(0.05)
+            self.assertEqual((first.events, second.events), (['hello'], ['hello']))
+
+            await fanout.unsubscribe(1, first)
+            self.assertEqual(layer.groups['chat_1'], {'broadcast.fake'})
+            await fanout.unsubscribe(1, second)
+            self.assertEqual(layer.groups['chat_1'], set())
+            self.assertEqual(fanout.local_subscribers(1), 0)
+
+        self.run_with(layer, scenario)
+
+    def test_pump_restarts_after_layer_error(self):
+        layer = FakeLayer(failures=2)
+        consumer = FakeConsumer('a')
+
+        async def scenario():
+            await fanout.subscribe(1, 'chat_1', consumer)
+            await layer.queue.put({'type': 'chat_message', 'message': 'after restart'})
+            await asyncio.sleep(1)  # 0.2s + 0.4s backoff
+            self.assertEqual(consumer.events, ['after restart'])
+            self.assertEqual(fanout._rooms[1].restarts, 0)
+            self.assertIsNone(consumer.close_code)
+            await fanout.unsubscribe(1, consumer)
+
+        self.run_with(layer, scenario)
+
+    def test_sockets_close_after_repeated_failures(self):
+        layer = FakeLayer(failures=float('inf'))
+        consumers = [FakeConsumer('a'), FakeConsumer('b')]
+
+        async def scenario():
+            for consumer in consumers:
+                await fanout.subscribe(1, 'chat_1', consumer)
+            await asyncio.sleep(0.5)  # MAX_PUMP_RESTARTS=1: একবার restart (0.2s), তারপর হাল ছাড়ে
+            self.assertEqual([consumer.close_code for consumer in consumers], [1011, 1011])
+            self.assertNotIn(1, fanout._rooms)
+            self.assertEqual(layer.groups['chat_1'], set())
+
+        with mock.patch.object(fanout, 'MAX_PUMP_RESTARTS', 1):
+            self.run_with(layer, scenario)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class ArchiveTestCase(ChatTestCase):
+    """Room এ ১০ দিন আগের m0..m9 messages, temporary archive root এ"""
+
+    compression = 'gzip'
+
+    def setUp(self):
+        super().setUp()
+        self.archive_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_root, ignore_errors=True)
+        settings_override = override_settings(CHAT_ARCHIVE_ROOT=self.archive_root,
+                                              CHAT_ARCHIVE_COMPRESSION=self.compression)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        Message.objects.filter(room=self.room).delete()
+        start = timezone.now() - timedelta(days=10)
+        for i in range(10):
+            message = self.post(self.alice, f'm{i}')
+            Message.objects.filter(pk=message.pk).update(timestamp=start + timedelta(minutes=i))
+
+    def archive_all(self, batch_size=3):
+        return archive.archive_room(self.room, timezone.now() - timedelta(days=1), batch_size=batch_size)
+
+    def contents(self, history):
+        return [message['content'] for message in history]
+
+
+class ArchiveTests(ArchiveTestCase):
+    def test_history_pages_through_archive(self):
+        self.assertEqual(self.archive_all(), 10)
+        self.post(self.alice, 'hot')
+
+        first = archive.load_history(self.room.id, limit=4)
+        self.assertEqual(self.contents(first), ['m7', 'm8', 'm9', 'hot'])
+        self.assertTrue(first[0]['archived'])
+        self.assertFalse(first[-1]['archived'])
+
+        second = archive.load_history(self.room.id, before=timezone.datetime.fromisoformat(first[0]['datetime']),
+                                      limit=10)
+        self.assertEqual(self.contents(second), [f'm{i}' for i in range(7)])
+
+    def test_rerun_does_not_duplicate(self):
+        rows = list(Message.objects.filter(room=self.room).order_by('timestamp').values(*archive.ARCHIVE_FIELDS))
+        writer = archive.ArchiveWriter(self.room.id)
+        for row in rows[:5]:
+            writer.write(row)
+        writer.close()  # Interrupted run - files লেখা হয়েছে কিন্তু delete হয়নি
+        self.archive_all()
+
+        history = archive.load_history(self.room.id, limit=50)
+        self.assertEqual(self.contents(history), [f'm{i}' for i in range(10)])
+
+
+@skipIf(archive.zstandard is None, 'zstandard is not installed')
+class ZstdArchiveTests(ArchiveTests):
+    compression = 'zstd'
+
+
+class ExportTests(ArchiveTestCase):
+    async def test_asgi_export_streams_incrementally(self):
+        iter_room_records, produced = export.iter_room_records, []
+
+        def tracked(room_id, **kwargs):
+            for record in iter_room_records(room_id, **kwargs):
+                produced.append(record['id'])
+                yield record
+
+        client = AsyncClient()
+        await sync_to_async(client.force_login)(self.bob)
+        with mock.patch.object(export, 'CHUNK_SIZE', 1), mock.patch.object(export, 'iter_room_records', tracked):
+            response = await client.get(reverse('chat:export_room', args=[self.room.id]))
+            self.assertTrue(response.is_async)
+
+            chunks = aiter(response.streaming_content)
+            self.assertEqual(json.loads(await anext(chunks))['content'], 'm0')
+            self.assertEqual(len(produced), 1)  # বাকি rows এখনো পড়া হয়নি
+
+            rest = [chunk async for chunk in chunks]
+        self.assertEqual([json.loads(chunk)['content'] for chunk in rest], [f'm{i}' for i in range(1, 10)])
+        self.assertEqual(len(produced), 10)
+
+    def test_export_api_streams_archive_and_hot_rows(self):
+        self.archive_all()
+        self.post(self.alice, 'hot')
+        self.client.force_login(self.bob)
+
+        response = self.client.get(reverse('chat:export_room', args=[self.room.id]))
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([record['content'] for record in records], [f'm{i}' for i in range(10)] + ['hot'])
+        self.assertEqual([record['archived'] for record in records], [True] * 10 + [False])
+
+    def test_rerun_does_not_duplicate(self):
+        rows = list(Message.objects.filter(room=self.room).order_by('timestamp').values(*archive.ARCHIVE_FIELDS))
+        writer = archive.ArchiveWriter(self.room.id)
+        for row in rows[:5]:
+            writer.write(row)
+        writer.close()  # Interrupted run - files লেখা হয়েছে কিন্তু delete হয়নি
+        self.archive_all()
+
+        exported = list(export.iter_room_records(self.room.id))
+        self.assertEqual([record['content'] for record in exported], [f'm{i}' for i in range(10)])
+
+
+class SeederTests(ChatTestCase):
+    def test_created_counts_match_rows(self):
+        seeder = seeding.Seeder(batch_size=7, seed=1)
+        user_ids = seeder.create_users(12, 'seed')
+        rooms = seeder.create_rooms(user_ids, [5, 4, 3], private_ratio=0.5)
+        seeder.create_messages(rooms, [10, 6, 4], reaction_ratio=0.5)
+
+        room_ids = [room_id for room_id, members in rooms]
+        self.assertEqual(seeder.created, {
+            'users': User.objects.filter(username__startswith='seed').count(),
+            'rooms': ChatRoom.objects.filter(pk__in=room_ids).count(),
+            'memberships': RoomMembership.objects.filter(room_id__in=room_ids).count(),
+            'messages': Message.objects.filter(room_id__in=room_ids).count(),
+            'reactions': MessageReaction.objects.filter(message__room_id__in=room_ids).count(),
+        })
+        self.assertEqual(seeder.created['messages'], 20)
+
+    def test_import_keeps_edits_replies_and_files(self):
+        parent = self.post(self.alice, 'question')
+        reply = post_message(self.room.id, self.bob, Message(content='answer', reply_to=parent))
+        edit_message(self.room.id, reply.id, self.bob, 'answer (edited)')
+        add_reaction(parent.id, self.carol, LIKE)
+        Message.objects.filter(pk=parent.pk).update(file='uploads/notes.txt', file_name='notes.txt', file_size=3)
+        lines = [json.dumps(record) for record in export.iter_room_records(self.room.id)]
+        lines.append(json.dumps({**json.loads(lines[-1]), 'id': 'orphan', 'content': 'orphan', 'reply_to_id': 'missing'}))
+
+        seeder = seeding.Seeder()
+        room = seeder.import_jsonl(lines, 'Imported', self.alice)
+
+        imported = list(Message.objects.filter(room=room).exclude(message_type='system').order_by('timestamp', 'content'))
+        self.assertEqual(len(imported), 3)
+        self.assertEqual(seeder.created['messages'], Message.objects.filter(room=room).count())
+        self.assertEqual(seeder.created['memberships'], 2)
+        self.assertEqual(seeder.dropped, {'reaction_counts': 1, 'reply_to': 1, 'file': 0})
+        self.assertEqual(RoomMembership.objects.filter(room=room).count(), 2)
+        question, answer, orphan = imported
+        self.assertNotEqual(question.pk, parent.pk)
+        self.assertEqual((question.file.name, question.file_name, question.file_size), ('uploads/notes.txt', 'notes.txt', 3))
+        self.assertEqual(question.reaction_counts, {})
+        self.assertEqual(answer.reply_to_id, question.pk)
+        self.assertIsNotNone(answer.edited_at)
+        self.assertIsNone(orphan.reply_to_id)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class ViewTests(ChatTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.alice)
+
+    def test_send_api(self):
+        url = reverse('chat:send_message', args=[self.room.id])
+
+        response = self.client.post(url, json.dumps({'message': 'via json'}), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['message']['content'], 'via json')
+
+        response = self.client.post(url, {'content': 'via form'})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Message.objects.filter(room=self.room, content='via form', sender=self.alice).exists())
+
+        response = self.client.post(url, 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_send_api_rejects_non_members(self):
+        outsider, = make_users('mallory')
+        self.client.force_login(outsider)
+
+        response = self.client.post(reverse('chat:send_message', args=[self.room.id]), {'content': 'hi'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_history_api(self):
+        for i in range(5):
+            self.post(self.bob, f'h{i}')
+        url = reverse('chat:room_history', args=[self.room.id])
+
+        data = self.client.get(url, {'limit': 3}).json()
+        self.assertEqual([m['content'] for m in data['messages']], ['h2', 'h3', 'h4'])
+        self.assertIsNotNone(data['next_before'])
+
+        older = self.client.get(url, {'limit': 3, 'before': data['next_before']}).json()
+        self.assertEqual([m['content'] for m in older['messages']][-2:], ['h0', 'h1'])
+
+        self.assertEqual(self.client.get(url, {'before': 'yesterday'}).status_code, 400)
+
+    def test_history_api_accepts_offsets(self):
+        start = timezone.now() - timedelta(hours=1)
+        for i in range(3):
+            message = self.post(self.bob, f'h{i}')
+            Message.objects.filter(pk=message.pk).update(timestamp=start + timedelta(minutes=i))
+        url = reverse('chat:room_history', args=[self.room.id])
+
+        # h2 এর timestamp, UTC তে লেখা
+        last = start + timedelta(minutes=2)
+        if timezone.is_naive(last):
+            last = timezone.make_aware(last)
+        utc = last.astimezone(dt_timezone.utc)
+        for before in (utc.isoformat(), utc.isoformat().replace('+00:00', 'Z')):
+            response = self.client.get(url, {'before': before})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([m['content'] for m in response.json()['messages']], ['h0', 'h1'])
+
+        self.assertEqual(self.client.get(url, {'before': '0001-01-01T00:00:00+05:00'}).status_code, 400)
+
+    def test_room_header_follows_rename(self):
+        url = reverse('chat:room', args=[self.room.id])
+        self.assertContains(self.client.get(url), 'Team')
+
+        self.room.name = 'Renamed'
+        self.room.save()
+        self.assertContains(self.client.get(url), 'Renamed')
+
+    def test_pages_revalidate_with_etag(self):
+        self.assertContains(self.client.get(reverse('chat:room', args=[self.room.id])), 'name="csrfmiddlewaretoken"')
+        for url in (reverse('chat:home'), reverse('chat:room', args=[self.room.id])):
+            response = self.client.get(url)
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(again.status_code, 304)
+
+    @override_settings(CHAT_METRICS_ENABLED=True)
+    def test_metrics_are_staff_only_by_default(self):
+        url = reverse('chat:metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)  # Test client 127.0.0.1 থেকে
+
+        User.objects.filter(pk=self.alice.pk).update(is_staff=True)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(CHAT_METRICS_ENABLED=True, CHAT_METRICS_ALLOWED_IPS=('10.0.0.5',))
+    def test_metrics_allowed_ips_opt_in(self):
+        self.client.logout()
+        url = reverse('chat:metrics')
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.5').status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class MembershipCacheTests(ChatTestCase):
+    def leave_elsewhere(self):
+        # অন্য worker এ leave - এই process এর version bump হয় না
+        RoomMembership.objects.filter(room=self.room, user=self.bob).update(is_active=False)
+
+    def later(self, seconds):
+        return mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + seconds)
+
+    def test_local_cache_expires_quickly(self):
+        self.assertTrue(caching.is_active_member(self.room.id, self.bob.id))
+        self.leave_elsewhere()
+
+        with self.later(10):
+            self.assertFalse(caching.is_active_member(self.room.id, self.bob.id))
+
+    def test_shared_cache_keeps_fragment_timeout(self):
+        with mock.patch.object(caching, 'uses_shared_cache', return_value=True):
+            self.assertTrue(caching.is_active_member(self.room.id, self.bob.id))
+            self.leave_elsewhere()
+
+            # Shared cache এ leave করা worker version bump করে, তাই এত লম্বা cache নিরাপদ
+            with self.later(10):
+                self.assertTrue(caching.is_active_member(self.room.id, self.bob.id))
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class QueryCountTests(ChatTestCase):
+    """Hot views এর query সংখ্যা - rooms বা messages বাড়লে যেন না বাড়ে"""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            create_group_chat(self.alice, f'Extra {i}', members=[self.bob], is_public=True)
+        for i in range(30):
+            message = self.post(self.bob if i % 2 else self.carol, f'message {i}')
+            add_reaction(message.id, self.alice, LIKE)
+        self.client.force_login(self.alice)
+
+    def test_home_view(self):
+        with assert_no_n_plus_one(max_queries=10):
+            response = self.client.get(reverse('chat:home'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_chat_room_view(self):
+        with assert_no_n_plus_one(max_queries=9):
+            response = self.client.get(reverse('chat:room', args=[self.room.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_send_message_api(self):
+        url = reverse('chat:send_message', args=[self.room.id])
+        self.client.post(url, {'content': 'warm up'})  # Session / membership cache
+
+        # Session, user, INSERT, room UPDATE
+        with assert_no_n_plus_one(max_queries=4) as recorder:
+            response = self.client.post(url, {'content': 'counted'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sum(1 for sql, _ in recorder.queries if sql.startswith('INSERT')), 1)
+
+
+class AuthCacheTests(ChatTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.bob)
+        self.key = auth.user_cache_key(self.bob.pk)
+
+    def session(self):
+        return SessionStore(session_key=self.client.session.session_key)
+
+    def share_cache(self):
+        patcher = mock.patch.object(auth, 'uses_shared_cache', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_local_cache_is_not_used(self):
+        self.assertEqual(auth.get_cached_user(self.session()), self.bob)
+        self.assertIsNone(cache.get(self.key))
+
+    def test_shared_cache_skips_user_query(self):
+        self.share_cache()
+        auth.get_cached_user(self.session())
+        session = self.session()
+        session.get(SESSION_KEY)  # Session query এখানেই
+
+        with self.assertNumQueries(0):
+            self.assertEqual(auth.get_cached_user(session), self.bob)
+
+    def test_session_hash_mismatch_flushes_session(self):
+        self.share_cache()
+        session = self.session()
+        session[HASH_SESSION_KEY] = 'stale'
+
+        self.assertFalse(auth.get_cached_user(session).is_authenticated)
+        self.assertIsNone(session.get(SESSION_KEY))
+
+    def test_logout_invalidates(self):
+        self.share_cache()
+        auth.get_cached_user(self.session())
+        self.assertIsNotNone(cache.get(self.key))
+
+        self.client.logout()
+        self.assertIsNone(cache.get(self.key))
+
+    def test_password_change_invalidates(self):
+        self.share_cache()
+        session = self.session()
+        auth.get_cached_user(session)
+
+        self.bob.set_password('changed')
+        self.bob.save()
+        self.assertIsNone(cache.get(self.key))
+        self.assertFalse(auth.get_cached_user(session).is_authenticated)
+
+
+class ListSink:
+    def __init__(self):
+        self.digests = []
+
+    def send(self, digests):
+        self.digests.extend(digests)
+
+
+@override_settings(CHAT_NOTIFICATIONS_ENABLED=True)
+class NotificationTests(ChatTestCase):
+    """Digest pipeline - test এ LocMemCache একই process এ, তাই shared cache ধরে নেওয়া যায়"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(notifications, 'uses_shared_cache', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        start = timezone.now() - timedelta(minutes=1)
+        RoomMembership.objects.update(last_read_at=start)
+        notifications.collect_messages(until=start)  # প্রথম run শুধু watermark set করে
+
+    def collect(self):
+        return notifications.collect_messages(until=timezone.now())
+
+    def pending(self):
+        return {row.user.username: row.message_count for row in PendingNotification.objects.select_related('user')}
+
+    def test_counts_unread_messages_per_member(self):
+        RoomMembership.objects.filter(user=self.carol).update(is_muted=True)
+        self.post(self.bob, 'one')
+        self.post(self.bob, 'two')
+        self.post(self.alice, 'three')
+
+        self.assertEqual(self.collect(), 2)
+        self.assertEqual(self.pending(), {'alice': 2, 'bob': 1})
+
+        # পরের run শুধু নতুন messages গোনে, আগের row এ count বাড়ে
+        self.post(self.bob, 'four')
+        self.collect()
+        self.assertEqual(self.pending(), {'alice': 3, 'bob': 1})
+
+    def test_messages_seen_while_connected_are_skipped(self):
+        asyncio.run(notifications.amark_connected(self.room.id, self.alice.id))
+        self.post(self.bob, 'seen live')
+        # Digest এর আগেই disconnect - তবু message আসার সময় alice connected ছিল
+        notifications.mark_seen(self.room.id, self.alice.id)
+        asyncio.run(notifications.amark_disconnected(self.room.id, self.alice.id))
+        self.post(self.bob, 'missed')
+
+        self.collect()
+        self.assertEqual(self.pending(), {'alice': 1, 'carol': 2})
+
+    def test_connected_members_are_skipped(self):
+        asyncio.run(notifications.amark_connected(self.room.id, self.carol.id))
+        self.post(self.bob, 'hello')
+
+        self.collect()
+        self.assertEqual(self.pending(), {'alice': 1})
+
+    def test_send_digests(self):
+        self.post(self.bob, 'hello')
+        self.post(self.carol, 'hi')
+        sink = ListSink()
+
+        with mock.patch.object(notifications, 'get_collect_lag', return_value=0):
+            self.assertEqual(notifications.send_digests(sink), 3)
+        digests = {digest['username']: digest['text'] for digest in sink.digests}
+        self.assertEqual(digests, {'alice': '2 new messages in 1 room', 'bob': '1 new message in 1 room',
+                                   'carol': '1 new message in 1 room'})
+        self.assertFalse(PendingNotification.objects.exists())
+
+
+@override_settings(CHAT_DIRECTORY_PAGE_SIZE=2)
+class DirectoryTests(ChatTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = [create_group_chat(self.alice, f'Public {i}', members=[self.bob], is_public=True)
+                       for i in range(5)]
+
+    def version(self):
+        return directory.directory_version('rooms')
+
+    def assert_bumps(self, change, bumps=True):
+        before = self.version()
+        change()
+        self.assertEqual(self.version() != before, bumps)
+
+    def test_pagination(self):
+        first = directory.room_page('members', 1)
+        self.assertEqual((len(first['items']), first['num_pages'], first['count']), (2, 3, 5))
+        self.assertTrue(first['has_next'])
+
+        self.assertEqual(directory.room_page('activity', 'abc')['number'], 1)
+        self.assertEqual(directory.room_page('activity', '-4')['number'], 1)
+        self.assertEqual(directory.room_page('activity', '99')['number'], 3)
+        # শেষ page এর পরের number আলাদা key এ cache হয় না
+        self.assertIsNone(cache.get(directory._page_key('rooms', 'activity', 99)))
+        self.assertIsNotNone(cache.get(directory._page_key('rooms', 'activity', 3)))
+
+    def test_refresh_room_stats(self):
+        room = self.public[0]
+        ChatRoom.objects.filter(pk=room.pk).update(active_member_count=40)
+        directory.refresh_room_stats(room.pk)
+        room.refresh_from_db()
+        self.assertEqual(room.active_member_count, 2)
+
+        membership = RoomMembership.objects.get(room=room, user=self.bob)
+        membership.is_active = False
+        membership.save()
+        room.refresh_from_db()
+        self.assertEqual(room.active_member_count, 1)
+
+    def test_version_bumps_only_for_listed_changes(self):
+        room = self.public[0]
+        membership = RoomMembership.objects.get(room=room, user=self.bob)
+
+        def rename():
+            room.name = 'Renamed'
+            room.save()
+
+        def leave():
+            membership.is_active = False
+            membership.save()
+
+        def mark_read():
+            membership.last_read_at = timezone.now()
+            membership.save(update_fields=['last_read_at'])
+
+        def promote():
+            membership.role = 'moderator'
+            membership.save()
+
+        def touch():
+            room.save()
+
+        self.assert_bumps(rename)
+        self.assert_bumps(leave)
+        self.assert_bumps(mark_read, bumps=False)
+        self.assert_bumps(promote, bumps=False)
+        self.assert_bumps(touch, bumps=False)
+        self.assert_bumps(lambda: self.post(self.bob, 'activity'), bumps=False)
+
+        # Private / non-public rooms directory তে নেই
+        self.assert_bumps(lambda: get_or_create_private_chat(self.alice, self.carol), bumps=False)
+        self.assert_bumps(lambda: create_group_chat(self.alice, 'Hidden', members=[self.bob]), bumps=False)
+
+    def test_join_respects_capacity(self):
+        room = self.public[0]
+        ChatRoom.objects.filter(pk=room.pk).update(max_members=3)
+        dave, erin = make_users('dave', 'erin')
+
+        self.client.force_login(dave)
+        response = self.client.post(reverse('chat:join_room', args=[room.id]))
+        self.assertRedirects(response, reverse('chat:room', args=[room.id]), fetch_redirect_response=False)
+
+        self.client.force_login(erin)
+        response = self.client.post(reverse('chat:join_room', args=[room.id]))
+        self.assertRedirects(response, reverse('chat:home'), fetch_redirect_response=False)
+        self.assertFalse(RoomMembership.objects.filter(room=room, user=erin).exists())
+        room.refresh_from_db()
+        self.assertEqual(room.active_member_count, 3)
+
+    def test_unpublishing_bumps(self):
+        room = self.public[0]
+        room.is_public = False
+        self.assert_bumps(room.save)
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(replicas, 'replica_enabled', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = replicas.ReplicaRouter()
+
+    def read_alias(self):
+        return self.router.db_for_read(Message)
+
+    def test_reads_go_to_replica(self):
+        token = replicas.begin(user_id=1)
+        try:
+            self.assertEqual(self.read_alias(), replicas.REPLICA_ALIAS)
+            self.assertEqual(self.router.db_for_read(ContentTypeStub), None)
+        finally:
+            replicas.end(token)
+
+    @override_settings(CHAT_REPLICA_STICKY_SECONDS=5)
+    def test_reads_stick_to_primary_after_message_write(self):
+        token = replicas.begin(user_id=1)
+        try:
+            replicas.pin()  # post / edit / delete / reaction
+            self.assertEqual(self.read_alias(), replicas.PRIMARY_ALIAS)
+        finally:
+            replicas.end(token)
+
+        # পরের request (বা অন্য worker) ও cache থেকে sticky deadline পায়
+        token = replicas.begin(user_id=1)
+        try:
+            self.assertEqual(self.read_alias(), replicas.PRIMARY_ALIAS)
+        finally:
+            replicas.end(token)
+
+        # অন্য user এর উপর কোনো প্রভাব নেই
+        token = replicas.begin(user_id=2)
+        try:
+            self.assertEqual(self.read_alias(), replicas.REPLICA_ALIAS)
+        finally:
+            replicas.end(token)
+
+    def test_other_writes_do_not_pin(self):
+        token = replicas.begin(user_id=1)
+        try:
+            # last_read_at, presence, session - primary তে যায় কিন্তু reads replica তেই থাকে
+            self.assertEqual(self.router.db_for_write(RoomMembership), replicas.PRIMARY_ALIAS)
+            self.assertEqual(self.read_alias(), replicas.REPLICA_ALIAS)
+        finally:
+            replicas.end(token)
+        self.assertIsNone(cache.get(replicas.sticky_key(1)))
+
+    def test_unsafe_requests_read_primary_without_sticking(self):
+        token = replicas.begin(user_id=1, primary=True)
+        try:
+            self.assertEqual(self.read_alias(), replicas.PRIMARY_ALIAS)
+        finally:
+            replicas.end(token)
+
+        token = replicas.begin(user_id=1)
+        try:
+            self.assertEqual(self.read_alias(), replicas.REPLICA_ALIAS)
+        finally:
+            replicas.end(token)
+
+    @override_settings(CHAT_REPLICA_STICKY_SECONDS=5)
+    def test_stickiness_expires(self):
+        token = replicas.begin(user_id=1, pinned=True)
+        replicas.end(token)
+
+        with mock.patch.object(replicas.time, 'time', return_value=time.time() + 10):
+            token = replicas.begin(user_id=1)
+            try:
+                self.assertEqual(self.read_alias(), replicas.REPLICA_ALIAS)
+            finally:
+                replicas.end(token)
+
+
+class ContentTypeStub:
+    """CHAT_REPLICA_APPS এর বাইরের model"""
+
+    class _meta:
+        app_label = 'contenttypes'
+
+
+class MessageWritePinTests(ChatTestCase):
+    def assert_pins(self, write, pins=True):
+        cache.delete(replicas.sticky_key(self.bob.id))
+        token = replicas.begin(user_id=self.bob.id)
+        try:
+            write()
+        finally:
+            replicas.end(token)
+        self.assertEqual(cache.get(replicas.sticky_key(self.bob.id)) is not None, pins)
+
+    def test_message_mutations_pin(self):
+        message = self.post(self.carol, 'hello')
+        own = self.post(self.bob, 'mine')
+
+        self.assert_pins(lambda: self.post(self.bob, 'new'))
+        self.assert_pins(lambda: add_reaction(message.id, self.bob, LIKE))
+        self.assert_pins(lambda: edit_message(self.room.id, own.id, self.bob, 'edited'))
+        self.assert_pins(lambda: delete_message(self.room.id, own.id, self.bob))
+
+    def test_rejected_and_other_writes_do_not_pin(self):
+        message = self.post(self.carol, 'hello')
+
+        self.assert_pins(lambda: delete_message(self.room.id, message.id, self.bob), pins=False)
+        self.assert_pins(lambda: remove_reaction(message.id, self.bob, LIKE), pins=False)
+        membership = RoomMembership.objects.get(room=self.room, user=self.bob)
+        membership.last_read_at = timezone.now()
+        self.assert_pins(lambda: membership.save(update_fields=['last_read_at']), pins=False)
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class ChatConsumerTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice, self.bob = make_users('alice', 'bob')
+        self.room = create_group_chat(self.alice, 'Team', members=[self.bob])
+        self.application = URLRouter(websocket_urlpatterns)
+
+    def tearDown(self):
+        close_pool_connections()
+
+    async def connect(self, user):
+        communicator = WebsocketCommunicator(self.application, f'/ws/chat/{self.room.id}/')
+        communicator.scope['user'] = user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual((await communicator.receive_json_from())['type'], 'connection')
+        return communicator
+
+    def test_message_and_reaction_flow(self):
+        async def scenario():
+            alice = await self.connect(self.alice)
+            bob = await self.connect(self.bob)
+            try:
+                await alice.send_json_to({'type': 'chat_message', 'message': 'hello'})
+                for communicator in (alice, bob):
+                    event = await communicator.receive_json_from()
+                    self.assertEqual(event['message']['content'], 'hello')
+                message_id = event['message']['id']
+
+                reaction = {'type': 'reaction', 'message_id': message_id, 'reaction': LIKE, 'action': 'add'}
+                await bob.send_json_to(reaction)
+                event = await alice.receive_json_from()
+                self.assertEqual(event['counts'], {LIKE: 1})
+                await bob.receive_json_from()
+
+                # Duplicate add - কিছু বদলায়নি, তাই broadcast ও নেই
+                await bob.send_json_to(reaction)
+                self.assertTrue(await alice.receive_nothing(timeout=0.3))
+            finally:
+                await alice.disconnect()
+                await bob.disconnect()
+
+        asyncio.run(scenario())
+        self.assertEqual(MessageReaction.objects.count(), 1)
+
+    def test_non_member_is_rejected(self):
+        outsider, = make_users('mallory')
+
+        async def scenario():
+            communicator = WebsocketCommunicator(self.application, f'/ws/chat/{self.room.id}/')
+            communicator.scope['user'] = outsider
+            connected, _ = await communicator.connect()
+            self.assertFalse(connected)
+
+        asyncio.run(scenario())
+
+
+@override_settings(CHAT_ASYNC_ORM=True)
+class AsyncOrmConsumerTests(ChatConsumerTests):
+    """একই flows async ORM দিয়ে - run_query কখনো sync thread pool এ যায় না"""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(db, 'database_sync_to_async', side_effect=AssertionError('sync ORM path used'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_edit_and_delete_flow(self):
+        async def scenario():
+            alice = await self.connect(self.alice)
+            bob = await self.connect(self.bob)
+            try:
+                await bob.send_json_to({'type': 'chat_message', 'message': 'typo'})
+                message_id = (await alice.receive_json_from())['message']['id']
+                await bob.receive_json_from()
+
+                await bob.send_json_to({'type': 'edit', 'message_id': message_id, 'content': 'fixed'})
+                self.assertEqual((await alice.receive_json_from())['message']['content'], 'fixed')
+                await bob.receive_json_from()
+
+                # Alice room admin - অন্যের message delete করতে পারে
+                await alice.send_json_to({'type': 'delete', 'message_id': message_id})
+                self.assertTrue((await bob.receive_json_from())['message']['is_deleted'])
+            finally:
+                await alice.disconnect()
+                await bob.disconnect()
+
+        asyncio.run(scenario())
+        message = Message.objects.get(content=Message.DELETED_CONTENT)
+        self.assertTrue(message.is_deleted)
+        self.assertIsNotNone(message.edited_at)
@@ -6,8 +6,14 @@ app_name = 'chat'
 urlpatterns = [
     path('', views.home_view, name='home'),
     path('room/<uuid:room_id>/', views.chat_room_view, name='room'),
+    path('room/<uuid:room_id>/messages/', views.send_message_api, name='send_message'),
+    path('room/<uuid:room_id>/history/', views.room_history_api, name='room_history'),
+    path('room/<uuid:room_id>/export/', views.export_room_view, name='export_room'),
     path('start-chat/<int:user_id>/', views.start_private_chat, name='start_private_chat'),
     path('create-group/', views.create_group_view, name='create_group'),
     path('search-users/', views.search_users, name='search_users'),
+    path('directory/<str:kind>/', views.directory_api, name='directory'),
+    path('join-room/<uuid:room_id>/', views.join_room, name='join_room'),
     path('leave-room/<uuid:room_id>/', views.leave_room, name='leave_room'),
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -1,40 +1,100 @@
+import hashlib
+import json
+import re
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db.models import Q
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
+from django.views.decorators.http import require_POST, require_GET
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from .models import ChatRoom, RoomMembership, Message, get_or_create_private_chat, create_group_chat
+from .models import (
+    ChatRoom, RoomMembership, Message, get_or_create_private_chat, create_group_chat, post_message,
+    get_user_reactions, MessageReaction
+)
 from .forms import MessageForm, GroupChatForm
+from . import directory, metrics, protocol
+from .caching import membership_version, get_fragment_timeout, is_active_member
+from .consumers import broadcast_message, message_payload
+from .archive import load_history
+from .export import export_room, aexport_room, export_filename, FORMATS, ATTACHMENT_MODES
 
 User = get_user_model()
 
 
+CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def page_etag(request, content):
+    """
+    {% csrf_token %} প্রতিটা render এ আলাদা masked value দেয়, তাই ETag hash এর আগে সেটা
+    বাদ যায় - তার বদলে CSRF secret hash হয়। একই secret এর সব masked token valid, তাই
+    304 পাওয়া পুরনো page এর form ও কাজ করে; login এ secret rotate হলে ETag ও বদলায়।
+    """
+    digest = hashlib.md5(CSRF_INPUT_RE.sub(rb'\1\2', content), usedforsecurity=False)
+    digest.update(request.META.get('CSRF_COOKIE', '').encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def revalidated_page(view):
+    """
+    Chat HTML pages - browser প্রতিবার ETag (ConditionalGetMiddleware) দিয়ে revalidate করে,
+    কিছু না বদলালে 304 পায়। ETag নিজে set করা হয় (page_etag), middleware সেটাই compare করে।
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming and not response.has_header('ETag'):
+            response.headers['ETag'] = page_etag(request, response.content)
+        return response
+    return ensure_csrf_cookie(cache_control(private=True, no_cache=True)(wrapper))
+
+
 @login_required
+@revalidated_page
 def home_view(request):
     """Chat home page - user এর সব chat rooms show করবে"""
 
-    # User এর যোগ দেয়া সব rooms
-    user_memberships = RoomMembership.objects.filter(
+    # User এর যোগ দেয়া সব rooms - unread count আর last message id subquery তে, room প্রতি query না
+    unread = Message.objects.filter(
+        room_id=OuterRef('room_id'), timestamp__gt=OuterRef('last_read_at')
+    ).exclude(sender_id=OuterRef('user_id')).order_by().values('room_id').annotate(total=Count('pk')).values('total')
+    latest = Message.objects.filter(room_id=OuterRef('room_id')).order_by('-timestamp').values('id')[:1]
+    user_memberships = list(RoomMembership.objects.filter(
         user=request.user,
         is_active=True
-    ).select_related('room').prefetch_related('room__members__user')
+    ).select_related('room').prefetch_related('room__members__user').annotate(
+        unread=Coalesce(Subquery(unread), 0),
+        last_message_id=Subquery(latest),
+    ))
+    last_messages = Message.objects.in_bulk([m.last_message_id for m in user_memberships if m.last_message_id])
 
     # Active rooms list
     rooms = []
     for membership in user_memberships:
         room = membership.room
         room.membership = membership  # Add membership info to room
-        room.unread_count = membership.unread_count
+        room.unread_count = membership.unread
+        room.last_message = last_messages.get(membership.last_message_id)
         rooms.append(room)
 
-    # All users for starting new chat
-    all_users = User.objects.exclude(id=request.user.id).filter(is_active=True)
-
+    # Discovery - public groups আর users এর cached directory pages (পুরো table load করে না)
     context = {
         'rooms': rooms,
-        'all_users': all_users,
+        'joined_room_ids': {room.id for room in rooms},
+        'directory_rooms': directory.room_page(request.GET.get('sort', 'activity'), request.GET.get('page', 1)),
+        'directory_users': directory.user_page('activity', request.GET.get('users_page', 1)),
         'user': request.user
     }
 
@@ -42,6 +102,7 @@ def home_view(request):
 
 
 @login_required
+@revalidated_page
 def chat_room_view(request, room_id):
     """Individual chat room page"""
 
@@ -54,64 +115,177 @@ def chat_room_view(request, room_id):
         messages.error(request, "You don't have permission to access this chat room.")
         return redirect('chat:home')
 
-    # Get messages (latest 50 messages, oldest first for display)
-    room_messages = Message.objects.filter(
-        room=room,
-        is_deleted=False
-    ).select_related('sender').prefetch_related('reactions')[:50]
-    room_messages = list(reversed(room_messages))  # Show oldest first
-
-    # Mark messages as read
-    membership.last_read_at = timezone.now()
-    membership.save()
-
-    # Get room members
-    room_members = RoomMembership.objects.filter(
-        room=room,
-        is_active=True
-    ).select_related('user')
-
-    # Handle message sending
+    # Handle message sending - history load করার আগেই, যাতে send এ read workload না লাগে
     if request.method == 'POST':
         form = MessageForm(request.POST, request.FILES)
         if form.is_valid():
-            message = form.save(commit=False)
-            message.room = room
-            message.sender = request.user
-            message.save()
-
-            # Update room's updated_at timestamp
-            room.updated_at = timezone.now()
-            room.save()
+            message = post_message(room.id, request.user, form.save(commit=False))
+            broadcast_message(room.id, message)
 
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 # AJAX request - return JSON response
                 return JsonResponse({
                     'success': True,
-                    'message': {
-                        'id': str(message.id),
-                        'content': message.content,
-                        'sender': message.sender.username,
-                        'timestamp': message.timestamp.strftime('%H:%M'),
-                        'message_type': message.message_type
-                    }
+                    'message': message_payload(message)
                 })
 
             return redirect('chat:room', room_id=room_id)
     else:
         form = MessageForm()
 
+    # Get messages (latest 50 messages, oldest first for display)
+    room_messages = Message.objects.filter(
+        room=room,
+        is_deleted=False
+    ).select_related('sender', 'reply_to__sender')[:50]
+    room_messages = list(reversed(room_messages))  # Show oldest first
+
+    # Reactions: count গুলো message এর reaction_counts এ আছে, শুধু নিজের reaction এক query তে
+    my_reactions = get_user_reactions(request.user, [m.id for m in room_messages])
+    for message in room_messages:
+        message.my_reactions = my_reactions.get(message.id, set())
+
+    # Mark messages as read
+    membership.last_read_at = timezone.now()
+    membership.save(update_fields=['last_read_at'])
+
+    # Get room members - lazy queryset, header fragment cache hit হলে query-ই হয় না
+    room_members = RoomMembership.objects.filter(
+        room=room,
+        is_active=True
+    ).select_related('user')
+
     context = {
         'room': room,
         'messages': room_messages,
         'members': room_members,
         'membership': membership,
-        'form': form
+        'form': form,
+        'members_version': membership_version(room.id),
+        'fragment_timeout': get_fragment_timeout(),
+        # Private chat এর header এ "অন্য" member দেখায়, তাই user অনুযায়ী আলাদা cache
+        'header_vary': request.user.id if room.room_type == 'private' else 'all',
+        'reaction_choices': MessageReaction.REACTION_TYPES,
+        'wire_protocol': protocol.client_config(),
+        # room.js (static bundle) এর page specific values
+        'room_config': {
+            'room_id': str(room.id),
+            'username': request.user.username,
+            'can_moderate': membership.role != 'member',
+            'reactions': MessageReaction.REACTION_TYPES,
+        },
     }
 
     return render(request, 'chat/room.html', context)
 
 
+@login_required
+@require_POST
+def send_message_api(request, room_id):
+    """
+    Lightweight message send API - history বা member list load করে না।
+    Form data (content/file) বা JSON body ({"message": "..."}) দুইটাই নেয়।
+    """
+
+    if not is_active_member(room_id, request.user.id):
+        return JsonResponse({'success': False, 'error': "You don't have permission to access this chat room."},
+                            status=403)
+
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+        form = MessageForm({'content': data.get('message', data.get('content'))})
+    else:
+        form = MessageForm(request.POST, request.FILES)
+
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'errors': form.errors}, status=400)
+
+    message = post_message(room_id, request.user, form.save(commit=False))
+    broadcast_message(room_id, message)
+
+    return JsonResponse({'success': True, 'message': message_payload(message)}, status=201)
+
+
+def parse_before(value):
+    """
+    ?before= এর ISO datetime, DB তে যেভাবে timestamp রাখা আছে সেভাবে - USE_TZ=False হলে
+    TIME_ZONE এর naive time (offset সহ value convert হয়), USE_TZ=True হলে aware।
+    """
+    before = datetime.fromisoformat(value)
+    if settings.USE_TZ:
+        return timezone.make_aware(before) if timezone.is_naive(before) else before
+    return timezone.make_naive(before) if timezone.is_aware(before) else before
+
+
+@login_required
+@require_GET
+def room_history_api(request, room_id):
+    """
+    Message history paging - ?before=<ISO datetime>&limit=50
+    Hot table শেষ হলে archive থেকে পড়ে, client কে আলাদা কিছু করতে হয় না।
+    """
+
+    if not is_active_member(room_id, request.user.id):
+        return JsonResponse({'success': False, 'error': "You don't have permission to access this chat room."},
+                            status=403)
+
+    before = request.GET.get('before')
+    try:
+        before = parse_before(before) if before else None
+        limit = min(max(int(request.GET.get('limit', 50)), 1), 200)
+    except (ValueError, OverflowError):
+        return JsonResponse({'success': False, 'error': 'Invalid before or limit'}, status=400)
+
+    history = load_history(room_id, before=before, limit=limit)
+
+    return JsonResponse({
+        'success': True,
+        'messages': history,
+        'next_before': history[0]['datetime'] if len(history) == limit else None,
+    })
+
+
+@login_required
+@require_GET
+def export_room_view(request, room_id):
+    """
+    Room history download - ?format=jsonl|csv&attachments=reference|zip&compress=1
+    StreamingHttpResponse, তাই বড় room ও memory তে load হয় না। ASGI তে async iterator দিতে হয়,
+    নাহলে Django পুরো sync iterator আগে list করে নেয়; WSGI তে উল্টো।
+    """
+
+    if not is_active_member(room_id, request.user.id):
+        messages.error(request, "You don't have permission to access this chat room.")
+        return redirect('chat:home')
+
+    export_format = request.GET.get('format', 'jsonl')
+    attachments = request.GET.get('attachments', 'reference')
+    compress = request.GET.get('compress') == '1'
+    if export_format not in FORMATS or attachments not in ATTACHMENT_MODES:
+        return JsonResponse({'success': False, 'error': 'Invalid format or attachments'}, status=400)
+
+    if attachments == 'zip':
+        content_type = 'application/zip'
+    elif compress:
+        content_type = 'application/gzip'
+    elif export_format == 'csv':
+        content_type = 'text/csv; charset=utf-8'
+    else:
+        content_type = 'application/x-ndjson; charset=utf-8'
+
+    stream = aexport_room if isinstance(request, ASGIRequest) else export_room
+    response = StreamingHttpResponse(
+        stream(room_id, export_format, attachments, compress),
+        content_type=content_type
+    )
+    filename = export_filename(room_id, export_format, attachments, compress)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @login_required
 def start_private_chat(request, user_id):
     """দুইজন user এর মধ্যে private chat start করা"""
@@ -129,11 +303,12 @@ def start_private_chat(request, user_id):
 
 
 @login_required
+@revalidated_page
 def create_group_view(request):
     """Group chat তৈরি করার page"""
 
     if request.method == 'POST':
-        form = GroupChatForm(request.POST)
+        form = GroupChatForm(request.POST, current_user=request.user)
         if form.is_valid():
             name = form.cleaned_data['name']
             description = form.cleaned_data.get('description')
@@ -144,22 +319,78 @@ def create_group_view(request):
                 creator=request.user,
                 name=name,
                 description=description,
-                members=members
+                members=members,
+                is_public=form.cleaned_data.get('is_public', False)
             )
 
             messages.success(request, f'Group "{name}" created successfully!')
             return redirect('chat:room', room_id=room.id)
     else:
-        form = GroupChatForm()
+        form = GroupChatForm(current_user=request.user)
 
+    # Member picker এর প্রথম page - বাকিগুলো directory API থেকে "Load more" এ আসে
     context = {
         'form': form,
-        'all_users': User.objects.exclude(id=request.user.id).filter(is_active=True)
+        'directory_users': directory.user_page('name', 1),
+        'selected_members': request.POST.getlist('members'),
     }
 
     return render(request, 'chat/create_group.html', context)
 
 
+@login_required
+@require_GET
+def directory_api(request, kind):
+    """Directory এর একটা page JSON এ - ?sort=...&page=N"""
+
+    if kind == 'rooms':
+        page = directory.room_page(request.GET.get('sort', 'activity'), request.GET.get('page', 1))
+    elif kind == 'users':
+        page = directory.user_page(request.GET.get('sort', 'name'), request.GET.get('page', 1))
+    else:
+        raise Http404("Unknown directory")
+
+    return JsonResponse(page)
+
+
+@login_required
+@require_POST
+def join_room(request, room_id):
+    """
+    Directory থেকে public group এ join করা। Room row lock করে capacity check আর insert -
+    একসাথে অনেকে join করলেও max_members পার হয় না (signal এ active_member_count একই
+    transaction এ আবার গোনা হয়)।
+    """
+
+    with transaction.atomic():
+        room = get_object_or_404(ChatRoom.objects.select_for_update(), id=room_id, is_public=True,
+                                 room_type='group', is_active=True)
+
+        membership = RoomMembership.objects.filter(room=room, user=request.user).first()
+        if membership and membership.is_active:
+            return redirect('chat:room', room_id=room.id)
+
+        if room.active_member_count >= room.max_members:
+            messages.error(request, f'"{room.name}" is full.')
+            return redirect('chat:home')
+
+        if membership:
+            membership.is_active = True
+            membership.save(update_fields=['is_active'])
+        else:
+            RoomMembership.objects.create(room=room, user=request.user, role='member')
+
+        Message.objects.create(
+            room=room,
+            sender=request.user,
+            message_type='system',
+            content=f"{request.user.username} joined the group"
+        )
+
+    messages.success(request, f'You joined "{room.name}"')
+    return redirect('chat:room', room_id=room.id)
+
+
 @login_required
 def search_users(request):
     """User search API for starting new chats"""
@@ -214,4 +445,18 @@ def leave_room(request, room_id):
     except RoomMembership.DoesNotExist:
         messages.error(request, "You are not a member of this room.")
 
-    return redirect('chat:home')
\ No newline at end of file
+    return redirect('chat:home')
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint - CHAT_METRICS_ENABLED না থাকলে 404। Request paths আর DB
+    timings আছে, তাই শুধু staff বা CHAT_METRICS_ALLOWED_IPS।
+    """
+
+    if not metrics.is_enabled():
+        raise Http404("Metrics are disabled")
+    if not metrics.is_allowed(request):
+        raise PermissionDenied("Metrics are restricted")
+
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
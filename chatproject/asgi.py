@@ -9,14 +9,14 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chatproject.settings')
 django.setup()
 
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
 from channels.security.websocket import AllowedHostsOriginValidator
 import chat.routing
+from chat.auth import CachedAuthMiddlewareStack
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
     "websocket": AllowedHostsOriginValidator(
-        AuthMiddlewareStack(
+        CachedAuthMiddlewareStack(
             URLRouter(
                 chat.routing.websocket_urlpatterns
             )
@@ -5,7 +5,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'your-secret-key-here'
 
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
 
@@ -26,12 +26,16 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',  # Rendered pages এর ETag / 304
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'chat.replicas.ReplicaRoutingMiddleware',
+    'chat.metrics.MetricsMiddleware',
+    'chat.profiling.QueryProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'chatproject.urls'
@@ -52,21 +56,126 @@ TEMPLATES = [
     },
 ]
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database - DB_ENGINE=postgres হলে production profile, না হলে single node SQLite (WAL mode)
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+# Persistent connections - 0 হলে প্রতিটা request / consumer DB call এর পরে connection বন্ধ হয়
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '600'))
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'chat'),
+            'USER': os.environ.get('DB_USER', 'chat'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            # PgBouncer transaction pooling এর পিছনে server-side cursors কাজ করে না
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_PGBOUNCER', '') == '1',
+            'OPTIONS': {
+                'connect_timeout': 5,
+            },
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                'timeout': 20,
+            },
+        }
+    }
+
+# Read replica (chat.replicas) - DB_REPLICA_HOST (Postgres) বা DB_REPLICA_NAME (SQLite file) দিলে
+# চালু হয়। Local এ দুইটা SQLite file দিয়ে চালাতে `manage.py sync_replica --interval 2`
+# primary কে replica তে copy করে replication lag simulate করে।
+if os.environ.get('DB_REPLICA_HOST') or os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        NAME=os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        TEST={'MIRROR': 'default'},
+    )
+    if DB_ENGINE == 'postgres':
+        DATABASES['replica']['HOST'] = os.environ.get('DB_REPLICA_HOST', DATABASES['default']['HOST'])
+
+DATABASE_ROUTERS = ['chat.replicas.ReplicaRouter']
+
+# এই apps এর reads replica তে যায়
+CHAT_REPLICA_APPS = ('chat', 'accounts')
+
+# Write এর পর এতক্ষণ ওই user এর reads primary থেকে (read-your-writes)
+CHAT_REPLICA_STICKY_SECONDS = 5
+
+# SQLite WAL mode (chat.db.configure_sqlite) - readers writer কে block করে না
+CHAT_SQLITE_WAL = os.environ.get('DB_SQLITE_WAL', '1') == '1'
+CHAT_SQLITE_BUSY_TIMEOUT = 20000  # ms
+
+# ChatConsumer এর DB calls এর thread pool - প্রতিটা thread একটা persistent connection রাখে,
+# তাই worker প্রতি connection সংখ্যা এটাই। Postgres এ workers * CHAT_DB_THREADS যেন
+# max_connections (বা PgBouncer pool size) এর নিচে থাকে। SQLite এ একটাই writer চলে।
+CHAT_DB_THREADS = int(os.environ.get('DB_THREADS', '10' if DB_ENGINE == 'postgres' else '4'))
+
+# ChatConsumer এ Django async ORM (aget/acreate/aupdate)। Django 4.2 এ async queries ও
+# asgiref এর একটা shared thread এ চলে, তাই এখনো pool path (off) বেশি throughput দেয় -
+# `manage.py loadtest` এর orm benchmark দিয়ে দুইটা তুলনা করা যায়।
+CHAT_ASYNC_ORM = os.environ.get('CHAT_ASYNC_ORM', '') == '1'
+
+# Cache - multiple worker এ চালালে CACHE_URL দিয়ে shared Redis cache দিতে হবে,
+# না হলে প্রতিটা process এর নিজের LocMemCache থাকে
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Sessions database এ। cached_db শুধু shared cache (CACHE_URL) এর সাথে - LocMemCache এ logout
+# বা password change শুধু নিজের process এর cached session মোছে, অন্য workers পুরনো session রাখে
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'django.contrib.sessions.backends.db')
+
+# WebSocket handshake এ user object কত সেকেন্ড cache এ থাকে (chat.auth)
+CHAT_AUTH_USER_CACHE_TIMEOUT = 30
+
+# Room header / member list fragment cache (seconds)
+CHAT_FRAGMENT_CACHE_TIMEOUT = 300
+
+# CACHE_URL ছাড়া membership check এর cache (seconds) - অন্য worker এর leave local cache এ দেখা যায় না
+CHAT_LOCAL_MEMBERSHIP_CACHE_TIMEOUT = 5
 
 # Authentication
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/chat/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 
-# Static files
+# Static files - production এ hashed names + .gz/.br copies (chat.staticfiles), collectstatic লাগে
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'chat.staticfiles.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Front proxy (nginx) না থাকলে Django থেকে STATIC_ROOT serve করে (precompressed, long cache)
+CHAT_SERVE_STATIC = os.environ.get('CHAT_SERVE_STATIC', '') == '1'
 
 # Media files
 MEDIA_URL = '/media/'
@@ -93,11 +202,70 @@ AUTH_USER_MODEL = 'accounts.CustomUser'
 # Channels configuration
 ASGI_APPLICATION = 'chatproject.asgi.application'
 
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels_redis.core.RedisChannelLayer',
-        'CONFIG': {
-            "hosts": [('127.0.0.1', 6379)],
+# CHANNEL_LAYER_SHARDS=redis://10.0.0.1:6379,redis://10.0.0.2:6379 দিলে room groups
+# room_id এর consistent hash দিয়ে hosts এ ভাগ হয় (chat.layers.ShardedChannelLayer)
+CHANNEL_LAYER_SHARDS = [host for host in os.environ.get('CHANNEL_LAYER_SHARDS', '').split(',') if host]
+
+if len(CHANNEL_LAYER_SHARDS) > 1:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'chat.layers.ShardedChannelLayer',
+            'CONFIG': {
+                'shards': [
+                    {
+                        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+                        'CONFIG': {'hosts': [host]},
+                    }
+                    for host in CHANNEL_LAYER_SHARDS
+                ],
+            },
         },
-    },
-}
\ No newline at end of file
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                "hosts": CHANNEL_LAYER_SHARDS or [('127.0.0.1', 6379)],
+            },
+        },
+    }
+
+# এর বেশি max_members এর room এ broadcast mode (worker level fan-out, chat.fanout)
+CHAT_BROADCAST_MIN_MEMBERS = 1000
+
+# WebSocket binary subprotocols (chat.protocol) - client চাইলে পছন্দের ক্রমে; বাকিরা JSON
+CHAT_WIRE_PROTOCOLS = ('msgpack',)
+
+# Public groups / users directory (chat.directory) - cached pages
+CHAT_DIRECTORY_PAGE_SIZE = 20
+CHAT_DIRECTORY_CACHE_TIMEOUT = 60  # seconds - activity order এর সর্বোচ্চ staleness
+
+# Offline members এর notification digests (chat.notifications, manage.py send_digests)
+# Presence দেখতে shared cache (CACHE_URL) লাগে - LocMemCache এ on করলেও বন্ধ থাকে
+CHAT_NOTIFICATIONS_ENABLED = os.environ.get('CHAT_NOTIFICATIONS_ENABLED', '') == '1'
+CHAT_NOTIFICATION_SINK = os.environ.get('CHAT_NOTIFICATION_SINK', 'chat.notifications.ConsoleSink')
+CHAT_NOTIFICATION_FILE = BASE_DIR / 'digests.jsonl'  # FileSink এর জন্য
+CHAT_DIGEST_INTERVAL = 300  # seconds - send_digests --loop এর default
+CHAT_DIGEST_BATCH_SIZE = 500  # users per transaction
+CHAT_DIGEST_COLLECT_LAG = 5  # seconds - এর চেয়ে নতুন messages পরের run এ collect হয়
+CHAT_PRESENCE_TIMEOUT = 24 * 60 * 60
+
+# Chat metrics - /chat/metrics/ এ Prometheus format এ expose হয়
+CHAT_METRICS_ENABLED = os.environ.get('CHAT_METRICS_ENABLED', '') == '1'
+# Default এ শুধু staff users। Login ছাড়া scrape করাতে হলে Prometheus server এর address এখানে
+# দিতে হবে (comma separated) - opt in। Same-host reverse proxy (nginx -> daphne) এর পিছনে
+# REMOTE_ADDR সবসময় 127.0.0.1, তাই loopback দিলে internet এর যে কেউ scrape করতে পারবে।
+CHAT_METRICS_ALLOWED_IPS = tuple(
+    ip.strip() for ip in os.environ.get('CHAT_METRICS_ALLOWED_IPS', '').split(',') if ip.strip()
+)
+
+# SQL profiling / N+1 detection (development এর জন্য)
+CHAT_QUERY_PROFILING = os.environ.get('CHAT_QUERY_PROFILING', '') == '1'
+CHAT_N_PLUS_ONE_THRESHOLD = 5
+
+# Message retention / archival (manage.py archive_messages)
+CHAT_DEFAULT_RETENTION_DAYS = None  # None = room এ retention_days না থাকলে চিরকাল রাখো
+CHAT_ARCHIVE_ROOT = BASE_DIR / 'archive'
+CHAT_ARCHIVE_COMPRESSION = 'gzip'  # অথবা 'zstd' (zstandard package লাগবে)
+CHAT_ARCHIVE_BATCH_SIZE = 1000